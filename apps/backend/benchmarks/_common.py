@@ -0,0 +1,185 @@
+"""Shared helpers for the standalone benchmarks in this package.
+
+Benchmarks run against a throwaway test database created from the configured
+``DJANGO_SETTINGS_MODULE``, so pointing them at Postgres (``config.settings.local``)
+exercises the production indexes while the default test settings stay fast.
+"""
+
+import os
+import random
+import statistics
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Any
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from foods.models import FoodItem, FoodSourceDocument, build_search_text  # noqa: E402
+
+ADJECTIVES = [
+    "chocolate",
+    "crunchy",
+    "organic",
+    "smoked",
+    "spicy",
+    "vanilla",
+    "roasted",
+    "salted",
+    "greek",
+    "wholegrain",
+    "honey",
+    "chicken",
+    "strawberry",
+    "classic",
+    "light",
+]
+NOUNS = [
+    "protein bar",
+    "yogurt",
+    "granola",
+    "peanut butter",
+    "chicken breast",
+    "oat milk",
+    "rice cakes",
+    "cheddar",
+    "almonds",
+    "hummus",
+    "pasta",
+    "muesli",
+    "chickpeas",
+    "cereal",
+    "salmon",
+]
+BRANDS = [
+    "Fit Brand",
+    "Fresh Farms",
+    "Nordic Dairy",
+    "Golden Mill",
+    "Chicky's",
+    "Alpine",
+    "Sunrise",
+    "Ocean Catch",
+    "Bio Garden",
+    "Maison Dupont",
+]
+
+
+NUTRIENTS = [
+    "energy",
+    "energy-kcal",
+    "fat",
+    "saturated-fat",
+    "monounsaturated-fat",
+    "polyunsaturated-fat",
+    "trans-fat",
+    "cholesterol",
+    "carbohydrates",
+    "sugars",
+    "fiber",
+    "proteins",
+    "salt",
+    "sodium",
+    "calcium",
+    "iron",
+    "potassium",
+    "vitamin-a",
+    "vitamin-c",
+    "vitamin-d",
+]
+
+
+@contextmanager
+def benchmark_database(keepdb: bool = False) -> Iterator[None]:
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def synthetic_food_item(index: int, rng: random.Random) -> FoodItem:
+    name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index % 997}"
+    brands = rng.choice(BRANDS)
+    return FoodItem(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id=str(index),
+        barcode=f"{index:013d}",
+        name=name,
+        brands=brands,
+        search_text=build_search_text(name, brands),
+        kcal_100g=Decimal(rng.randint(10, 90000)) / 100,
+        protein_g_100g=Decimal(rng.randint(0, 5000)) / 100,
+        carbs_g_100g=Decimal(rng.randint(0, 9000)) / 100,
+        fat_g_100g=Decimal(rng.randint(0, 6000)) / 100,
+        raw_source_json={"product": {"code": f"{index:013d}", "product_name": name}},
+        nutriments_json=synthetic_nutriments(rng),
+    )
+
+
+def synthetic_nutriments(rng: random.Random) -> dict[str, Any]:
+    """An OFF-shaped ``nutriments`` object (~3 KB of JSON, like real products)."""
+    nutriments: dict[str, Any] = {}
+    for nutrient in NUTRIENTS:
+        value = round(rng.uniform(0, 100), 3)
+        unit = "kcal" if nutrient == "energy-kcal" else "g"
+        nutriments.update(
+            {
+                nutrient: value,
+                f"{nutrient}_100g": value,
+                f"{nutrient}_serving": round(value * 0.3, 3),
+                f"{nutrient}_unit": unit,
+                f"{nutrient}_value": value,
+                f"{nutrient}_prepared_100g": value,
+            }
+        )
+    return nutriments
+
+
+def seed_catalog(rows: int, batch_size: int = 10_000, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    for start in range(0, rows, batch_size):
+        stop = min(start + batch_size, rows)
+        items = FoodItem.objects.bulk_create(
+            [synthetic_food_item(index, rng) for index in range(start, stop)]
+        )
+        FoodSourceDocument.store(items)
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE foods_fooditem")
+    elapsed = time.perf_counter() - started
+    print(f"seeded {rows} food items in {elapsed:.1f}s")
+
+
+def measure(func: Callable[[], Any], repeat: int, warmup: int = 1) -> dict[str, float]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "max_ms": samples[-1],
+    }
+
+
+def print_report(title: str, results: dict[str, dict[str, float]]) -> None:
+    print(f"\n{title}")
+    print(f"{'case':<32}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for case, stats in results.items():
+        print(
+            f"{case:<32}{stats['p50_ms']:>10.3f}"
+            f"{stats['p95_ms']:>10.3f}{stats['max_ms']:>10.3f}"
+        )
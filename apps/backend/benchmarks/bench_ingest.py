@@ -0,0 +1,102 @@
+"""Ingest throughput: one serializer save per product vs the NDJSON batch path,
+for new, changed and unchanged (same ``content_hash``) products, and end to end
+through the API: one ``POST /api/v1/foods/ingest`` per product (how the catalog
+sync pushes today) vs one streamed ``POST /api/v1/foods/ingest/batch``.
+
+Run from ``apps/backend``::
+
+    DJANGO_SETTINGS_MODULE=config.settings.local \\
+        python -m benchmarks.bench_ingest --rows 20000
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+from django.contrib.auth import get_user_model
+
+from benchmarks._common import benchmark_database
+from foods.ingest import ingest_ndjson
+from foods.models import FoodItem
+from foods.serializers import FoodItemIngestSerializer
+
+
+def product(index: int, offset: int) -> dict[str, object]:
+    code = f"{index:013d}"
+    return {
+        "source": "openfoodfacts",
+        "external_id": code,
+        "barcode": code,
+        "name": f"bench product {index} v{offset}",
+        "brands": "Bench",
+        "kcal_100g": str(100 + offset),
+        "content_hash": f"hash-{index}-{offset}",
+        "raw_source_json": {"product": {"code": code}},
+    }
+
+
+def single_ingest(payloads: list[dict[str, object]]) -> None:
+    for payload in payloads:
+        serializer = FoodItemIngestSerializer(data=payload)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+
+def batch_ingest(payloads: list[dict[str, object]]) -> None:
+    lines = [json.dumps(payload).encode() for payload in payloads]
+    for result in ingest_ndjson(lines):
+        assert result["status"] != "error", result
+
+
+def api_single_ingest(client, payloads: list[dict[str, object]]) -> None:
+    for payload in payloads:
+        response = client.post("/api/v1/foods/ingest", payload, format="json")
+        assert response.status_code == 200, response.content
+
+
+def api_batch_ingest(client, payloads: list[dict[str, object]]) -> None:
+    body = b"".join(json.dumps(payload).encode() + b"\n" for payload in payloads)
+    response = client.generic(
+        "POST", "/api/v1/foods/ingest/batch", body, "application/x-ndjson"
+    )
+    assert b'"error"' not in b"".join(response.streaming_content)
+
+
+def report(name: str, func: Callable[[], None], rows: int) -> None:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28}{rows / elapsed:>12.0f} rows/s{elapsed:>10.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+    from rest_framework.test import APIClient
+
+    with benchmark_database():
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user("bench"))
+        # (label, offset of the rows already stored or None, offset ingested)
+        for label, stored, offset in (
+            ("insert", None, 0),
+            ("update", 0, 1),
+            ("unchanged", 0, 0),
+        ):
+            payloads = [product(index, offset) for index in range(args.rows)]
+            for name, func in (
+                ("single", single_ingest),
+                ("batch", batch_ingest),
+                ("api single", lambda p: api_single_ingest(client, p)),
+                ("api batch", lambda p: api_batch_ingest(client, p)),
+            ):
+                FoodItem.objects.all().delete()
+                if stored is not None:
+                    batch_ingest([product(index, stored) for index in range(args.rows)])
+                report(f"{name} {label}", lambda f=func, p=payloads: f(p), args.rows)
+
+
+if __name__ == "__main__":
+    main()
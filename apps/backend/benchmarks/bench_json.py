@@ -0,0 +1,169 @@
+"""JSON rendering and parsing across real endpoints: DRF's stdlib
+``JSONRenderer``/``JSONParser`` vs the orjson pair in ``config.renderers`` and
+``config.parsers``, end to end through the test client.
+
+The detail case carries an OFF-sized ``raw_source_json``, which the orjson
+renderer splices in still encoded. Run from ``apps/backend``::
+
+    python -m benchmarks.bench_json --rows 2000
+"""
+
+import argparse
+import random
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+
+from benchmarks._common import (
+    benchmark_database,
+    measure,
+    print_report,
+    seed_catalog,
+    synthetic_nutriments,
+)
+from foods.models import FoodItem
+from nutrition.models import MealEntry
+
+
+@contextmanager
+def json_codec(name: str) -> Iterator[None]:
+    """Swap the JSON renderer and parser of every view inheriting the defaults."""
+    # DRF reads settings on import: import it once benchmarks._common has
+    # configured Django.
+    from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+    from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+    from rest_framework.views import APIView
+
+    from config.parsers import ORJSONParser
+    from config.renderers import ORJSONRenderer
+
+    renderer, parser = {
+        "stdlib": (JSONRenderer, JSONParser),
+        "orjson": (ORJSONRenderer, ORJSONParser),
+    }[name]
+    saved = APIView.renderer_classes, APIView.parser_classes
+    APIView.renderer_classes = [renderer, BrowsableAPIRenderer]
+    APIView.parser_classes = [parser, FormParser, MultiPartParser]
+    try:
+        yield
+    finally:
+        APIView.renderer_classes, APIView.parser_classes = saved
+
+
+def source_document(rng: random.Random, index: int) -> dict[str, Any]:
+    """An OFF product document of roughly 40 KB."""
+    return {
+        "code": f"{index:013d}",
+        "product": {
+            "product_name": f"Benchmark product {index}",
+            "nutriments": synthetic_nutriments(rng),
+            "ingredients": [
+                {
+                    "id": f"en:ingredient-{n}",
+                    "text": f"Ingrédient {n}",
+                    "percent_estimate": round(rng.uniform(0, 40), 4),
+                    "vegan": rng.choice(["yes", "no", "maybe"]),
+                }
+                for n in range(120)
+            ],
+            "categories_tags": [f"en:category-{n}" for n in range(40)],
+            "images": {
+                str(n): {"sizes": {"400": {"h": 400, "w": 300}}, "uploaded_t": n}
+                for n in range(30)
+            },
+        },
+    }
+
+
+def seed_entries(user: Any, count: int, rng: random.Random) -> None:
+    food_ids = list(FoodItem.objects.values_list("id", flat=True)[:1000])
+    now = timezone.now()
+    MealEntry.objects.bulk_create(
+        MealEntry(
+            user=user,
+            food_item_id=rng.choice(food_ids),
+            meal_type=rng.choice(MealEntry.MEAL_TYPE_CHOICES)[0],
+            consumed_at=now - timedelta(minutes=index),
+            quantity_g=rng.randint(10, 400),
+        )
+        for index in range(count)
+    )
+
+
+CODECS = ("stdlib", "orjson")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    rng = random.Random(1)
+    from rest_framework.test import APIClient  # see json_codec
+
+    with benchmark_database(), override_settings(NUTRITION_CHANGES_SETTLE_SECONDS=0):
+        seed_catalog(args.rows)
+        item = FoodItem.objects.order_by("id").first()
+        assert item is not None
+        item.raw_source_json = source_document(rng, 0)
+        item.save()
+        user = get_user_model().objects.create_user(username="bench-json")
+        seed_entries(user, args.entries, rng)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        checks = [
+            {"external_id": str(index), "content_hash": "stale"} for index in range(500)
+        ]
+        food_ids = list(FoodItem.objects.values_list("id", flat=True)[:200])
+        bulk = [
+            {
+                "idempotency_key": f"bench-{index}",
+                "food_item_id": food_id,
+                "meal_type": MealEntry.MEAL_LUNCH,
+                "quantity_g": "125.50",
+            }
+            for index, food_id in enumerate(food_ids)
+        ]
+        # Insert once so every measured request replays duplicates.
+        client.post("/api/v1/nutrition/entries/bulk", {"entries": bulk}, "json")
+        cases = {
+            "food detail (40 KB source)": lambda: client.get(
+                f"/api/v1/foods/{item.id}"
+            ),
+            "typeahead (50 rows)": lambda: client.get(
+                "/api/v1/foods/typeahead", {"q": "chi", "limit": 50}
+            ),
+            f"changes ({args.entries} entries)": lambda: client.get(
+                "/api/v1/nutrition/changes", {"limit": args.entries}
+            ),
+            "check batch (500 items)": lambda: client.post(
+                "/api/v1/foods/check/batch", {"items": checks}, "json"
+            ),
+            "bulk entries (200 replays)": lambda: client.post(
+                "/api/v1/nutrition/entries/bulk", {"entries": bulk}, "json"
+            ),
+        }
+
+        responses = {}
+        for codec in CODECS:
+            with json_codec(codec):
+                responses[codec] = [func().content for func in cases.values()]
+        assert responses["stdlib"] == responses["orjson"]
+
+        for name, func in cases.items():
+            results = {}
+            for codec in CODECS:
+                with json_codec(codec):
+                    results[codec] = measure(func, args.repeat)
+            print_report(name, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Read-path cost of the heavy FoodItem JSON columns: full rows vs the light
+projection used by typeahead and the nutrition day view.
+
+Reports latency and the bytes each query returns. Run from ``apps/backend``::
+
+    DJANGO_SETTINGS_MODULE=config.settings.local \\
+        python -m benchmarks.bench_light_reads --rows 200000
+"""
+
+import argparse
+import random
+from datetime import timedelta
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from benchmarks._common import benchmark_database, measure, print_report, seed_catalog
+from foods.models import FoodItem
+from foods.search import search_food_items
+from nutrition.models import MealEntry
+
+QUERIES = ["chi", "chicken b", "prot", "yog"]
+
+
+def result_bytes(queryset: QuerySet[Any]) -> int:
+    """Approximate wire size: the summed length of every returned value."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return sum(
+            len(value) if isinstance(value, (str, bytes)) else 8
+            for row in cursor.fetchall()
+            for value in row
+            if value is not None
+        )
+
+
+def seed_diary(entries_per_day: int, days: int, seed: int = 1) -> Any:
+    rng = random.Random(seed)
+    user = get_user_model().objects.create_user(username="bench-light")
+    food_ids = list(FoodItem.objects.values_list("id", flat=True)[:5000])
+    now = timezone.now()
+    MealEntry.objects.bulk_create(
+        MealEntry(
+            user=user,
+            food_item_id=rng.choice(food_ids),
+            meal_type=rng.choice(MealEntry.MEAL_TYPE_CHOICES)[0],
+            consumed_at=now - timedelta(days=day, minutes=index),
+            quantity_g=rng.randint(10, 400),
+        )
+        for day in range(days)
+        for index in range(entries_per_day)
+    )
+    return user
+
+
+def compare(title: str, cases: dict[str, QuerySet[Any]], repeat: int) -> None:
+    print_report(
+        title,
+        {
+            name: measure(lambda qs=queryset: list(qs.all()), repeat)
+            for name, queryset in cases.items()
+        },
+    )
+    for name, queryset in cases.items():
+        print(f"{name:<32}{result_bytes(queryset):>12} bytes")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--entries-per-day", type=int, default=30)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    with benchmark_database(keepdb=args.keepdb):
+        if not FoodItem.objects.exists():
+            seed_catalog(args.rows)
+        for query in QUERIES:
+            light = search_food_items(query, args.limit)
+            compare(
+                f"typeahead q={query!r} limit={args.limit}",
+                {"full rows": light.defer(None), "light projection": light},
+                args.repeat,
+            )
+
+        user = seed_diary(args.entries_per_day, days=7)
+        entries = MealEntry.objects.filter(
+            user=user, consumed_at__date=timezone.localdate()
+        ).order_by("consumed_at")
+        compare(
+            f"nutrition day, {args.entries_per_day} entries",
+            {
+                "select_related full": entries.select_related("food_item"),
+                "with_food light": entries.with_food(),
+            },
+            args.repeat,
+        )
+
+
+if __name__ == "__main__":
+    main()
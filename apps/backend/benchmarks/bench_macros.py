@@ -0,0 +1,98 @@
+"""Macro arithmetic over a list of entries: the ``Decimal`` loop vs integer
+fixed point, where SQL hands over hundredths (``MealEntryQuerySet.macro_centis``
+and the ``kcal_micros`` annotation) and ``calculate_macros_many`` totals them.
+Pure Python, no database; both paths must produce identical floats.
+
+Run from ``apps/backend``::
+
+    python -m benchmarks.bench_macros --entries 40
+"""
+
+import argparse
+import random
+from decimal import Decimal
+from typing import Any
+
+from benchmarks._common import measure, print_report
+from foods.models import FoodItem
+from nutrition.models import MACRO_COLUMNS
+from nutrition.utils import (
+    calculate_macros,
+    calculate_macros_many,
+    serialize_decimal,
+    serialize_micros,
+    to_centi,
+)
+
+
+def synthetic_entries(count: int, seed: int = 1) -> list[tuple[FoodItem, Decimal]]:
+    rng = random.Random(seed)
+    return [
+        (
+            FoodItem(
+                kcal_100g=Decimal(rng.randint(10, 90000)) / 100,
+                protein_g_100g=Decimal(rng.randint(0, 5000)) / 100,
+                carbs_g_100g=Decimal(rng.randint(0, 9000)) / 100,
+                fat_g_100g=Decimal(rng.randint(0, 6000)) / 100,
+            ),
+            Decimal(rng.randint(100, 40000)) / 100,
+        )
+        for _ in range(count)
+    ]
+
+
+def decimal_day(entries: list[tuple[FoodItem, Decimal]]) -> Any:
+    totals = {
+        macro: Decimal("0") for macro in ("kcal", "protein_g", "carbs_g", "fat_g")
+    }
+    kcal = []
+    for item, quantity in entries:
+        macros = calculate_macros(item, quantity)
+        kcal.append(serialize_decimal(macros["kcal"]))
+        for macro, value in macros.items():
+            totals[macro] += value
+    return kcal, {macro: serialize_decimal(value) for macro, value in totals.items()}
+
+
+def centi_rows(entries: list[tuple[FoodItem, Decimal]]) -> list[tuple[int, ...]]:
+    return [
+        (
+            to_centi(quantity),
+            *(to_centi(getattr(item, column)) for column in MACRO_COLUMNS.values()),
+        )
+        for item, quantity in entries
+    ]
+
+
+def fixed_point_day(rows: list[tuple[int, ...]]) -> Any:
+    kcal = [serialize_micros(row[0] * row[1]) for row in rows]
+    totals = calculate_macros_many(rows)
+    return kcal, {macro: serialize_micros(value) for macro, value in totals.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    entries = synthetic_entries(args.entries)
+    rows = centi_rows(entries)
+    assert decimal_day(entries) == fixed_point_day(rows)
+    print_report(
+        f"{args.entries} entries: per-entry kcal + day totals",
+        {
+            "Decimal": measure(lambda: decimal_day(entries), args.repeat),
+            "fixed point": measure(lambda: fixed_point_day(rows), args.repeat),
+            "totals only, Decimal": measure(
+                lambda: decimal_day(entries)[1], args.repeat
+            ),
+            "totals only, many": measure(
+                lambda: calculate_macros_many(rows), args.repeat
+            ),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
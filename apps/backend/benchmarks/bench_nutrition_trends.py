@@ -0,0 +1,94 @@
+"""Nutrition trend rollups for a year of history: per-entry Decimal loop vs the
+cumulative sums over ``DailyNutritionSummary`` rows behind
+``GET /api/v1/nutrition/summary`` (uncached).
+
+Run from ``apps/backend``::
+
+    DJANGO_SETTINGS_MODULE=config.settings.local \\
+        python -m benchmarks.bench_nutrition_trends --entries-per-day 12
+"""
+
+import argparse
+import random
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from benchmarks._common import benchmark_database, measure, print_report, seed_catalog
+from foods.models import FoodItem
+from nutrition.models import MealEntry
+from nutrition.summaries import entry_day, rebuild_user_summaries
+from nutrition.trends import BUCKETS, DEFAULT_WINDOWS, nutrition_trends
+from nutrition.utils import calculate_macros
+
+
+def seed_year(entries_per_day: int, days: int, seed: int = 1) -> Any:
+    rng = random.Random(seed)
+    user = get_user_model().objects.create_user(username="bench-trends")
+    food_ids = list(FoodItem.objects.values_list("id", flat=True)[:5000])
+    now = timezone.now()
+    # ``bulk_create`` skips the summary signals; rebuild them once afterwards.
+    MealEntry.objects.bulk_create(
+        MealEntry(
+            user=user,
+            food_item_id=rng.choice(food_ids),
+            meal_type=rng.choice(MealEntry.MEAL_TYPE_CHOICES)[0],
+            consumed_at=now - timedelta(days=day, minutes=index),
+            quantity_g=rng.randint(10, 400),
+        )
+        for day in range(days)
+        for index in range(entries_per_day)
+    )
+    rebuild_user_summaries([user.id])
+    return user
+
+
+def per_entry_daily_totals(user: Any, start: Any, end: Any) -> dict[Any, Decimal]:
+    totals: dict[Any, Decimal] = defaultdict(Decimal)
+    entries = MealEntry.objects.filter(
+        user=user, consumed_at__date__range=(start, end)
+    ).with_food()
+    for entry in entries:
+        day = entry_day(entry.consumed_at)
+        totals[day] += calculate_macros(entry.food_item, entry.quantity_g)["kcal"]
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--entries-per-day", type=int, default=12)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    with benchmark_database(keepdb=args.keepdb):
+        if not FoodItem.objects.exists():
+            seed_catalog(args.rows)
+        user = seed_year(args.entries_per_day, args.days)
+        end = timezone.localdate()
+        start = end - timedelta(days=args.days - 1)
+        cases = {
+            "per-entry Decimal loop (day)": lambda: per_entry_daily_totals(
+                user, start, end
+            )
+        }
+        for bucket in BUCKETS:
+            cases[f"summary rollup ({bucket})"] = lambda bucket=bucket: (
+                nutrition_trends(
+                    user.id, start, end, bucket, DEFAULT_WINDOWS[bucket], 2000
+                )
+            )
+        print_report(
+            f"{args.days} days x {args.entries_per_day} entries",
+            {name: measure(func, args.repeat) for name, func in cases.items()},
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Catalog seeding throughput: the NDJSON batch ingest path vs
+``import_off_dump`` mapping inline and on a process pool, for a first import
+and an unchanged re-import of a synthetic gzip JSONL dump.
+
+Run from ``apps/backend``::
+
+    DJANGO_SETTINGS_MODULE=config.settings.local \\
+        python -m benchmarks.bench_off_import --rows 20000 --workers 4
+"""
+
+import argparse
+import gzip
+import json
+import random
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks._common import benchmark_database, synthetic_nutriments
+from foods.ingest import ingest_ndjson
+from foods.models import FoodItem
+from foods.off import map_product
+from foods.off_import import import_off_dump
+
+
+def product(index: int, rng: random.Random) -> dict[str, object]:
+    code = f"{index:013d}"
+    return {
+        "code": code,
+        "product_name": f"bench product {index}",
+        "brands": "Bench",
+        "serving_size": "30 g",
+        "nutriments": synthetic_nutriments(rng),
+        "image_front_url": f"https://images.openfoodfacts.org/{code}.400.jpg",
+        "image_front_thumb_url": f"https://images.openfoodfacts.org/{code}.100.jpg",
+        # Dump records carry far more than the mapper keeps.
+        "ingredients_text": "water, oats, salt " * 40,
+        "categories_tags": [f"en:category-{n}" for n in range(20)],
+    }
+
+
+def batch_ingest(dump: Path) -> None:
+    def payloads():
+        with gzip.open(dump, "rb") as stream:
+            for line in stream:
+                record = json.loads(line)
+                document = {"code": record["code"], "product": record, "status": 1}
+                payload = map_product(document)
+                assert payload is not None
+                yield json.dumps(payload, default=str).encode()
+
+    for result in ingest_ndjson(payloads()):
+        assert result["status"] != "error", result
+
+
+def report(name: str, func: Callable[[], None], rows: int) -> None:
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<32}{rows / elapsed:>12.0f} rows/s{elapsed:>10.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    rng = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as directory, benchmark_database():
+        dump = Path(directory) / "products.jsonl.gz"
+        with gzip.open(dump, "wb") as stream:
+            for index in range(args.rows):
+                stream.write(json.dumps(product(index, rng)).encode() + b"\n")
+
+        cases = {
+            "batch ingest": lambda: batch_ingest(dump),
+            "import_off_dump inline": lambda: import_off_dump(str(dump)),
+            f"import_off_dump {args.workers} workers": lambda: import_off_dump(
+                str(dump), workers=args.workers
+            ),
+        }
+        for name, func in cases.items():
+            FoodItem.objects.all().delete()
+            report(f"{name} (insert)", func, args.rows)
+            report(f"{name} (unchanged)", func, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Per-row cost of the hot list responses: DRF serializers vs the row renderers
+in ``foods.rendering`` and ``nutrition.rendering``.
+
+Typeahead renders ``FoodRow`` tuples as served by the index and result cache;
+the day log renders one day of meal entries (query included, then
+serialization alone). Run from ``apps/backend``::
+
+    python -m benchmarks.bench_serializers --entries 40
+"""
+
+import argparse
+import random
+from datetime import timedelta
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from django.utils import timezone
+
+from benchmarks._common import benchmark_database, measure, print_report, seed_catalog
+from foods.models import FoodItem
+from foods.rendering import CompactFoodRenderer
+from foods.search import FOOD_ROW_FIELDS, food_item_from_row, food_row
+from foods.serializers import FoodItemCompactSerializer
+from nutrition.models import MealEntry
+from nutrition.rendering import MealEntryRenderer
+from nutrition.serializers import MealEntrySerializer
+
+
+def with_images(rows: list[Any], rng: random.Random) -> list[Any]:
+    """Give roughly half the rows stored image variants, like a warm catalog."""
+    pictured = []
+    for row in rows:
+        row = list(row)
+        if rng.random() < 0.5:
+            row[7:11] = [
+                f"foods/{row[3]}/large.jpg",
+                f"foods/{row[3]}/small.jpg",
+                f"foods/{row[3]}/small.webp",
+                FoodItem.IMAGE_STATUS_OK,
+            ]
+        pictured.append(tuple(row))
+    return pictured
+
+
+def seed_day(entries: int, rng: random.Random) -> Any:
+    user = get_user_model().objects.create_user(username="bench-serializers")
+    food_ids = list(FoodItem.objects.values_list("id", flat=True)[:1000])
+    now = timezone.now()
+    MealEntry.objects.bulk_create(
+        MealEntry(
+            user=user,
+            food_item_id=rng.choice(food_ids),
+            meal_type=rng.choice(MealEntry.MEAL_TYPE_CHOICES)[0],
+            consumed_at=now - timedelta(minutes=index),
+            quantity_g=rng.randint(10, 400),
+        )
+        for index in range(entries)
+    )
+    return user
+
+
+def per_row(results: dict[str, dict[str, float]], rows: int) -> None:
+    for case, stats in results.items():
+        print(f"  {case}: {stats['p50_ms'] * 1000 / rows:.1f} us/row")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(1)
+    request = RequestFactory().get("/api/v1/foods/typeahead")
+
+    with benchmark_database():
+        seed_catalog(args.rows)
+        rows = with_images(
+            [
+                food_row(values)
+                for values in FoodItem.objects.values_list(*FOOD_ROW_FIELDS)[
+                    : args.limit
+                ]
+            ],
+            rng,
+        )
+        renderer = CompactFoodRenderer(request)
+        assert (
+            renderer.render_many(rows)
+            == FoodItemCompactSerializer(
+                [food_item_from_row(row) for row in rows],
+                many=True,
+                context={"request": request},
+            ).data
+        )
+        results = {
+            "serializer": measure(
+                lambda: (
+                    FoodItemCompactSerializer(
+                        [food_item_from_row(row) for row in rows],
+                        many=True,
+                        context={"request": request},
+                    ).data
+                ),
+                args.repeat,
+            ),
+            "renderer": measure(
+                lambda: CompactFoodRenderer(request).render_many(rows), args.repeat
+            ),
+        }
+        print_report(f"typeahead page of {len(rows)} rows", results)
+        per_row(results, len(rows))
+
+        user = seed_day(args.entries, rng)
+        day = MealEntry.objects.filter(user=user).order_by("consumed_at")
+        entries = list(day.with_food().with_kcal())
+        entry_rows = list(day.entry_rows())
+        assert (
+            MealEntryRenderer().render_many(entry_rows)
+            == MealEntrySerializer(entries, many=True).data
+        )
+        results = {
+            "serializer + query": measure(
+                lambda: (
+                    MealEntrySerializer(day.with_food().with_kcal(), many=True).data
+                ),
+                args.repeat,
+            ),
+            "renderer + query": measure(
+                lambda: MealEntryRenderer().render_many(day.entry_rows()),
+                args.repeat,
+            ),
+            "serializer only": measure(
+                lambda: MealEntrySerializer(entries, many=True).data, args.repeat
+            ),
+            "renderer only": measure(
+                lambda: MealEntryRenderer().render_many(entry_rows), args.repeat
+            ),
+        }
+        print_report(f"day log of {args.entries} entries", results)
+        per_row(results, args.entries)
+
+
+if __name__ == "__main__":
+    main()
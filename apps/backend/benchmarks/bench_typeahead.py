@@ -0,0 +1,75 @@
+"""Typeahead latency: legacy scan vs ranked search vs the in-process index.
+
+Run from ``apps/backend``::
+
+    DJANGO_SETTINGS_MODULE=config.settings.local \\
+        python -m benchmarks.bench_typeahead --rows 1000000
+"""
+
+import argparse
+import time
+
+from django.db.models import Q
+from django.test import override_settings
+
+from benchmarks._common import benchmark_database, measure, print_report, seed_catalog
+from foods.models import FoodItem
+from foods.search import search_food_items
+from foods.search_index import typeahead_index
+
+QUERIES = ["ch", "chi", "chick", "chicken b", "prot", "yog", "fresh", "dupont", "zzzq"]
+
+
+def legacy_typeahead(query: str, limit: int) -> list[FoodItem]:
+    return list(
+        FoodItem.objects.filter(Q(name__icontains=query) | Q(brands__icontains=query))
+        .order_by("name")
+        .distinct()[:limit]
+    )
+
+
+def ranked_typeahead(query: str, limit: int) -> list[FoodItem]:
+    return list(search_food_items(query, limit))
+
+
+def indexed_typeahead(query: str, limit: int) -> list[FoodItem]:
+    items = typeahead_index.search(query, limit)
+    return items if items is not None else ranked_typeahead(query, limit)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--keepdb", action="store_true")
+    args = parser.parse_args()
+
+    with benchmark_database(keepdb=args.keepdb):
+        if not FoodItem.objects.exists():
+            seed_catalog(args.rows)
+        with override_settings(FOODS_TYPEAHEAD_INDEX_ENABLED=True):
+            started = time.perf_counter()
+            typeahead_index.warm()
+            print(f"warmed index in {time.perf_counter() - started:.1f}s")
+            run_queries(args)
+
+
+def run_queries(args: argparse.Namespace) -> None:
+    for query in QUERIES:
+        results = {
+            "legacy icontains": measure(
+                lambda q=query: legacy_typeahead(q, args.limit), args.repeat
+            ),
+            "ranked search_text": measure(
+                lambda q=query: ranked_typeahead(q, args.limit), args.repeat
+            ),
+            "in-process index": measure(
+                lambda q=query: indexed_typeahead(q, args.limit), args.repeat
+            ),
+        }
+        print_report(f"q={query!r}", results)
+
+
+if __name__ == "__main__":
+    main()
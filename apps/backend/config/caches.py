@@ -0,0 +1,21 @@
+"""Helpers for code that keeps cross-request state in the default cache.
+
+Invalidation through the cache (version counters, per-user generations,
+leases) only works when every process sees the same cache. ``LocMemCache``
+lives inside one process, so with several gunicorn workers, the image worker
+or an import command, a bump made by one process is invisible to the rest.
+Deployments set ``CACHE_URL`` to a shared backend (``dbcache://`` in
+``render.yaml`` and ``docker-compose.prod.yml``); on a process-local one the
+caches that depend on invalidation are bypassed.
+"""
+
+from django.conf import settings
+
+PROCESS_LOCAL_CACHE_BACKENDS = frozenset(
+    {"django.core.cache.backends.locmem.LocMemCache"}
+)
+
+
+def default_cache_is_shared() -> bool:
+    """Whether writes to the default cache are seen by every process."""
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHE_BACKENDS
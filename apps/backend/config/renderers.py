@@ -0,0 +1,97 @@
+"""orjson-backed replacement for DRF's ``JSONRenderer``.
+
+Output matches ``JSONRenderer`` in its default compact form: ``str``, ``int``,
+``float``, ``list`` and ``dict`` (and their subclasses, e.g. ``ReturnDict`` and
+``ErrorDetail``) are encoded by orjson; everything else, datetimes included,
+goes through DRF's ``JSONEncoder.default`` so it renders as before. Indented
+output (``Accept: application/json; indent=4``, the browsable API) and values
+orjson rejects, such as integers wider than 64 bits, fall back to
+``JSONRenderer``.
+
+orjson writes NaN and infinities as ``null``; ``JSONRenderer`` refuses them.
+Output holding a ``null`` is checked for them and, if it has any, rendered by
+``JSONRenderer`` so it raises as before.
+"""
+
+import json
+import math
+import re
+from typing import Any
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+# Non-standard tokens Python's json module writes for non-finite floats.
+_NON_FINITE_TOKEN = re.compile(rb"NaN|Infinity")
+
+
+class PreEncodedJSON:
+    """A JSON document kept in its encoded form, e.g. a stored source document.
+
+    ``ORJSONRenderer`` splices ``encoded`` into the response as is; other
+    renderers decode it first (``JSONEncoder.default`` calls ``tolist``).
+    Only documents stored before ``compress_source_json`` became strict can
+    hold NaN or infinities; they are decoded and rejected like any other.
+    """
+
+    __slots__ = ("encoded",)
+
+    def __init__(self, encoded: bytes) -> None:
+        self.encoded = encoded
+
+    def tolist(self) -> Any:
+        return json.loads(self.encoded)
+
+
+_encoder = JSONEncoder()
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, PreEncodedJSON):
+        if _NON_FINITE_TOKEN.search(value.encoded):
+            # A false positive (the token inside a string) only costs a decode.
+            decoded = value.tolist()
+            if _has_non_finite(decoded):
+                raise ValueError("Out of range float values are not JSON compliant")
+            return decoded
+        return orjson.Fragment(value.encoded)
+    return _encoder.default(value)
+
+
+class ORJSONRenderer(JSONRenderer):
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: str | None = None,
+        renderer_context: dict[str, Any] | None = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if b"null" in ret and _has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, keep the output a strict JavaScript subset.
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+def _has_non_finite(data: Any) -> bool:
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list | tuple):
+            stack.extend(value)
+    return False
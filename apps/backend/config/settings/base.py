@@ -65,6 +65,8 @@ DATABASES = {
     )
 }
 
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -114,6 +116,16 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    # orjson-backed drop-ins for JSONRenderer/JSONParser; same output.
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "config.parsers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
@@ -123,11 +135,62 @@ SPECTACULAR_SETTINGS = {
     "VERSION": "0.1.0",
     "SERVE_PERMISSIONS": ["rest_framework.permissions.AllowAny"],
     "SERVE_AUTHENTICATION": [],
+    "ENUM_NAME_OVERRIDES": {
+        "IngestResultStatusEnum": "foods.serializers.INGEST_RESULT_STATUS_CHOICES",
+    },
 }
 
 SENTRY_DSN = env("SENTRY_DSN", default="").strip() or None
 OFF_USER_AGENT = env("OFF_USER_AGENT", default="FitnessApp/0.1 (images)").strip()
 
+# Serve typeahead from an in-process index warmed at worker boot.
+FOODS_TYPEAHEAD_INDEX_ENABLED = env.bool("FOODS_TYPEAHEAD_INDEX_ENABLED", default=False)
+FOODS_TYPEAHEAD_INDEX_REFRESH_SECONDS = env.int(
+    "FOODS_TYPEAHEAD_INDEX_REFRESH_SECONDS", default=30
+)
+# Typeahead result cache: TTL in seconds and the largest match set that is
+# cached whole so longer queries can be refined in memory.
+FOODS_TYPEAHEAD_CACHE_TTL = env.int("FOODS_TYPEAHEAD_CACHE_TTL", default=300)
+FOODS_TYPEAHEAD_CACHE_CANDIDATES = env.int(
+    "FOODS_TYPEAHEAD_CACHE_CANDIDATES", default=200
+)
+# Cache-Control max-age for the food detail endpoints.
+FOODS_DETAIL_CACHE_SECONDS = env.int("FOODS_DETAIL_CACHE_SECONDS", default=300)
+# Image download queue drained by ``manage.py process_image_jobs``.
+FOODS_IMAGE_WORKERS = env.int("FOODS_IMAGE_WORKERS", default=4)
+FOODS_IMAGE_JOB_MAX_ATTEMPTS = env.int("FOODS_IMAGE_JOB_MAX_ATTEMPTS", default=5)
+FOODS_IMAGE_JOB_RETRY_SECONDS = env.int("FOODS_IMAGE_JOB_RETRY_SECONDS", default=30)
+FOODS_IMAGE_JOB_LEASE_SECONDS = env.int("FOODS_IMAGE_JOB_LEASE_SECONDS", default=300)
+# Drain the queue on a background thread of the process that enqueued, for
+# deployments without a process_image_jobs worker sharing the media storage.
+FOODS_IMAGE_JOBS_IN_PROCESS = env.bool("FOODS_IMAGE_JOBS_IN_PROCESS", default=False)
+# Processes that derive thumbnails and WebP variants (0 renders inline).
+FOODS_IMAGE_PROCESS_WORKERS = env.int("FOODS_IMAGE_PROCESS_WORKERS", default=2)
+# How long an SSRF-validated image host resolution is reused.
+FOODS_IMAGE_DNS_TTL_SECONDS = env.int("FOODS_IMAGE_DNS_TTL_SECONDS", default=60)
+# Barcode lookups that miss locally are fetched from this Open Food Facts
+# compatible host ("" disables the fallback); barcodes it does not know are
+# remembered for FOODS_BARCODE_MISS_TTL seconds.
+FOODS_OFF_BASE_URL = env(
+    "FOODS_OFF_BASE_URL", default="https://world.openfoodfacts.org"
+).strip()
+FOODS_OFF_TIMEOUT_SECONDS = env.float("FOODS_OFF_TIMEOUT_SECONDS", default=5.0)
+FOODS_BARCODE_MISS_TTL = env.int("FOODS_BARCODE_MISS_TTL", default=6 * 3600)
+# Nutrition trend summaries: result cache TTL, the longest range served, and
+# how far (as a fraction of the goal) a day's kcal may stray and still count
+# as on goal.
+NUTRITION_SUMMARY_CACHE_TTL = env.int("NUTRITION_SUMMARY_CACHE_TTL", default=3600)
+NUTRITION_SUMMARY_MAX_DAYS = env.int("NUTRITION_SUMMARY_MAX_DAYS", default=731)
+NUTRITION_GOAL_TOLERANCE = env.float("NUTRITION_GOAL_TOLERANCE", default=0.1)
+# Recompute the days logging a food whose macros changed right after commit,
+# on the writing thread, instead of on a background thread.
+NUTRITION_FOOD_REFRESH_INLINE = env.bool("NUTRITION_FOOD_REFRESH_INLINE", default=False)
+# Meal entry changes younger than this are held back from the change feed so
+# late-committing transactions are never skipped by a client's cursor.
+NUTRITION_CHANGES_SETTLE_SECONDS = env.float(
+    "NUTRITION_CHANGES_SETTLE_SECONDS", default=2.0
+)
+
 if SENTRY_DSN:
     sentry_sdk.init(
         dsn=SENTRY_DSN,
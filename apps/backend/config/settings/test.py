@@ -3,13 +3,21 @@ from .base import *
 DEBUG = False
 ALLOWED_HOSTS = ["testserver", "localhost", "127.0.0.1"]
 
-# Use fast, in-memory DB for unit tests
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": ":memory:",
-    }
-}
+# Use fast, in-memory DB for unit tests. CI points TEST_DATABASE_URL at its
+# Postgres service so the PostgreSQL-only paths (``-m postgres``) run too.
+DATABASES = {"default": env.db("TEST_DATABASE_URL", default="sqlite://:memory:")}
+
+# Tests that exercise caching opt in with override_settings.
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+# Render image variants inline instead of spawning worker processes.
+FOODS_IMAGE_PROCESS_WORKERS = 0
+
+# Recompute summaries after food macro changes without a background thread.
+NUTRITION_FOOD_REFRESH_INLINE = True
+
+# Never reach Open Food Facts; barcode lookup tests run a local stand-in.
+FOODS_OFF_BASE_URL = ""
 
 # Speed up tests
 PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
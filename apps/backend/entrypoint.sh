@@ -3,6 +3,8 @@ set -e
 
 # Run migrations
 python manage.py migrate --noinput
+# Table behind CACHE_URL=dbcache://... (no-op for other cache backends)
+python manage.py createcachetable
 
 # Start gunicorn, binding to Render's $PORT (default to 8000 locally if PORT unset)
 exec gunicorn config.wsgi:application \
@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db.models import QuerySet
+from django.http import HttpRequest
 
-from foods.models import FoodItem
+from foods.models import FoodImageJob, FoodItem, ImageBlob
 
 
 @admin.register(FoodItem)
@@ -8,3 +10,20 @@ class FoodItemAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "brands", "barcode", "source")
     search_fields = ("name", "brands", "barcode", "external_id")
     list_filter = ("source",)
+    readonly_fields = ("raw_source_json",)
+
+    def get_queryset(self, request: HttpRequest) -> QuerySet[FoodItem]:
+        return super().get_queryset(request).light()
+
+
+@admin.register(FoodImageJob)
+class FoodImageJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "food_item", "status", "attempts", "available_at")
+    list_filter = ("status",)
+    raw_id_fields = ("food_item",)
+
+
+@admin.register(ImageBlob)
+class ImageBlobAdmin(admin.ModelAdmin):
+    list_display = ("id", "digest", "size", "ref_count", "created_at")
+    search_fields = ("digest",)
@@ -0,0 +1,196 @@
+"""Barcode lookups that fall back to the Open Food Facts product endpoint.
+
+``GET /foods/barcode/<code>`` serves ``FoodItem`` rows first. On a miss the
+product is fetched from ``FOODS_OFF_BASE_URL``, mapped with ``foods.off`` and
+ingested exactly like ``POST /foods/ingest``, so the next scan is local.
+The upstream may answer under a normalized code (a UPC-A scan is stored as
+its EAN-13, with a leading zero), so before asking it a miss also looks for
+the codes that differ from the scanned one only in leading zeros.
+
+Concurrent misses for one barcode share a single upstream request: the
+first caller takes a lease in the default cache (``cache.add``) and the
+others poll for its outcome instead of asking the upstream themselves.
+Barcodes the upstream does not know are remembered for
+``FOODS_BARCODE_MISS_TTL`` seconds, so repeated scans stay local. Upstream
+failures are not cached. Both only span processes when the default cache is
+shared (``CACHE_URL``, see ``config.caches``); under ``LocMemCache`` each
+process leases and remembers on its own.
+
+A miss holds its sync worker for the upstream request, at most about
+``FOODS_OFF_TIMEOUT_SECONDS`` per network operation; callers waiting on
+another's lease give up once the lease expires.
+"""
+
+import json
+import logging
+import re
+import time
+import uuid
+from typing import Any
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import serializers
+
+from foods.image_jobs import ImageJobRequest, enqueue_image_jobs
+from foods.images import should_download_images
+from foods.models import FoodItem
+from foods.off import OFF_PRODUCT_FIELDS, map_product
+from foods.serializers import FoodItemIngestSerializer
+
+logger = logging.getLogger(__name__)
+
+MISS_KEY_PREFIX = "foods:barcode:miss"
+LEASE_KEY_PREFIX = "foods:barcode:lease"
+RESULT_KEY_PREFIX = "foods:barcode:result"
+# How long the outcome of a lookup stays readable by callers that waited on it.
+RESULT_TTL = 60
+LEASE_POLL_SECONDS = 0.1
+MAX_PRODUCT_BYTES = 2 * 1024 * 1024
+# What the upstream is asked for: EAN/UPC-style codes only.
+LOOKUP_BARCODE_RE = re.compile(r"\d{4,24}")
+GTIN_LENGTHS = (8, 12, 13, 14)
+
+
+class UpstreamError(Exception):
+    """The upstream product endpoint could not be reached or answered garbage."""
+
+
+def lookup_barcode(barcode: str) -> int | None:
+    """Fetch and ingest ``barcode`` from the upstream after a local miss.
+
+    Returns the id of the ``FoodItem`` stored under an equivalent code or
+    ingested from the upstream, ``None`` when the upstream does not know the
+    product, and raises ``UpstreamError`` when it is unavailable.
+    """
+    if not settings.FOODS_OFF_BASE_URL or not LOOKUP_BARCODE_RE.fullmatch(barcode):
+        return None
+    local_id = (
+        FoodItem.objects.filter(barcode__in=equivalent_barcodes(barcode))
+        .values_list("id", flat=True)
+        .first()
+    )
+    if local_id is not None:
+        return local_id
+    if cache.get(_miss_key(barcode)):
+        return None
+    lease_key = f"{LEASE_KEY_PREFIX}:{barcode}"
+    token = uuid.uuid4().hex
+    lease_seconds = _lease_seconds()
+    if not cache.add(lease_key, token, lease_seconds):
+        return _wait_for_lookup(barcode, lease_key, lease_seconds)
+    try:
+        item_id = _fetch_and_ingest(barcode)
+        cache.set(_result_key(barcode), {"id": item_id}, RESULT_TTL)
+        return item_id
+    finally:
+        # The lease may have expired and been taken by another caller.
+        if cache.get(lease_key) == token:
+            cache.delete(lease_key)
+
+
+def equivalent_barcodes(barcode: str) -> list[str]:
+    """``barcode`` written with the leading zeros of every GTIN length (EAN-8,
+    UPC-A, EAN-13, GTIN-14) it fits, itself included."""
+    digits = barcode.lstrip("0") or "0"
+    codes = {barcode}
+    codes.update(digits.zfill(size) for size in GTIN_LENGTHS if len(digits) <= size)
+    return sorted(codes)
+
+
+def _wait_for_lookup(barcode: str, lease_key: str, lease_seconds: float) -> int | None:
+    """The outcome of the lookup another caller holds the lease for. Raises
+    ``UpstreamError`` if it failed or did not finish within its lease."""
+    deadline = time.monotonic() + lease_seconds
+    while True:
+        result = cache.get(_result_key(barcode))
+        if result is not None:
+            return result["id"]
+        if cache.get(_miss_key(barcode)):
+            return None
+        if cache.get(lease_key) is None or time.monotonic() >= deadline:
+            raise UpstreamError("concurrent lookup of this barcode failed")
+        time.sleep(LEASE_POLL_SECONDS)
+
+
+def _lease_seconds() -> float:
+    # Connecting and reading each get the timeout; leave room for the ingest.
+    return 2 * settings.FOODS_OFF_TIMEOUT_SECONDS + 5
+
+
+def _miss_key(barcode: str) -> str:
+    return f"{MISS_KEY_PREFIX}:{barcode}"
+
+
+def _result_key(barcode: str) -> str:
+    return f"{RESULT_KEY_PREFIX}:{barcode}"
+
+
+def _fetch_and_ingest(barcode: str) -> int | None:
+    document = fetch_product(barcode)
+    payload = map_product(document) if document is not None else None
+    if payload is None:
+        cache.set(_miss_key(barcode), True, settings.FOODS_BARCODE_MISS_TTL)
+        return None
+
+    serializer = FoodItemIngestSerializer(data=payload)
+    if not serializer.is_valid():
+        logger.warning(
+            "upstream product %s could not be ingested: %s", barcode, serializer.errors
+        )
+        cache.set(_miss_key(barcode), True, settings.FOODS_BARCODE_MISS_TTL)
+        return None
+    try:
+        item = serializer.save()
+    except serializers.ValidationError as exc:
+        # The product's code belongs to another item; nothing to serve.
+        logger.warning("upstream product %s conflicts: %s", barcode, exc.detail)
+        return None
+    if should_download_images(item, serializer.image_signature_changed):
+        enqueue_image_jobs(
+            [
+                ImageJobRequest(
+                    item,
+                    serializer.incoming_image_large_url or item.image_large_source_url,
+                    serializer.incoming_image_small_url or item.image_small_source_url,
+                    serializer.incoming_image_signature or item.image_signature,
+                )
+            ]
+        )
+    # OFF may answer under a normalized code (e.g. UPC-A as EAN-13), so the
+    # caller looks the item up by id rather than by the scanned barcode.
+    return item.id
+
+
+def fetch_product(barcode: str) -> dict[str, Any] | None:
+    """The upstream's product document for ``barcode``, ``None`` if unknown."""
+    query = urlencode({"fields": ",".join(OFF_PRODUCT_FIELDS)})
+    url = (
+        f"{settings.FOODS_OFF_BASE_URL.rstrip('/')}/api/v2/product/"
+        f"{quote(barcode, safe='')}?{query}"
+    )
+    request = Request(
+        url,
+        headers={"User-Agent": settings.OFF_USER_AGENT, "Accept": "application/json"},
+    )
+    try:
+        with urlopen(request, timeout=settings.FOODS_OFF_TIMEOUT_SECONDS) as response:
+            body = response.read(MAX_PRODUCT_BYTES + 1)
+    except HTTPError as exc:
+        if exc.code == 404:
+            return None
+        raise UpstreamError(f"upstream answered {exc.code}") from exc
+    except (URLError, OSError) as exc:
+        raise UpstreamError(str(exc)) from exc
+    if len(body) > MAX_PRODUCT_BYTES:
+        raise UpstreamError("upstream product document too large")
+    try:
+        document = json.loads(body)
+    except ValueError as exc:
+        raise UpstreamError("upstream answered invalid JSON") from exc
+    if not isinstance(document, dict):
+        raise UpstreamError("upstream answered invalid JSON")
+    return document if document.get("status") == 1 else None
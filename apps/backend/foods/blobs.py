@@ -0,0 +1,81 @@
+"""Content-addressed, reference-counted storage for food images.
+
+Identical bytes are written once, under ``foods/blobs/<d[:2]>/<d[2:4]>/<d>.<ext>``
+where ``d`` is their SHA-256, and every ``FoodItem`` showing that picture points
+at the same ``ImageBlob``. ``acquire_blob`` adds a reference and
+``release_blob`` drops one; the file is deleted with the last reference.
+"""
+
+import hashlib
+
+from django.core.files import File
+from django.db import transaction
+from django.db.models import F
+
+from foods.models import ImageBlob, image_blob_upload_path
+
+_EXTENSIONS = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+
+def image_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def image_extension(header: bytes) -> str:
+    for magic, extension in _EXTENSIONS:
+        if header.startswith(magic):
+            return extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return "jpg"
+
+
+def acquire_blob(content: File, digest: str) -> ImageBlob:
+    """Return the blob holding ``content`` (whose SHA-256 is ``digest``) with
+    one more reference to it. ``content`` is streamed to storage, not read
+    into memory."""
+    with transaction.atomic():
+        blob = ImageBlob.objects.select_for_update().filter(digest=digest).first()
+        if blob is None:
+            blob = ImageBlob(digest=digest, size=content.size)
+            content.seek(0)
+            header = content.read(12)
+            content.seek(0)
+            filename = f"{digest}.{image_extension(header)}"
+            name = image_blob_upload_path(blob, filename)
+            storage = blob.file.storage
+            # A file without a row is left over from a rolled back write; the
+            # name is the digest, so its bytes are already the right ones.
+            if storage.exists(name):
+                blob.file.name = name
+            else:
+                blob.file.save(filename, content, save=False)
+            blob, _ = ImageBlob.objects.get_or_create(
+                digest=digest,
+                defaults={"file": blob.file.name, "size": content.size},
+            )
+            blob = ImageBlob.objects.select_for_update().get(pk=blob.pk)
+        ImageBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") + 1)
+        blob.ref_count += 1
+    return blob
+
+
+def release_blob(blob_id: int | None) -> None:
+    """Drop one reference; the last one deletes the row and the file."""
+    if blob_id is None:
+        return
+    with transaction.atomic():
+        blob = ImageBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None:
+            return
+        if blob.ref_count > 1:
+            ImageBlob.objects.filter(pk=blob.pk).update(ref_count=F("ref_count") - 1)
+            return
+        blob.delete()
+        # Deleted while the row lock is held, so a concurrent acquire of the
+        # same digest waits and then writes a fresh file.
+        blob.file.delete(save=False)
@@ -0,0 +1,78 @@
+"""Sparse fieldsets and cache validators for the food detail endpoints.
+
+A request names the ``FoodItemSerializer`` fields it wants; only the columns
+those fields read are loaded, so ``nutriments_json`` and the compressed
+``raw_source_json`` document stay in the database unless asked for. The ETag
+is computed from a handful of small columns before any of them are fetched.
+"""
+
+import hashlib
+from collections.abc import Iterable
+
+from foods.models import FoodItem
+from foods.serializers import FoodItemSerializer
+
+DETAIL_FIELDS: tuple[str, ...] = FoodItemSerializer.Meta.fields
+# Serialized as-is from a column of the same name unless listed here.
+_IMAGE_COLUMNS = ("image_status", "image_large", "image_small")
+_FIELD_COLUMNS = {
+    "image_url": ("image_url", *_IMAGE_COLUMNS),
+    "image_large_url": _IMAGE_COLUMNS,
+    "image_small_url": _IMAGE_COLUMNS,
+    "image_large_webp_url": (*_IMAGE_COLUMNS, "image_large_webp"),
+    "image_small_webp_url": (*_IMAGE_COLUMNS, "image_small_webp"),
+    # Lives in ``FoodSourceDocument``; loaded lazily on access.
+    "raw_source_json": (),
+}
+HEAVY_COLUMNS = ("nutriments_json",)
+# Everything the ETag depends on.
+ETAG_COLUMNS = (
+    "id",
+    "content_hash",
+    "image_signature",
+    "image_status",
+    "image_downloaded_at",
+    "updated_at",
+)
+
+
+def parse_detail_fields(raw: str | None) -> tuple[str, ...]:
+    """Return the requested fields in ``DETAIL_FIELDS`` order.
+
+    Raises ``ValueError`` naming any unknown field.
+    """
+    if not raw or not raw.strip():
+        return DETAIL_FIELDS
+    requested = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = requested.difference(DETAIL_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+    return tuple(name for name in DETAIL_FIELDS if name in requested)
+
+
+def detail_columns(fields: Iterable[str]) -> set[str]:
+    columns: set[str] = set()
+    for name in fields:
+        columns.update(_FIELD_COLUMNS.get(name, (name,)))
+    return columns
+
+
+def food_etag(item: FoodItem, fields: tuple[str, ...]) -> str:
+    """Strong ETag for ``fields`` of ``item``.
+
+    ``content_hash`` identifies the catalog content; items ingested without one
+    fall back to ``updated_at``. Image state is included because variant URLs
+    appear once a download completes.
+    """
+    downloaded_at = item.image_downloaded_at
+    stamp = "|".join(
+        [
+            str(item.pk),
+            item.content_hash or f"updated:{item.updated_at.isoformat()}",
+            item.image_signature or "",
+            item.image_status,
+            downloaded_at.isoformat() if downloaded_at else "",
+            ",".join(fields),
+        ]
+    )
+    return f'"{hashlib.sha1(stamp.encode()).hexdigest()}"'
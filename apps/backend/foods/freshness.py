@@ -0,0 +1,77 @@
+"""Freshness checks: is the stored food item current for a client's hashes?"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import Any
+
+from django.db.models import Q
+
+from foods.images import images_ok
+from foods.models import FoodItem
+
+# Columns ``check_result`` reads; the heavy JSON payloads are never loaded.
+CHECK_FIELDS = (
+    "id",
+    "source",
+    "external_id",
+    "content_hash",
+    "image_signature",
+    "image_status",
+    "image_large",
+    "image_small",
+)
+
+
+def check_result(
+    item: FoodItem | None, content_hash: str, image_signature: str | None
+) -> dict[str, Any]:
+    if item is None:
+        return {
+            "exists": False,
+            "up_to_date": False,
+            "food_item_id": None,
+            "images_ok": False,
+        }
+    images_ok_value = images_ok(item)
+    signature_matches = (item.image_signature or "") == (image_signature or "")
+    hash_matches = (item.content_hash or "") == content_hash
+    return {
+        "exists": True,
+        "up_to_date": hash_matches and signature_matches and images_ok_value,
+        "food_item_id": item.id,
+        "images_ok": images_ok_value,
+    }
+
+
+def check_food_items(keys: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Check many ``(source, external_id)`` keys with one query.
+
+    The lookup is an ``OR`` of ``external_id IN (...)`` per source, served by
+    the ``(source, external_id)`` unique index. Results follow input order and
+    echo each key.
+    """
+    keys = list(keys)
+    external_ids: dict[str, set[str]] = defaultdict(set)
+    for key in keys:
+        external_ids[key["source"]].add(key["external_id"])
+    items: dict[tuple[str, str], FoodItem] = {}
+    if external_ids:
+        lookup = Q()
+        for source, ids in external_ids.items():
+            lookup |= Q(source=source, external_id__in=ids)
+        items = {
+            (item.source, item.external_id): item
+            for item in FoodItem.objects.filter(lookup).only(*CHECK_FIELDS)
+        }
+    return [
+        {
+            "source": key["source"],
+            "external_id": key["external_id"],
+            **check_result(
+                items.get((key["source"], key["external_id"])),
+                key["content_hash"],
+                key.get("image_signature"),
+            ),
+        }
+        for key in keys
+    ]
@@ -0,0 +1,215 @@
+"""DB-backed queue of image downloads, kept off the request path.
+
+Ingest records one ``FoodImageJob`` per food item (re-ingesting replaces the
+pending request) and returns. ``manage.py process_image_jobs`` claims due jobs
+with ``SELECT ... FOR UPDATE SKIP LOCKED`` and downloads them on a bounded
+thread pool; failed downloads are retried with exponential backoff. A job left
+``running`` by a crashed worker becomes claimable again once its lease expires.
+
+Deployments without that worker (Render, whose services cannot share a media
+disk) set ``FOODS_IMAGE_JOBS_IN_PROCESS``: each process then drains the queue
+on a background thread after it enqueues jobs. Retries in that mode run when
+the next job is enqueued.
+"""
+
+import logging
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from foods.images import download_food_images
+from foods.models import FoodImageJob, FoodItem
+
+logger = logging.getLogger(__name__)
+
+# Outcomes that another attempt cannot fix.
+PERMANENT_ERRORS = {"missing_urls", "superseded"}
+
+_drain_lock = threading.Lock()
+_drain_requested = False
+_draining = False
+
+
+@dataclass
+class ImageJobRequest:
+    item: FoodItem
+    large_url: str | None
+    small_url: str | None
+    image_signature: str | None
+
+
+def enqueue_image_jobs(requests: Iterable[ImageJobRequest]) -> None:
+    """Create or reset the job of each item so it is due immediately."""
+    now = timezone.now()
+    jobs = [
+        FoodImageJob(
+            food_item=request.item,
+            large_url=request.large_url or "",
+            small_url=request.small_url or "",
+            image_signature=request.image_signature,
+            status=FoodImageJob.STATUS_PENDING,
+            attempts=0,
+            available_at=now,
+            locked_at=None,
+            last_error="",
+            created_at=now,
+            updated_at=now,
+        )
+        for request in requests
+    ]
+    if not jobs:
+        return
+    FoodImageJob.objects.bulk_create(
+        jobs,
+        update_conflicts=True,
+        unique_fields=["food_item"],
+        update_fields=[
+            "large_url",
+            "small_url",
+            "image_signature",
+            "status",
+            "attempts",
+            "available_at",
+            "locked_at",
+            "last_error",
+            "updated_at",
+        ],
+    )
+    if getattr(settings, "FOODS_IMAGE_JOBS_IN_PROCESS", False):
+        transaction.on_commit(start_draining)
+
+
+def start_draining() -> None:
+    """Process due jobs on a background thread of this process until none are
+    left; a call while it runs makes it look again before stopping."""
+    global _drain_requested, _draining
+    with _drain_lock:
+        _drain_requested = True
+        if _draining:
+            return
+        _draining = True
+    threading.Thread(target=_drain, name="image-jobs-drain", daemon=True).start()
+
+
+def _drain() -> None:
+    global _drain_requested, _draining
+    workers = max(1, getattr(settings, "FOODS_IMAGE_WORKERS", 4))
+    try:
+        while True:
+            with _drain_lock:
+                if not _drain_requested:
+                    _draining = False
+                    return
+                _drain_requested = False
+            try:
+                while process_image_jobs(workers, workers * 4):
+                    pass
+            except Exception:
+                logger.exception("in-process image job drain failed")
+    finally:
+        with _drain_lock:
+            _draining = False
+        connection.close()
+
+
+def claim_image_jobs(limit: int) -> list[FoodImageJob]:
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "FOODS_IMAGE_JOB_LEASE_SECONDS", 300))
+    due = Q(status=FoodImageJob.STATUS_PENDING, available_at__lte=now) | Q(
+        status=FoodImageJob.STATUS_RUNNING, locked_at__lt=now - lease
+    )
+    with transaction.atomic():
+        ids = list(
+            FoodImageJob.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by("available_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        # Re-checking ``due`` keeps backends without row locks from handing
+        # the same job to two workers.
+        FoodImageJob.objects.filter(due, id__in=ids).update(
+            status=FoodImageJob.STATUS_RUNNING,
+            locked_at=now,
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+    return list(
+        FoodImageJob.objects.filter(
+            id__in=ids, status=FoodImageJob.STATUS_RUNNING, locked_at=now
+        )
+        .select_related("food_item")
+        .defer(*(f"food_item__{name}" for name in FoodItem.HEAVY_FIELDS))
+    )
+
+
+def run_image_job(job: FoodImageJob) -> bool:
+    """Download one job's images and record the outcome; True on success.
+
+    A job whose ``image_signature`` no longer matches its item's is closed
+    without a download: a later write changed the images and the job's URLs
+    are stale.
+    """
+    if job.image_signature != job.food_item.image_signature:
+        success, error = False, "superseded"
+    else:
+        try:
+            result = download_food_images(job.food_item, job.large_url, job.small_url)
+            success, error = result.success, result.error or ""
+        except Exception as exc:
+            logger.exception("image job %s crashed", job.pk)
+            success, error = False, str(exc) or exc.__class__.__name__
+
+    max_attempts = getattr(settings, "FOODS_IMAGE_JOB_MAX_ATTEMPTS", 5)
+    if success:
+        changes = {"status": FoodImageJob.STATUS_DONE, "last_error": ""}
+    elif error in PERMANENT_ERRORS or job.attempts >= max_attempts:
+        changes = {"status": FoodImageJob.STATUS_FAILED, "last_error": error}
+    else:
+        changes = {
+            "status": FoodImageJob.STATUS_PENDING,
+            "last_error": error,
+            "available_at": _retry_at(job.attempts),
+        }
+    # A job re-enqueued while it ran is pending again and must not be closed.
+    FoodImageJob.objects.filter(
+        pk=job.pk, status=FoodImageJob.STATUS_RUNNING, locked_at=job.locked_at
+    ).update(locked_at=None, updated_at=timezone.now(), **changes)
+    return success
+
+
+def process_image_jobs(workers: int, batch_size: int) -> int:
+    """Claim up to ``batch_size`` due jobs and run them on ``workers`` threads.
+
+    Returns the number of jobs processed; with one worker jobs run inline.
+    """
+    jobs = claim_image_jobs(batch_size)
+    if workers <= 1:
+        for job in jobs:
+            run_image_job(job)
+        return len(jobs)
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="image-job"
+    ) as pool:
+        list(pool.map(_run_in_thread, jobs))
+    return len(jobs)
+
+
+def _run_in_thread(job: FoodImageJob) -> bool:
+    try:
+        return run_image_job(job)
+    finally:
+        connection.close()
+
+
+def _retry_at(attempts: int) -> datetime:
+    base = getattr(settings, "FOODS_IMAGE_JOB_RETRY_SECONDS", 30)
+    return timezone.now() + timedelta(seconds=base * 2 ** max(attempts - 1, 0))
@@ -1,29 +1,37 @@
 from __future__ import annotations
 
+import hashlib
 import ipaddress
 import socket
 import ssl
+import tempfile
+import threading
+import time
 from dataclasses import dataclass
-from http.client import HTTPConnection, HTTPSConnection
+from http.client import HTTPConnection, HTTPException, HTTPSConnection
 from urllib.error import HTTPError, URLError
-from urllib.parse import urlparse
-from urllib.request import (
-    HTTPHandler,
-    HTTPRedirectHandler,
-    HTTPSHandler,
-    Request,
-    build_opener,
-)
+from urllib.parse import urljoin, urlparse
 
 from django.conf import settings
+from django.core.files import File
 from django.core.files.base import ContentFile
+from django.db import transaction
 from django.utils import timezone
 
+from foods.blobs import acquire_blob, image_digest, release_blob
 from foods.models import FoodItem
+from foods.search_cache import typeahead_cache
+from foods.variants import generate_variants
 
+IMAGE_VARIANTS = ("large", "small", "large_webp", "small_webp")
 MAX_IMAGE_BYTES = 5 * 1024 * 1024
 READ_CHUNK_SIZE = 8192
 REQUEST_TIMEOUT_SECONDS = 10
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+# Idle keep-alive connections kept per (scheme, host, port, pinned IP).
+MAX_IDLE_CONNECTIONS_PER_HOST = 4
+IDLE_CONNECTION_SECONDS = 30.0
 
 
 @dataclass
@@ -50,51 +58,110 @@ def download_food_images(
     item: FoodItem,
     large_url: str | None,
     small_url: str | None,
-    image_signature: str | None,
 ) -> ImageDownloadResult:
-    if not large_url or not small_url:
-        item.image_status = FoodItem.IMAGE_STATUS_NONE
-        item.image_downloaded_at = timezone.now()
-        item.save(update_fields=["image_status", "image_downloaded_at"])
-        return ImageDownloadResult(success=False, error="missing_urls")
-
+    """Fetch the largest available source once and store every variant.
+
+    The small JPEG and the WebP renditions are derived locally, so only
+    ``small_url`` is fetched when the item has no large image.
+    """
+    source_url = large_url or small_url
+    if not source_url:
+        return _image_failure(item, FoodItem.IMAGE_STATUS_NONE, "missing_urls")
     try:
-        large_content = _fetch_image_bytes(large_url)
-        small_content = _fetch_image_bytes(small_url)
+        source = _fetch_image_file(source_url)
     except (HTTPError, URLError, ValueError) as exc:
-        item.image_status = FoodItem.IMAGE_STATUS_FAILED
-        item.image_downloaded_at = timezone.now()
-        item.save(update_fields=["image_status", "image_downloaded_at"])
-        return ImageDownloadResult(success=False, error=str(exc))
-
-    safe_signature = _safe_signature(image_signature)
-    if item.image_large:
-        item.image_large.delete(save=False)
-    if item.image_small:
-        item.image_small.delete(save=False)
-    item.image_large.save(
-        f"{safe_signature}_large.jpg",
-        ContentFile(large_content),
-        save=False,
-    )
-    item.image_small.save(
-        f"{safe_signature}_small.jpg",
-        ContentFile(small_content),
-        save=False,
-    )
-    item.image_status = FoodItem.IMAGE_STATUS_OK
-    item.image_downloaded_at = timezone.now()
-    item.save()
+        return _image_failure(item, FoodItem.IMAGE_STATUS_FAILED, str(exc))
+    with source:
+        contents: dict[str, tuple[File, str]] | None = None
+        if not _has_variants_of(item.pk, source.digest):
+            try:
+                variants = generate_variants(source.name)
+            except ValueError as exc:
+                return _image_failure(item, FoodItem.IMAGE_STATUS_FAILED, str(exc))
+            contents = {"large": (File(source.file), source.digest)}
+            for variant, data in variants.items():
+                contents[variant] = (ContentFile(data), image_digest(data))
+        _store_images(item, contents)
     return ImageDownloadResult(success=True)
 
 
-def _safe_signature(signature: str | None) -> str:
-    if not signature:
-        return "image"
-    safe = "".join(
-        char for char in signature if char.isalnum() or char in ("-", "_", ".")
+def _image_failure(item: FoodItem, status: str, error: str) -> ImageDownloadResult:
+    item.image_status = status
+    item.image_downloaded_at = timezone.now()
+    item.save(update_fields=["image_status", "image_downloaded_at", "updated_at"])
+    typeahead_cache.invalidate()
+    return ImageDownloadResult(success=False, error=error)
+
+
+def _store_images(item: FoodItem, contents: dict[str, tuple[File, str]] | None) -> None:
+    """Point ``item`` at blobs for ``contents``; ``None`` keeps stored files."""
+    changed_fields: list[str] = []
+    released_blob_ids: list[int] = []
+    with transaction.atomic():
+        # Re-read under a row lock: the job worker's copy of the item may be
+        # stale and two downloads must not both drop the same blob reference.
+        current = (
+            FoodItem.objects.select_for_update(of=("self",))
+            .filter(pk=item.pk)
+            .values(
+                "image_status",
+                *(f"image_{variant}" for variant in IMAGE_VARIANTS),
+                *(f"image_{variant}_blob_id" for variant in IMAGE_VARIANTS),
+                *(f"image_{variant}_blob__digest" for variant in IMAGE_VARIANTS),
+            )
+            .get()
+        )
+        for variant in IMAGE_VARIANTS:
+            file_field = f"image_{variant}"
+            blob_field = f"image_{variant}_blob"
+            previous_blob_id = current[f"{blob_field}_id"]
+            content, digest = contents[variant] if contents else (None, None)
+            if content is None or current[f"{blob_field}__digest"] == digest:
+                # Same bytes as stored: nothing to write.
+                setattr(item, file_field, current[file_field])
+                setattr(item, f"{blob_field}_id", previous_blob_id)
+                continue
+            blob = acquire_blob(content, digest)
+            if previous_blob_id is not None:
+                released_blob_ids.append(previous_blob_id)
+            elif current[file_field]:
+                # Per-item file written before images were content-addressed.
+                getattr(item, file_field).storage.delete(current[file_field])
+            setattr(item, file_field, blob.file.name)
+            setattr(item, blob_field, blob)
+            changed_fields += [file_field, blob_field]
+        item.image_status = FoodItem.IMAGE_STATUS_OK
+        item.image_downloaded_at = timezone.now()
+        item.save(
+            update_fields=[
+                *changed_fields,
+                "image_status",
+                "image_downloaded_at",
+                "updated_at",
+            ]
+        )
+        # Only once the item no longer points at them.
+        for blob_id in released_blob_ids:
+            release_blob(blob_id)
+    if changed_fields or current["image_status"] != FoodItem.IMAGE_STATUS_OK:
+        typeahead_cache.invalidate()
+
+
+def _has_variants_of(item_id: int, source_digest: str) -> bool:
+    """Whether every variant is stored and was derived from this source."""
+    stored = (
+        FoodItem.objects.filter(pk=item_id)
+        .values(
+            "image_large_blob__digest",
+            *(f"image_{variant}_blob_id" for variant in IMAGE_VARIANTS),
+        )
+        .first()
+    )
+    return (
+        stored is not None
+        and stored["image_large_blob__digest"] == source_digest
+        and all(stored[f"image_{variant}_blob_id"] for variant in IMAGE_VARIANTS)
     )
-    return safe or "image"
 
 
 class _PinnedHTTPConnection(HTTPConnection):
@@ -136,43 +203,96 @@ class _PinnedHTTPSConnection(HTTPSConnection):
         self.sock = context.wrap_socket(self.sock, server_hostname=self.host)
 
 
-def _get_pinned_ip(request: Request) -> str:
-    pinned_ip = getattr(request, "_pinned_ip", None)
-    if pinned_ip:
-        return pinned_ip
-    pinned_ip = _pin_url(request.full_url)
-    setattr(request, "_pinned_ip", pinned_ip)
-    return pinned_ip
-
-
-class _PinnedHTTPHandler(HTTPHandler):
-    def http_open(self, req):
-        pinned_ip = _get_pinned_ip(req)
-        return self.do_open(
-            lambda host, **kwargs: _PinnedHTTPConnection(
-                host, pinned_ip=pinned_ip, **kwargs
+_PoolKey = tuple[str, str, int, str]
+
+
+class _ResolutionCache:
+    """Hostname -> pinned IP for hosts that passed the SSRF check.
+
+    Only successful validations are cached, and only for
+    ``FOODS_IMAGE_DNS_TTL_SECONDS``, so a host that starts resolving to a
+    non-global address is rejected once its entry expires.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[str, float]] = {}
+
+    def get(self, hostname: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(hostname)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[hostname]
+                return None
+            return entry[0]
+
+    def put(self, hostname: str, pinned_ip: str) -> None:
+        ttl = getattr(settings, "FOODS_IMAGE_DNS_TTL_SECONDS", 60)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[hostname] = (pinned_ip, time.monotonic() + ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class _ConnectionPool:
+    """Idle keep-alive connections, handed out to one caller at a time."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._idle: dict[_PoolKey, list[tuple[HTTPConnection, float]]] = {}
+
+    def acquire(self, key: _PoolKey) -> tuple[HTTPConnection, bool]:
+        """Return a connection for ``key`` and whether it is being reused."""
+        now = time.monotonic()
+        stale: list[HTTPConnection] = []
+        connection: HTTPConnection | None = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, released_at = idle.pop()
+                if now - released_at < IDLE_CONNECTION_SECONDS:
+                    connection = candidate
+                    break
+                stale.append(candidate)
+        for candidate in stale:
+            candidate.close()
+        if connection is not None:
+            return connection, True
+        scheme, host, port, pinned_ip = key
+        connection_class = (
+            _PinnedHTTPSConnection if scheme == "https" else _PinnedHTTPConnection
+        )
+        return (
+            connection_class(
+                host, port=port, pinned_ip=pinned_ip, timeout=REQUEST_TIMEOUT_SECONDS
             ),
-            req,
+            False,
         )
 
+    def release(self, key: _PoolKey, connection: HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE_CONNECTIONS_PER_HOST:
+                idle.append((connection, time.monotonic()))
+                return
+        connection.close()
 
-class _PinnedHTTPSHandler(HTTPSHandler):
-    def https_open(self, req):
-        pinned_ip = _get_pinned_ip(req)
-        return self.do_open(
-            lambda host, **kwargs: _PinnedHTTPSConnection(
-                host, pinned_ip=pinned_ip, **kwargs
-            ),
-            req,
-        )
+    def clear(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, _ in connections:
+                connection.close()
 
 
-class _SafeRedirectHandler(HTTPRedirectHandler):
-    def redirect_request(self, req, fp, code, msg, headers, newurl):
-        request = super().redirect_request(req, fp, code, msg, headers, newurl)
-        if request is not None:
-            _pin_request(request)
-        return request
+_resolutions = _ResolutionCache()
+_connections = _ConnectionPool()
 
 
 def _pin_url(url: str) -> str:
@@ -184,6 +304,9 @@ def _pin_url(url: str) -> str:
     if not hostname:
         raise ValueError("Invalid image URL.")
     hostname = hostname.split("%", 1)[0]
+    cached_ip = _resolutions.get(hostname)
+    if cached_ip is not None:
+        return cached_ip
     pinned_ip = None
     for ip in _resolve_host_addresses(hostname):
         # Reject non-global addresses (private, loopback, link-local, etc.).
@@ -193,13 +316,10 @@ def _pin_url(url: str) -> str:
             pinned_ip = str(ip)
     if pinned_ip is None:
         raise ValueError("Blocked image URL host.")
+    _resolutions.put(hostname, pinned_ip)
     return pinned_ip
 
 
-def _pin_request(request: Request) -> None:
-    setattr(request, "_pinned_ip", _pin_url(request.full_url))
-
-
 def _resolve_host_addresses(
     hostname: str,
 ) -> list[ipaddress.IPv4Address | ipaddress.IPv6Address]:
@@ -223,29 +343,121 @@ def _resolve_host_addresses(
     return addresses
 
 
-def _fetch_image_bytes(url: str) -> bytes:
+class ImageSpool:
+    """Temporary file a download is streamed into, chunk by chunk.
+
+    Enforces ``MAX_IMAGE_BYTES`` while writing and hashes the bytes on the way
+    through, so memory use stays at one read chunk whatever the image size.
+    """
+
+    def __init__(self) -> None:
+        self.file = tempfile.NamedTemporaryFile(
+            prefix="food-image-", dir=getattr(settings, "FILE_UPLOAD_TEMP_DIR", None)
+        )
+        self.size = 0
+        self._hash = hashlib.sha256()
+
+    @property
+    def name(self) -> str:
+        return self.file.name
+
+    @property
+    def digest(self) -> str:
+        return self._hash.hexdigest()
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > MAX_IMAGE_BYTES:
+            raise ValueError("Image exceeds max size.")
+        self._hash.update(chunk)
+        self.file.write(chunk)
+
+    def finish(self) -> None:
+        if self.size == 0:
+            raise ValueError("Empty image response.")
+        self.file.flush()
+        self.file.seek(0)
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self) -> ImageSpool:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def _fetch_image_file(url: str) -> ImageSpool:
+    """Download an image over a pooled connection pinned to a validated address.
+
+    Every hop of a redirect chain is re-validated by ``_pin_url``. The caller
+    owns (and must close) the returned spool.
+    """
+    spool = ImageSpool()
+    try:
+        for _ in range(MAX_REDIRECTS + 1):
+            status, location = _request_image(url, spool)
+            if location is None:
+                spool.finish()
+                return spool
+            url = urljoin(url, location)
+        raise HTTPError(url, status, "Too many redirects.", None, None)  # type: ignore[arg-type]
+    except BaseException:
+        spool.close()
+        raise
+
+
+def _request_image(url: str, spool: ImageSpool) -> tuple[int, str | None]:
+    parsed = urlparse(url)
+    pinned_ip = _pin_url(url)
+    scheme = parsed.scheme.lower()
+    port = parsed.port or (443 if scheme == "https" else 80)
+    key: _PoolKey = (scheme, parsed.hostname or "", port, pinned_ip)
+    path = parsed.path or "/"
+    if parsed.query:
+        path = f"{path}?{parsed.query}"
     user_agent = getattr(settings, "OFF_USER_AGENT", "FitnessApp/0.1 (images)")
-    request = Request(url, headers={"User-Agent": user_agent})
-    _pin_request(request)
-    opener = build_opener(
-        _SafeRedirectHandler(),
-        _PinnedHTTPHandler(),
-        _PinnedHTTPSHandler(),
-    )
-    with opener.open(request, timeout=REQUEST_TIMEOUT_SECONDS) as response:
-        content_type = response.headers.get("Content-Type", "")
+
+    while True:
+        connection, reused = _connections.acquire(key)
+        try:
+            connection.request("GET", path, headers={"User-Agent": user_agent})
+            response = connection.getresponse()
+        except (OSError, HTTPException) as exc:
+            connection.close()
+            if reused:
+                # The server dropped an idle keep-alive connection; retry fresh.
+                continue
+            raise URLError(exc) from exc
+        break
+
+    try:
+        if response.status in REDIRECT_STATUSES and response.getheader("Location"):
+            response.read()
+            return response.status, response.getheader("Location")
+        if response.status >= 400:
+            raise HTTPError(
+                url, response.status, response.reason, response.headers, None
+            )
+        content_type = response.getheader("Content-Type", "")
         if not content_type.startswith("image/"):
             raise ValueError(f"Unexpected content type: {content_type}")
-        total = 0
-        chunks: list[bytes] = []
         while True:
             chunk = response.read(READ_CHUNK_SIZE)
             if not chunk:
                 break
-            total += len(chunk)
-            if total > MAX_IMAGE_BYTES:
-                raise ValueError("Image exceeds max size.")
-            chunks.append(chunk)
-        if total == 0:
-            raise ValueError("Empty image response.")
-        return b"".join(chunks)
+            spool.write(chunk)
+        return response.status, None
+    except URLError:
+        connection.close()
+        raise
+    except (OSError, HTTPException) as exc:
+        connection.close()
+        raise URLError(exc) from exc
+    except BaseException:
+        connection.close()
+        raise
+    finally:
+        if response.isclosed() and not response.will_close and connection.sock:
+            _connections.release(key, connection)
@@ -0,0 +1,272 @@
+"""Chunked, set-based upserts behind the NDJSON batch ingest endpoint.
+
+Each line is validated with ``FoodItemIngestSerializer`` exactly like a single
+ingest. Valid lines are then upserted a chunk at a time: one locked lookup by
+barcode and one by ``(source, external_id)``, then a single
+``INSERT ... ON CONFLICT (barcode) DO UPDATE`` for new and existing rows alike
+(``bulk_update`` only for the rare row whose barcode changes). A chunk that
+still hits an integrity error (a concurrent writer claimed a key) is replayed
+line by line through the serializer so its conflict handling applies.
+
+Image downloads are queued, the compressed ``raw_source_json`` documents
+upserted and ``food_items_changed`` (and ``food_macros_changed``) sent in the
+same transaction as the write.
+"""
+
+import json
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.serializers import as_serializer_error
+
+from foods.image_jobs import ImageJobRequest, enqueue_image_jobs
+from foods.images import should_download_images
+from foods.models import FoodItem, FoodSourceDocument, build_search_text
+from foods.search_cache import typeahead_cache
+from foods.search_index import typeahead_index
+from foods.serializers import BARCODE_CONFLICT_MESSAGE, FoodItemIngestSerializer
+from foods.signals import food_items_changed, food_macros_changed
+
+BATCH_CHUNK_SIZE = 500
+
+
+@dataclass
+class _Line:
+    number: int
+    payload: Any = None
+    fields: dict[str, Any] | None = None
+    result: dict[str, Any] | None = None
+
+    @property
+    def external_key(self) -> tuple[str, str]:
+        assert self.fields is not None
+        return self.fields["source"], self.fields["external_id"]
+
+
+def ingest_ndjson(
+    lines: Iterable[bytes], chunk_size: int = BATCH_CHUNK_SIZE
+) -> Iterator[dict[str, Any]]:
+    """Yield one result per non-blank input line, in input order."""
+    validator = FoodItemIngestSerializer()
+    chunk: list[_Line] = []
+    barcodes: set[str] = set()
+    external_keys: set[tuple[str, str]] = set()
+    for number, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        line = _parse_line(validator, number, raw)
+        if line.fields is not None:
+            # A key repeated within a chunk must see the earlier write.
+            barcode = line.fields["barcode"]
+            if barcode in barcodes or line.external_key in external_keys:
+                yield from _flush(chunk)
+                chunk, barcodes, external_keys = [], set(), set()
+            barcodes.add(barcode)
+            external_keys.add(line.external_key)
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield from _flush(chunk)
+            chunk, barcodes, external_keys = [], set(), set()
+    yield from _flush(chunk)
+
+
+def _parse_line(validator: FoodItemIngestSerializer, number: int, raw: bytes) -> _Line:
+    try:
+        payload = json.loads(raw)
+    except ValueError:
+        return _Line(
+            number, result=_error(number, {"non_field_errors": ["Invalid JSON."]})
+        )
+    # One shared instance: binding a fresh serializer per line deep-copies
+    # every declared field and dominated batch runtime.
+    try:
+        validated = validator.run_validation(payload)
+    except serializers.ValidationError as exc:
+        return _Line(number, result=_error(number, as_serializer_error(exc)))
+    return _Line(number, payload=payload, fields=validator.get_item_fields(validated))
+
+
+def _flush(chunk: list[_Line]) -> Iterator[dict[str, Any]]:
+    pending = [line for line in chunk if line.result is None]
+    written: list[FoodItem] = []
+    while pending:
+        try:
+            with transaction.atomic():
+                items, pending = _upsert(pending)
+        except IntegrityError:
+            items, pending = _upsert_one_by_one(pending), []
+        written.extend(items)
+    if written:
+        typeahead_index.upsert(written)
+        typeahead_cache.invalidate()
+    for line in chunk:
+        assert line.result is not None
+        yield line.result
+
+
+def _upsert(lines: list[_Line]) -> tuple[list[FoodItem], list[_Line]]:
+    """Upsert ``lines`` in bulk; return the written items and any lines that
+    must wait for the next round because they touch a row an earlier line in
+    this round already changed."""
+    external_ids: dict[str, list[str]] = defaultdict(list)
+    for line in lines:
+        source, external_id = line.external_key
+        external_ids[source].append(external_id)
+    external_filter = Q()
+    for source, ids in external_ids.items():
+        external_filter |= Q(source=source, external_id__in=ids)
+
+    queryset = FoodItem.objects.select_for_update()
+    barcodes = [line.fields["barcode"] for line in lines if line.fields]
+    by_barcode = {item.barcode: item for item in queryset.filter(barcode__in=barcodes)}
+    by_external = {
+        (item.source, item.external_id): item
+        for item in queryset.filter(external_filter)
+    }
+
+    now = timezone.now()
+    to_write: list[tuple[_Line, FoodItem, str, bool]] = []
+    moved: list[FoodItem] = []
+    macros_changed: list[int] = []
+    written_fields: set[str] = set()
+    claimed: set[int] = set()
+    for index, line in enumerate(lines):
+        fields = line.fields
+        assert fields is not None
+        existing_barcode = by_barcode.get(fields["barcode"])
+        existing_external = by_external.get(line.external_key)
+        if (
+            existing_barcode
+            and existing_external
+            and existing_barcode.id != existing_external.id
+        ):
+            line.result = _error(line.number, {"barcode": [BARCODE_CONFLICT_MESSAGE]})
+            continue
+        candidate = existing_barcode or existing_external
+        if candidate is not None and candidate.id in claimed:
+            # Matched through a key an earlier line in this round rewrote.
+            remaining = lines[index:]
+            break
+        incoming_signature = fields.get("image_signature")
+        signature_changed = bool(incoming_signature) and incoming_signature != (
+            (candidate.image_signature if candidate else None) or ""
+        )
+        if candidate is None:
+            item = FoodItem(**fields)
+            status = "created"
+        else:
+            item = candidate
+            claimed.add(item.id)
+            status = "updated"
+            if item.barcode != fields["barcode"]:
+                moved.append(item)
+            previous_macros = item.macros()
+            for name, value in fields.items():
+                setattr(item, name, value)
+            if item.macros() != previous_macros:
+                macros_changed.append(item.id)
+        item.search_text = build_search_text(item.name, item.brands)
+        item.updated_at = now
+        written_fields.update(fields)
+        to_write.append((line, item, status, signature_changed))
+    else:
+        remaining = []
+
+    # ``raw_source_json`` is not a column; ``FoodSourceDocument.store`` writes it.
+    update_fields = [
+        *sorted(written_fields - {"barcode", "raw_source_json"}),
+        "search_text",
+        "updated_at",
+    ]
+    if moved:
+        FoodItem.objects.bulk_update(moved, ["barcode", *update_fields])
+    upserts = [item for _, item, _, _ in to_write if item not in moved]
+    if upserts:
+        # Existing rows go through the same ``INSERT ... ON CONFLICT (barcode)
+        # DO UPDATE`` as new ones: far cheaper than ``bulk_update``'s CASE
+        # expressions. Copies without a pk keep the conflict on ``barcode``.
+        FoodItem.objects.bulk_create(
+            [_without_pk(item) for item in upserts],
+            update_conflicts=True,
+            unique_fields=["barcode"],
+            update_fields=update_fields,
+        )
+        # Backends without ``RETURNING`` leave new rows without a pk.
+        missing = [item.barcode for item in upserts if item.pk is None]
+        if missing:
+            ids = dict(
+                FoodItem.objects.filter(barcode__in=missing).values_list(
+                    "barcode", "id"
+                )
+            )
+            for item in upserts:
+                if item.pk is None:
+                    item.pk = ids[item.barcode]
+    items: list[FoodItem] = []
+    image_jobs: list[ImageJobRequest] = []
+    for line, item, status, signature_changed in to_write:
+        line.result = {"line": line.number, "status": status, "food_item_id": item.id}
+        items.append(item)
+        if should_download_images(item, signature_changed):
+            image_jobs.append(_image_job(item))
+    FoodSourceDocument.store(items)
+    enqueue_image_jobs(image_jobs)
+    if claimed:
+        food_items_changed.send(sender=FoodItem, food_item_ids=sorted(claimed))
+    if macros_changed:
+        food_macros_changed.send(sender=FoodItem, food_item_ids=macros_changed)
+    return items, remaining
+
+
+def _image_job(item: FoodItem) -> ImageJobRequest:
+    return ImageJobRequest(
+        item,
+        item.image_large_source_url,
+        item.image_small_source_url,
+        item.image_signature,
+    )
+
+
+def _without_pk(item: FoodItem) -> FoodItem:
+    if item.pk is None:
+        return item
+    return FoodItem(
+        **{
+            field.attname: getattr(item, field.attname)
+            for field in FoodItem._meta.concrete_fields
+            if not field.primary_key
+        }
+    )
+
+
+def _upsert_one_by_one(lines: list[_Line]) -> list[FoodItem]:
+    items: list[FoodItem] = []
+    for line in lines:
+        serializer = FoodItemIngestSerializer(data=line.payload)
+        serializer.is_valid(raise_exception=True)
+        try:
+            item = serializer.save()
+        except serializers.ValidationError as exc:
+            line.result = _error(line.number, exc.detail)
+            continue
+        except IntegrityError:
+            line.result = _error(
+                line.number, {"non_field_errors": ["Conflicting write."]}
+            )
+            continue
+        status = "created" if serializer.created else "updated"
+        line.result = {"line": line.number, "status": status, "food_item_id": item.id}
+        items.append(item)
+        if should_download_images(item, serializer.image_signature_changed):
+            enqueue_image_jobs([_image_job(item)])
+    return items
+
+
+def _error(number: int, errors: Any) -> dict[str, Any]:
+    return {"line": number, "status": "error", "food_item_id": None, "errors": errors}
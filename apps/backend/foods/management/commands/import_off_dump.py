@@ -0,0 +1,103 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from foods.off_import import (
+    DUMP_FORMATS,
+    IMPORT_CHUNK_SIZE,
+    ImportStats,
+    import_off_dump,
+)
+
+
+class Command(BaseCommand):
+    help = "Import an Open Food Facts JSONL or CSV dump, gzip-compressed or plain."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", help="Dump file to import.")
+        parser.add_argument(
+            "--format",
+            choices=DUMP_FORMATS,
+            default=None,
+            help="Dump format (default: from the file name).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=max(1, (os.cpu_count() or 2) - 1),
+            help="Processes mapping records (0 maps them inline).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help="Records mapped and loaded per transaction.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=None,
+            help="Checkpoint file (default: <path>.checkpoint.json).",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and import from the start.",
+        )
+        parser.add_argument(
+            "--queue-images",
+            action="store_true",
+            help="Queue image downloads for imported items (default: none).",
+        )
+        parser.add_argument(
+            "--report-interval",
+            type=float,
+            default=10.0,
+            help="Seconds between progress lines.",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:
+        started = last_report = time.monotonic()
+        interval = float(options["report_interval"])
+        latest = ImportStats()
+
+        def progress(stats: ImportStats) -> None:
+            nonlocal last_report, latest
+            latest = stats
+            now = time.monotonic()
+            if now - last_report >= interval:
+                last_report = now
+                self.stdout.write(self._summary(stats, now - started))
+
+        try:
+            stats = import_off_dump(
+                str(options["path"]),
+                dump_format=options["format"],
+                workers=max(0, int(options["workers"])),
+                chunk_size=max(1, int(options["chunk_size"])),
+                checkpoint_path=options["checkpoint"],
+                restart=bool(options["restart"]),
+                queue_images=bool(options["queue_images"]),
+                progress=progress,
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc)) from exc
+        except KeyboardInterrupt:
+            self.stderr.write(
+                f"Interrupted: {self._summary(latest, time.monotonic() - started)} "
+                "Run again to resume from the checkpoint."
+            )
+            return
+        self.stdout.write(f"Done: {self._summary(stats, time.monotonic() - started)}")
+
+    @staticmethod
+    def _summary(stats: ImportStats, elapsed: float) -> str:
+        records = stats.records - stats.resumed
+        rate = records / elapsed if elapsed > 0 else 0.0
+        resumed = f" after {stats.resumed} resumed" if stats.resumed else ""
+        return (
+            f"{records} record(s){resumed} in {elapsed:.1f}s ({rate:.0f} rows/s); "
+            f"{stats.created} created, {stats.updated} updated, "
+            f"{stats.unchanged} unchanged, {stats.invalid} invalid, "
+            f"{stats.conflicts} conflicting, {stats.superseded} superseded."
+        )
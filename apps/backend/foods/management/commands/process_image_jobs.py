@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from foods.image_jobs import process_image_jobs
+
+
+class Command(BaseCommand):
+    help = "Download pending food images from the DB-backed job queue."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "FOODS_IMAGE_WORKERS", 4),
+            help="Concurrent downloads.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Jobs claimed per round (default: 4 x workers).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no job is due instead of polling.",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:
+        workers = max(1, int(options["workers"]))
+        batch_size = int(options["batch_size"] or workers * 4)
+        poll_interval = float(options["poll_interval"])
+        total = 0
+        try:
+            while True:
+                processed = process_image_jobs(workers, batch_size)
+                total += processed
+                if processed:
+                    continue
+                if options["once"]:
+                    break
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f"Processed {total} image job(s).")
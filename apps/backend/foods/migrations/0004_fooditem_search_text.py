@@ -0,0 +1,67 @@
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 2000
+TRIGRAM_INDEX_NAME = "foods_fooditem_search_text_trgm"
+
+_SEARCH_SEPARATOR_RE = re.compile(r"[\W_]+")
+
+
+# Frozen copy of ``foods.models.build_search_text`` as of this migration, so
+# later changes to the live function do not change what the backfill does.
+def build_search_text(name, brands):
+    value = f"{name or ''} {brands or ''}"
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_SEARCH_SEPARATOR_RE.sub(" ", stripped.casefold()).split())
+
+
+def backfill_search_text(apps, schema_editor):
+    FoodItem = apps.get_model("foods", "FoodItem")
+    last_id = 0
+    while True:
+        batch = list(
+            FoodItem.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .only("id", "name", "brands")[:BACKFILL_BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for item in batch:
+            item.search_text = build_search_text(item.name, item.brands)
+        FoodItem.objects.bulk_update(batch, ["search_text"])
+        last_id = batch[-1].id
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX_NAME} "
+        "ON foods_fooditem USING gin (search_text gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0003_fooditem_images_and_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fooditem",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:23
+
+import django.db.models.deletion
+import foods.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0006_foodimagejob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImageBlob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("digest", models.CharField(max_length=64, unique=True)),
+                (
+                    "file",
+                    models.FileField(upload_to=foods.models.image_blob_upload_path),
+                ),
+                ("size", models.PositiveIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="fooditem",
+            name="image_large_blob",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="foods.imageblob",
+            ),
+        ),
+        migrations.AddField(
+            model_name="fooditem",
+            name="image_small_blob",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="foods.imageblob",
+            ),
+        ),
+    ]
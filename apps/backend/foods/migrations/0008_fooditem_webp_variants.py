@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:27
+
+import django.db.models.deletion
+import foods.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0007_image_blobs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="fooditem",
+            name="image_large_webp",
+            field=models.FileField(
+                blank=True, null=True, upload_to=foods.models.food_image_upload_path
+            ),
+        ),
+        migrations.AddField(
+            model_name="fooditem",
+            name="image_large_webp_blob",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="foods.imageblob",
+            ),
+        ),
+        migrations.AddField(
+            model_name="fooditem",
+            name="image_small_webp",
+            field=models.FileField(
+                blank=True, null=True, upload_to=foods.models.food_image_upload_path
+            ),
+        ),
+        migrations.AddField(
+            model_name="fooditem",
+            name="image_small_webp_blob",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="foods.imageblob",
+            ),
+        ),
+    ]
@@ -0,0 +1,108 @@
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+CHUNK_SIZE = 1000
+
+
+def move_to_side_table(apps, schema_editor):
+    FoodItem = apps.get_model("foods", "FoodItem")
+    FoodSourceDocument = apps.get_model("foods", "FoodSourceDocument")
+    last_id = 0
+    while True:
+        rows = list(
+            FoodItem.objects.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", "raw_source_json")[:CHUNK_SIZE]
+        )
+        if not rows:
+            return
+        documents = []
+        for pk, value in rows:
+            encoded = json.dumps(
+                value, ensure_ascii=False, separators=(",", ":")
+            ).encode()
+            documents.append(
+                FoodSourceDocument(
+                    food_item_id=pk,
+                    codec="zlib",
+                    data=zlib.compress(encoded),
+                    size=len(encoded),
+                )
+            )
+        with transaction.atomic():
+            FoodSourceDocument.objects.bulk_create(documents, ignore_conflicts=True)
+        last_id = rows[-1][0]
+
+
+def move_back(apps, schema_editor):
+    FoodItem = apps.get_model("foods", "FoodItem")
+    FoodSourceDocument = apps.get_model("foods", "FoodSourceDocument")
+    last_id = 0
+    while True:
+        documents = list(
+            FoodSourceDocument.objects.filter(food_item_id__gt=last_id).order_by(
+                "food_item_id"
+            )[:CHUNK_SIZE]
+        )
+        if not documents:
+            return
+        items = [
+            FoodItem(
+                pk=document.food_item_id,
+                raw_source_json=json.loads(zlib.decompress(document.data)),
+            )
+            for document in documents
+        ]
+        with transaction.atomic():
+            FoodItem.objects.bulk_update(items, ["raw_source_json"])
+        last_id = documents[-1].food_item_id
+
+
+class Migration(migrations.Migration):
+    # Rows are copied in separately committed chunks.
+    atomic = False
+
+    dependencies = [
+        ("foods", "0008_fooditem_webp_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FoodSourceDocument",
+            fields=[
+                (
+                    "food_item",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="source_document",
+                        serialize=False,
+                        to="foods.fooditem",
+                    ),
+                ),
+                (
+                    "codec",
+                    models.CharField(
+                        choices=[("zlib", "zlib")], default="zlib", max_length=8
+                    ),
+                ),
+                ("data", models.BinaryField()),
+                ("size", models.PositiveIntegerField()),
+            ],
+        ),
+        # Nullable first so the reverse migration can re-add the column
+        # before filling it.
+        migrations.AlterField(
+            model_name="fooditem",
+            name="raw_source_json",
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(move_to_side_table, move_back),
+        migrations.RemoveField(
+            model_name="fooditem",
+            name="raw_source_json",
+        ),
+    ]
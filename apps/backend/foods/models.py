@@ -1,4 +1,26 @@
-from django.db import models
+import json
+import math
+import re
+import unicodedata
+import zlib
+from collections.abc import Iterable
+from typing import Any
+
+from django.db import models, transaction
+from django.utils import timezone
+
+_SEARCH_SEPARATOR_RE = re.compile(r"[\W_]+")
+_UNSET: Any = object()
+
+
+def normalize_search_text(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_SEARCH_SEPARATOR_RE.sub(" ", stripped.casefold()).split())
+
+
+def build_search_text(name: str, brands: str) -> str:
+    return normalize_search_text(f"{name or ''} {brands or ''}")
 
 
 def food_image_upload_path(instance: "FoodItem", filename: str) -> str:
@@ -7,6 +29,32 @@ def food_image_upload_path(instance: "FoodItem", filename: str) -> str:
     return f"foods/{safe_barcode}/{filename}"
 
 
+def image_blob_upload_path(instance: "ImageBlob", filename: str) -> str:
+    digest = instance.digest
+    return f"foods/blobs/{digest[:2]}/{digest[2:4]}/{filename}"
+
+
+class ImageBlob(models.Model):
+    """Image bytes stored once under their SHA-256 digest and shared by every
+    food item that references them; ``ref_count`` tracks those references."""
+
+    digest = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to=image_blob_upload_path)
+    size = models.PositiveIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.digest} ({self.ref_count} refs)"
+
+
+class FoodItemQuerySet(models.QuerySet["FoodItem"]):
+    def light(self) -> "FoodItemQuerySet":
+        """Skip ``FoodItem.HEAVY_FIELDS``; list and search paths never render
+        them, and they are loaded on access if something does."""
+        return self.defer(*FoodItem.HEAVY_FIELDS)
+
+
 class FoodItem(models.Model):
     SOURCE_OPEN_FOOD_FACTS = "openfoodfacts"
     SOURCE_CHOICES = [(SOURCE_OPEN_FOOD_FACTS, "Open Food Facts")]
@@ -29,6 +77,8 @@ class FoodItem(models.Model):
     barcode = models.CharField(max_length=64, unique=True, db_index=True)
     name = models.CharField(max_length=255)
     brands = models.CharField(max_length=255, blank=True)
+    # Normalized "name brands" used by typeahead; trigram-indexed on Postgres.
+    search_text = models.TextField(blank=True, default="", editable=False)
     image_url = models.URLField(blank=True)
     content_hash = models.CharField(max_length=128, blank=True, null=True)
     image_signature = models.CharField(max_length=128, blank=True, null=True)
@@ -38,6 +88,47 @@ class FoodItem(models.Model):
     image_small = models.FileField(
         upload_to=food_image_upload_path, blank=True, null=True
     )
+    # WebP renditions derived locally from the large image.
+    image_large_webp = models.FileField(
+        upload_to=food_image_upload_path, blank=True, null=True
+    )
+    image_small_webp = models.FileField(
+        upload_to=food_image_upload_path, blank=True, null=True
+    )
+    # Set when the file above is a shared ``ImageBlob`` rather than a
+    # per-item upload.
+    image_large_blob = models.ForeignKey(
+        ImageBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+        editable=False,
+    )
+    image_small_blob = models.ForeignKey(
+        ImageBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+        editable=False,
+    )
+    image_large_webp_blob = models.ForeignKey(
+        ImageBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+        editable=False,
+    )
+    image_small_webp_blob = models.ForeignKey(
+        ImageBlob,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+        editable=False,
+    )
     image_large_source_url = models.URLField(blank=True, default="")
     image_small_source_url = models.URLField(blank=True, default="")
     image_downloaded_at = models.DateTimeField(blank=True, null=True)
@@ -70,8 +161,15 @@ class FoodItem(models.Model):
     serving_size_g = models.DecimalField(
         max_digits=8, decimal_places=2, null=True, blank=True
     )
-    raw_source_json = models.JSONField()
     nutriments_json = models.JSONField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    # Large per-row payloads deferred by ``FoodItemQuerySet.light``.
+    HEAVY_FIELDS = ("nutriments_json",)
+    # Per-100 g values that logged meal entries are computed from.
+    MACRO_FIELDS = ("kcal_100g", "protein_g_100g", "carbs_g_100g", "fat_g_100g")
+
+    objects = FoodItemQuerySet.as_manager()
 
     class Meta:
         constraints = [
@@ -83,3 +181,190 @@ class FoodItem(models.Model):
 
     def __str__(self) -> str:
         return f"{self.name} ({self.source})"
+
+    def macros(self) -> tuple[Any, ...]:
+        return tuple(getattr(self, field) for field in self.MACRO_FIELDS)
+
+    @property
+    def raw_source_json(self) -> Any:
+        """Upstream product document, stored compressed in
+        ``FoodSourceDocument`` and only loaded on first access."""
+        value = self.__dict__.get("_raw_source_json", _UNSET)
+        if value is _UNSET:
+            try:
+                value = self.source_document.payload
+            except FoodSourceDocument.DoesNotExist:
+                value = None
+            self.__dict__["_raw_source_json"] = value
+        return value
+
+    @raw_source_json.setter
+    def raw_source_json(self, value: Any) -> None:
+        self.__dict__["_raw_source_json"] = value
+        self.__dict__["_raw_source_json_changed"] = True
+
+    def raw_source_json_encoded(self) -> bytes | None:
+        """The stored document's JSON when ``raw_source_json`` has not been
+        loaded or assigned yet (and a document exists), else ``None``."""
+        if "_raw_source_json" in self.__dict__:
+            return None
+        try:
+            return self.source_document.encoded
+        except FoodSourceDocument.DoesNotExist:
+            return None
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        self.search_text = build_search_text(self.name, self.brands)
+        update_fields = kwargs.get("update_fields")
+        store_document = self.__dict__.get("_raw_source_json_changed", False)
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            store_document = store_document and "raw_source_json" in update_fields
+            update_fields.discard("raw_source_json")
+            if {"name", "brands"} & update_fields:
+                update_fields.add("search_text")
+            kwargs["update_fields"] = update_fields
+        if not store_document:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            FoodSourceDocument.store([self])
+
+    def refresh_from_db(
+        self,
+        using: str | None = None,
+        fields: Iterable[str] | None = None,
+        from_queryset: Any = None,
+    ) -> None:
+        reload_document = fields is None or "raw_source_json" in fields
+        if fields is not None:
+            fields = [name for name in fields if name != "raw_source_json"]
+        if fields is None or fields:
+            super().refresh_from_db(using, fields, from_queryset)
+        if reload_document:
+            self.__dict__.pop("_raw_source_json", None)
+            self.__dict__.pop("_raw_source_json_changed", None)
+            self._state.fields_cache.pop("source_document", None)
+
+
+def compress_source_json(value: Any) -> tuple[bytes, int]:
+    """Return the zlib-compressed compact JSON for ``value`` and its raw size.
+
+    The stored bytes are spliced into responses as they are, so they must be
+    strict JSON: NaN and infinities (which ``json.loads`` accepts in upstream
+    documents) are stored as ``null``, as orjson renders them.
+    """
+    try:
+        encoded = _dump_strict_json(value)
+    except ValueError:
+        encoded = _dump_strict_json(_finite_json(value))
+    return zlib.compress(encoded), len(encoded)
+
+
+def _dump_strict_json(value: Any) -> bytes:
+    return json.dumps(
+        value, ensure_ascii=False, separators=(",", ":"), allow_nan=False
+    ).encode()
+
+
+def _finite_json(value: Any) -> Any:
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite_json(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [_finite_json(item) for item in value]
+    return value
+
+
+class FoodSourceDocument(models.Model):
+    """Compressed ``FoodItem.raw_source_json``, kept out of the hot table."""
+
+    CODEC_ZLIB = "zlib"
+    CODEC_CHOICES = [(CODEC_ZLIB, "zlib")]
+
+    food_item = models.OneToOneField(
+        FoodItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="source_document",
+    )
+    codec = models.CharField(max_length=8, choices=CODEC_CHOICES, default=CODEC_ZLIB)
+    data = models.BinaryField()
+    # Uncompressed JSON size in bytes.
+    size = models.PositiveIntegerField()
+
+    def __str__(self) -> str:
+        return f"Source document for {self.food_item_id} ({self.size} bytes)"
+
+    @property
+    def encoded(self) -> bytes:
+        """The document as compact UTF-8 JSON, without decoding it."""
+        if self.codec != self.CODEC_ZLIB:
+            raise ValueError(f"Unknown source document codec: {self.codec}")
+        return zlib.decompress(self.data)
+
+    @property
+    def payload(self) -> Any:
+        return json.loads(self.encoded)
+
+    @classmethod
+    def store(cls, items: Iterable[FoodItem]) -> None:
+        """Upsert the documents of saved ``items`` in one statement."""
+        documents = []
+        for item in items:
+            data, size = compress_source_json(item.raw_source_json)
+            documents.append(
+                cls(food_item_id=item.pk, codec=cls.CODEC_ZLIB, data=data, size=size)
+            )
+            item.__dict__.pop("_raw_source_json_changed", None)
+        if documents:
+            cls.objects.bulk_create(
+                documents,
+                update_conflicts=True,
+                unique_fields=["food_item"],
+                update_fields=["codec", "data", "size"],
+            )
+
+
+class FoodImageJob(models.Model):
+    """Pending image download for a food item, drained by ``process_image_jobs``."""
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    food_item = models.OneToOneField(
+        FoodItem, on_delete=models.CASCADE, related_name="image_job"
+    )
+    large_url = models.URLField(blank=True, default="")
+    small_url = models.URLField(blank=True, default="")
+    image_signature = models.CharField(max_length=128, blank=True, null=True)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "available_at"],
+                name="foods_imagejob_status_avail",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"Image job for {self.food_item_id} ({self.status})"
@@ -0,0 +1,387 @@
+"""Map Open Food Facts product documents onto ``FoodItemIngestSerializer``
+payloads.
+
+A port of the mobile client's ``OffMapper`` (``off_mapper.dart``) and
+``FoodItem.toBackendPayload``: the same name, image and nutriment choices and
+the same ``content_hash``, so items ingested here and items ingested by the app
+agree in ``/foods/check``.
+"""
+
+import hashlib
+import json
+import math
+import re
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+OFF_IMAGE_BASE_URL = "https://images.openfoodfacts.org/images/products"
+# Product fields requested from the OFF product endpoint.
+OFF_PRODUCT_FIELDS = (
+    "code",
+    "product_name",
+    "product_name_en",
+    "generic_name",
+    "brands",
+    "serving_size",
+    "categories_tags",
+    "image_url",
+    "image_front_url",
+    "image_front_thumb_url",
+    "image_front_small_url",
+    "image_thumb_url",
+    "image_ingredients_url",
+    "image_nutrition_url",
+    "selected_images",
+    "images",
+    "nutriments",
+    "lang",
+)
+# Ingest payload field -> OFF nutriment key.
+NUTRIMENT_FIELDS = {
+    "protein_g_100g": "proteins_100g",
+    "carbs_g_100g": "carbohydrates_100g",
+    "fat_g_100g": "fat_100g",
+    "sugars_g_100g": "sugars_100g",
+    "fiber_g_100g": "fiber_100g",
+    "salt_g_100g": "salt_100g",
+}
+HASH_FIELDS = (
+    "kcal_100g",
+    *NUTRIMENT_FIELDS,
+    "serving_size_g",
+)
+UNNAMED_PRODUCT = "Unnamed product"
+
+_DIGITS_RE = re.compile(r"^\d+$")
+_NUMBER_RE = re.compile(r"([\d.,]+)")
+_CENT = Decimal("0.01")
+
+
+def map_product(
+    document: dict[str, Any], locale: str | None = None
+) -> dict[str, Any] | None:
+    """The ingest payload for an OFF product response (``{"status": 1,
+    "product": {...}}``), or ``None`` when it holds no product."""
+    product = document.get("product")
+    if document.get("status") != 1 or not isinstance(product, dict):
+        return None
+    code = product.get("code")
+    barcode = "" if code is None else _dart_string(code)
+    name = _best_name(product)
+    brands = _string_value(product.get("brands")) or ""
+    locale = locale.strip().lower() if locale else None
+    large_url, small_url, signature = _select_images(product, locale)
+
+    nutriments = product.get("nutriments")
+    if not isinstance(nutriments, dict):
+        nutriments = None
+    values: dict[str, float | None] = {"kcal_100g": _kcal_per_100g(nutriments)}
+    for field, key in NUTRIMENT_FIELDS.items():
+        values[field] = _read_nutriment(nutriments, key)
+    values["serving_size_g"] = _parse_serving_size(product.get("serving_size"))
+
+    payload: dict[str, Any] = {
+        "source": "openfoodfacts",
+        "external_id": barcode,
+        "barcode": barcode,
+        "name": name,
+        "brands": brands,
+        "image_url": small_url or large_url or "",
+        **{field: _decimal(value) for field, value in values.items()},
+        "raw_source_json": document,
+        "content_hash": content_hash(barcode, name, brands, values, signature),
+    }
+    if signature and signature.strip():
+        payload["image_signature"] = signature
+    if large_url:
+        payload["image_large_url"] = large_url
+    if small_url:
+        payload["image_small_url"] = small_url
+    if nutriments is not None:
+        payload["nutriments_json"] = nutriments
+    return payload
+
+
+def content_hash(
+    external_id: str,
+    name: str,
+    brands: str,
+    values: dict[str, float | None],
+    image_signature: str | None,
+) -> str:
+    """``_buildContentHash``: SHA-256 of the app's ``jsonEncode`` of the
+    normalized fields."""
+    payload = {
+        "source": "openfoodfacts",
+        "external_id": external_id.strip(),
+        "name": name.strip(),
+        "brands": brands.strip(),
+        **{field: _normalize_number(values[field]) for field in HASH_FIELDS},
+        "image_signature": (image_signature or "").strip(),
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _decimal(value: float | None) -> Decimal | None:
+    # Ingest columns have two decimal places.
+    if value is None:
+        return None
+    return Decimal(repr(value)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def _normalize_number(value: float | None) -> str:
+    if value is None:
+        return ""
+    fixed = f"{value:.3f}"
+    fixed = re.sub(r"\.0+$", "", fixed, count=1)
+    return re.sub(r"(\.\d*[1-9])0+$", r"\1", fixed, count=1)
+
+
+def _dart_string(value: Any) -> str:
+    # Dart's ``toString`` of a JSON number: doubles always keep a fraction.
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, float) and value.is_integer():
+        return f"{value:.1f}"
+    return str(value)
+
+
+def _string_value(value: Any) -> str | None:
+    if not isinstance(value, str):
+        return None
+    return value.strip() or None
+
+
+def _parse_double(value: Any) -> float | None:
+    """``parseNullableDouble``."""
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int | float):
+        number = float(value)
+    elif isinstance(value, str):
+        trimmed = value.strip()
+        if not trimmed or "_" in trimmed:
+            return None
+        try:
+            number = float(trimmed)
+        except ValueError:
+            return None
+    else:
+        return None
+    # Unlike the app, NaN and infinities are dropped: no column can hold them.
+    return number if math.isfinite(number) else None
+
+
+def _read_nutriment(nutriments: dict[str, Any] | None, key: str) -> float | None:
+    if nutriments is None:
+        return None
+    return _parse_double(nutriments.get(key))
+
+
+def _kcal_per_100g(nutriments: dict[str, Any] | None) -> float | None:
+    energy = _read_nutriment(nutriments, "energy-kcal_100g")
+    if energy is None:
+        energy = _read_nutriment(nutriments, "energy-kcal_value")
+    if energy is not None:
+        return energy
+    protein = _read_nutriment(nutriments, "proteins_100g") or 0.0
+    carbs = _read_nutriment(nutriments, "carbohydrates_100g") or 0.0
+    fat = _read_nutriment(nutriments, "fat_100g") or 0.0
+    if protein == 0 and carbs == 0 and fat == 0:
+        return None
+    return 4 * protein + 4 * carbs + 9 * fat
+
+
+def _parse_serving_size(value: Any) -> float | None:
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, int | float):
+        return float(value)
+    if not isinstance(value, str) or not value.strip():
+        return None
+    match = _NUMBER_RE.search(value)
+    if match is None:
+        return None
+    return _parse_double(match.group(1).replace(",", "."))
+
+
+def _best_name(product: dict[str, Any]) -> str:
+    lang = product.get("lang")
+    name_en = product.get("product_name_en")
+    if (
+        isinstance(lang, str)
+        and lang.lower() != "en"
+        and isinstance(name_en, str)
+        and name_en.strip()
+    ):
+        return name_en.strip()
+    for key in ("product_name_en", "product_name", "generic_name"):
+        candidate = product.get(key)
+        if isinstance(candidate, str) and candidate.strip():
+            return candidate.strip()
+    return UNNAMED_PRODUCT
+
+
+_Selection = tuple[str | None, str | None, str | None]
+
+
+def _select_images(product: dict[str, Any], locale: str | None) -> _Selection:
+    """``(large_url, small_url, signature)``: the selected front image when
+    complete, else the direct URL fields completed from ``images``."""
+    selected = _select_from_selected_images(product, locale)
+    if selected is not None and selected[0] and selected[1]:
+        return selected
+    direct_large, direct_small, direct_signature = _select_from_direct_fields(product)
+    computed = _select_from_images(product, locale)
+    computed_large, computed_small, computed_signature = computed or (None,) * 3
+    large_url = _first(direct_large, computed_large)
+    small_url = _first(direct_small, computed_small)
+    signature = _first(computed_signature, direct_signature)
+    if signature is None:
+        signature = _signature_from_url(_first(large_url, small_url))
+    return large_url, small_url, signature
+
+
+def _first(*values: str | None) -> str | None:
+    # Dart's ``??``: only ``None`` falls through.
+    return next((value for value in values if value is not None), None)
+
+
+def _select_from_selected_images(
+    product: dict[str, Any], locale: str | None
+) -> _Selection | None:
+    selected_images = product.get("selected_images")
+    front = selected_images.get("front") if isinstance(selected_images, dict) else None
+    if not isinstance(front, dict):
+        return None
+    display, thumb = front.get("display"), front.get("thumb")
+    if not isinstance(display, dict) or not isinstance(thumb, dict):
+        return None
+    lang = _pick_language(display, thumb, locale)
+    if lang is None:
+        return None
+    large_url = _string_value(display.get(lang))
+    small_url = _string_value(thumb.get(lang))
+    if large_url is None or small_url is None:
+        return None
+    signature = _first(
+        _signature_from_image_key(product, f"front_{lang}"),
+        _signature_from_url(large_url),
+    )
+    return large_url, small_url, signature
+
+
+def _select_from_direct_fields(product: dict[str, Any]) -> _Selection:
+    large_url = _first(
+        _string_value(product.get("image_front_url")),
+        _string_value(product.get("image_url")),
+    )
+    small_url = _first(
+        _string_value(product.get("image_front_thumb_url")),
+        _string_value(product.get("image_thumb_url")),
+        _string_value(product.get("image_front_small_url")),
+    )
+    return large_url, small_url, _signature_from_url(_first(large_url, small_url))
+
+
+def _select_from_images(
+    product: dict[str, Any], locale: str | None
+) -> _Selection | None:
+    images = product.get("images")
+    if not isinstance(images, dict) or not images:
+        return None
+    code = product.get("code")
+    barcode = "" if code is None else _dart_string(code).strip()
+    if not barcode:
+        return None
+    base_path = _image_base_path(barcode)
+    for key in _image_key_candidates(images, locale):
+        if key not in images:
+            continue
+        large_name = _image_filename(images[key], key, 400)
+        small_name = _image_filename(images[key], key, 100)
+        if large_name is None or small_name is None:
+            continue
+        large_url = f"{OFF_IMAGE_BASE_URL}/{base_path}/{large_name}"
+        small_url = f"{OFF_IMAGE_BASE_URL}/{base_path}/{small_name}"
+        signature = _first(
+            _signature_from_image_key(product, key), _signature_from_url(large_url)
+        )
+        return large_url, small_url, signature
+    return None
+
+
+def _pick_language(
+    display: dict[str, Any], thumb: dict[str, Any], locale: str | None
+) -> str | None:
+    available: dict[str, str] = {}
+    for key in display:
+        if key in thumb:
+            available[key.lower()] = key
+    if not available:
+        return None
+    if locale and locale.lower() in available:
+        return available[locale.lower()]
+    if "en" in available:
+        return available["en"]
+    return next(iter(available.values()))
+
+
+def _image_key_candidates(images: dict[str, Any], locale: str | None) -> list[str]:
+    keys = [f"front_{locale}"] if locale else []
+    keys.append("front_en")
+    keys.extend(sorted(key for key in images if key.startswith("front_")))
+    if "front" in images:
+        keys.append("front")
+    keys.append("1")
+    keys.extend(sorted((key for key in images if _DIGITS_RE.match(key)), key=int))
+    return list(dict.fromkeys(keys))
+
+
+def _image_filename(image: Any, key: str, resolution: int) -> str | None:
+    if _DIGITS_RE.match(key):
+        return f"{key}.{resolution}.jpg"
+    if not isinstance(image, dict) or image.get("rev") is None:
+        return None
+    return f"{key}.{_dart_string(image['rev'])}.{resolution}.jpg"
+
+
+def _image_base_path(barcode: str) -> str:
+    digits = re.sub(r"\D", "", barcode)
+    if not digits:
+        return barcode
+    padded = digits.zfill(13)
+    return f"{padded[:3]}/{padded[3:6]}/{padded[6:9]}/{padded[9:]}"
+
+
+def _signature_from_image_key(product: dict[str, Any], key: str) -> str | None:
+    images = product.get("images")
+    image = images.get(key) if isinstance(images, dict) else None
+    if not isinstance(image, dict) or image.get("rev") is None:
+        return None
+    return f"{key}.{_dart_string(image['rev'])}"
+
+
+def _signature_from_url(url: str | None) -> str | None:
+    if url is None or not url.strip():
+        return None
+    try:
+        path = urlsplit(url).path
+    except ValueError:
+        return url
+    # Dart's ``Uri.pathSegments``: no leading empty segment, none at all for
+    # an empty or root path.
+    segments = [unquote(segment) for segment in path.removeprefix("/").split("/")]
+    if path in ("", "/"):
+        return url
+    filename = segments[-1]
+    parts = filename.split(".")
+    if len(parts) >= 4 and parts[-1].lower() == "jpg":
+        return f"{parts[0]}.{parts[1]}"
+    if len(parts) == 3 and parts[-1].lower() == "jpg":
+        return parts[0]
+    if len(segments) >= 2:
+        return f"{segments[-2]}/{segments[-1]}"
+    return filename
@@ -0,0 +1,569 @@
+"""Bulk import of Open Food Facts data dumps (``manage.py import_off_dump``).
+
+The JSONL (``openfoodfacts-products.jsonl.gz``) and tab-separated CSV
+(``en.openfoodfacts.org.products.csv.gz``) exports are streamed line by line,
+gzip-compressed or plain, and never held in memory. Chunks of lines are
+mapped on a process pool: each worker parses the records, maps them with
+``foods.off.map_product`` (keeping only ``OFF_PRODUCT_FIELDS`` of each
+product, like the barcode lookup), validates the payload with
+``FoodItemIngestSerializer`` and compresses the source document, so the
+parent process only loads rows.
+
+Each chunk is loaded in one transaction. Records whose stored
+``content_hash`` matches are skipped without a write; the rest replace the
+imported columns of their row: on PostgreSQL through ``COPY`` into a
+temporary staging table merged with ``INSERT ... ON CONFLICT (barcode) DO
+UPDATE``, elsewhere with ``bulk_create(update_conflicts=True)``.
+``food_items_changed`` and ``food_macros_changed`` follow the ingest rules.
+Image jobs are only queued with ``queue_images`` (``--queue-images``): a full
+dump would queue millions of downloads. A record whose
+``(source, external_id)`` belongs to an item with another barcode is left
+alone and counted as a conflict.
+
+After every committed chunk the position in the decompressed stream is saved
+to a checkpoint file, so an interrupted import resumes after the last
+committed chunk. The checkpoint is removed once the dump is fully imported.
+"""
+
+import gzip
+import json
+import math
+import os
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from multiprocessing import get_context
+from typing import IO, Any
+
+import django
+import orjson
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from foods.image_jobs import ImageJobRequest, enqueue_image_jobs
+from foods.images import should_download_images
+from foods.models import (
+    FoodItem,
+    FoodSourceDocument,
+    build_search_text,
+    compress_source_json,
+)
+from foods.off import OFF_PRODUCT_FIELDS, map_product
+from foods.search_cache import typeahead_cache
+from foods.serializers import FoodItemIngestSerializer
+from foods.signals import food_items_changed, food_macros_changed
+
+DUMP_FORMAT_JSONL = "jsonl"
+DUMP_FORMAT_CSV = "csv"
+DUMP_FORMATS = (DUMP_FORMAT_JSONL, DUMP_FORMAT_CSV)
+IMPORT_CHUNK_SIZE = 1000
+CHECKPOINT_VERSION = 1
+# CSV export columns that carry a product field under another name.
+CSV_COLUMN_ALIASES = {"image_small_url": "image_front_small_url"}
+# ``FoodItem`` columns every imported record sets. ``image_status`` and the
+# stored image files are left to the image jobs.
+IMPORT_FIELDS = (
+    "source",
+    "external_id",
+    "barcode",
+    "name",
+    "brands",
+    "search_text",
+    "image_url",
+    "content_hash",
+    "image_signature",
+    "image_large_source_url",
+    "image_small_source_url",
+    "kcal_100g",
+    "protein_g_100g",
+    "carbs_g_100g",
+    "fat_g_100g",
+    "sugars_g_100g",
+    "fiber_g_100g",
+    "salt_g_100g",
+    "serving_size_g",
+    "nutriments_json",
+)
+STAGE_TABLE = "foods_import_stage"
+
+_FIELD_DEFAULTS = {
+    name: FoodItem._meta.get_field(name).get_default() for name in IMPORT_FIELDS
+}
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class ImportRow:
+    fields: dict[str, Any]
+    document: bytes
+    document_size: int
+
+
+@dataclass
+class MappedChunk:
+    rows: list[ImportRow]
+    invalid: int
+
+
+@dataclass
+class ImportStats:
+    records: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    invalid: int = 0
+    conflicts: int = 0
+    # Records replaced by a later record of the same barcode in their chunk.
+    superseded: int = 0
+    # Records already imported by earlier runs when this one resumed.
+    resumed: int = 0
+
+
+@dataclass
+class _Checkpoint:
+    path: str
+    size: int
+    format: str
+    offset: int = 0
+    stats: ImportStats = field(default_factory=ImportStats)
+
+
+def detect_format(path: str) -> str:
+    """The dump format implied by ``path``'s extension."""
+    name = path.lower().removesuffix(".gz")
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return DUMP_FORMAT_JSONL
+    if name.endswith((".csv", ".tsv")):
+        return DUMP_FORMAT_CSV
+    raise ValueError(f"Cannot tell the dump format of {path}; pass it explicitly.")
+
+
+def import_off_dump(
+    path: str,
+    *,
+    dump_format: str | None = None,
+    workers: int = 0,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    checkpoint_path: str | None = None,
+    restart: bool = False,
+    queue_images: bool = False,
+    progress: Callable[[ImportStats], None] | None = None,
+) -> ImportStats:
+    """Import the dump at ``path`` and return the totals, resumed ones
+    included. ``workers=0`` maps records inline; ``progress`` is called after
+    every committed chunk."""
+    dump_format = dump_format or detect_format(path)
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+    checkpoint = _Checkpoint(os.path.abspath(path), os.path.getsize(path), dump_format)
+    if not restart:
+        checkpoint = _load_checkpoint(checkpoint_path, checkpoint)
+    stats = checkpoint.stats
+    stats.resumed = stats.records
+
+    with _open_dump(path) as stream:
+        header = None
+        if dump_format == DUMP_FORMAT_CSV:
+            first = stream.readline()
+            header = first.decode("utf-8", "replace").rstrip("\r\n").split("\t")
+            checkpoint.offset = max(checkpoint.offset, len(first))
+        if checkpoint.offset:
+            stream.seek(checkpoint.offset)
+        chunks = _read_chunks(stream, checkpoint.offset, chunk_size)
+        for mapped, records, offset in _map_chunks(
+            chunks, dump_format, header, workers
+        ):
+            with transaction.atomic():
+                written = _load(mapped.rows, stats, queue_images)
+            if written:
+                typeahead_cache.invalidate()
+            stats.records += records
+            stats.invalid += mapped.invalid
+            checkpoint.offset = offset
+            _save_checkpoint(checkpoint_path, checkpoint)
+            if progress is not None:
+                progress(stats)
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return stats
+
+
+def _open_dump(path: str) -> IO[bytes]:
+    with open(path, "rb") as probe:
+        compressed = probe.read(2) == _GZIP_MAGIC
+    return gzip.open(path, "rb") if compressed else open(path, "rb")
+
+
+def _read_chunks(
+    stream: IO[bytes], offset: int, chunk_size: int
+) -> Iterator[tuple[list[bytes], int]]:
+    """Yield non-blank lines in chunks, each with the stream offset after it."""
+    lines: list[bytes] = []
+    for line in stream:
+        offset += len(line)
+        if line.strip():
+            lines.append(line)
+            if len(lines) >= chunk_size:
+                yield lines, offset
+                lines = []
+    if lines:
+        yield lines, offset
+
+
+def _map_chunks(
+    chunks: Iterator[tuple[list[bytes], int]],
+    dump_format: str,
+    header: list[str] | None,
+    workers: int,
+) -> Iterator[tuple[MappedChunk, int, int]]:
+    """Map chunks in input order, at most two per worker in flight."""
+    if workers <= 0:
+        for lines, offset in chunks:
+            yield map_lines(dump_format, header, lines), len(lines), offset
+        return
+    # Spawned workers set Django up once; forking a process that holds
+    # database connections is not safe.
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=get_context("spawn"), initializer=django.setup
+    )
+    pending: deque[tuple[Future[MappedChunk], int, int]] = deque()
+    try:
+        for lines, offset in chunks:
+            future = pool.submit(map_lines, dump_format, header, lines)
+            pending.append((future, len(lines), offset))
+            if len(pending) >= workers * 2:
+                future, records, end = pending.popleft()
+                yield future.result(), records, end
+        while pending:
+            future, records, end = pending.popleft()
+            yield future.result(), records, end
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def map_lines(
+    dump_format: str, header: list[str] | None, lines: list[bytes]
+) -> MappedChunk:
+    """Map dump lines to ``ImportRow``s; runs in the worker processes."""
+    # One shared instance, as in ``foods.ingest``: binding a serializer per
+    # record deep-copies every declared field.
+    validator = FoodItemIngestSerializer()
+    rows: list[ImportRow] = []
+    invalid = 0
+    for line in lines:
+        if dump_format == DUMP_FORMAT_CSV:
+            assert header is not None
+            product = _csv_product(header, line)
+        else:
+            product = _jsonl_product(line)
+        row = _import_row(validator, product) if product is not None else None
+        if row is None:
+            invalid += 1
+        else:
+            rows.append(row)
+    return MappedChunk(rows, invalid)
+
+
+def _jsonl_product(line: bytes) -> dict[str, Any] | None:
+    try:
+        record = orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    return {key: record[key] for key in OFF_PRODUCT_FIELDS if key in record}
+
+
+def _csv_product(header: list[str], line: bytes) -> dict[str, Any]:
+    values = line.decode("utf-8", "replace").rstrip("\r\n").split("\t")
+    product: dict[str, Any] = {}
+    nutriments: dict[str, Any] = {}
+    for column, value in zip(header, values, strict=False):
+        if not value:
+            continue
+        if column.endswith("_100g"):
+            nutriments[column] = _csv_number(value)
+        elif column in CSV_COLUMN_ALIASES:
+            product[CSV_COLUMN_ALIASES[column]] = value
+        elif column in OFF_PRODUCT_FIELDS:
+            product[column] = value
+    if nutriments:
+        product["nutriments"] = nutriments
+    return product
+
+
+def _csv_number(value: str) -> float | str:
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return number if math.isfinite(number) else value
+
+
+def _import_row(
+    validator: FoodItemIngestSerializer, product: dict[str, Any]
+) -> ImportRow | None:
+    document = {"code": product.get("code"), "product": product, "status": 1}
+    payload = map_product(document)
+    if payload is None:
+        return None
+    try:
+        validated = validator.run_validation(payload)
+    except serializers.ValidationError:
+        return None
+    item_fields = validator.get_item_fields(validated)
+    data, size = compress_source_json(item_fields["raw_source_json"])
+    fields = {
+        name: item_fields.get(name, default)
+        for name, default in _FIELD_DEFAULTS.items()
+    }
+    fields["search_text"] = build_search_text(fields["name"], fields["brands"])
+    return ImportRow(fields, data, size)
+
+
+def _load(rows: list[ImportRow], stats: ImportStats, queue_images: bool) -> bool:
+    """Write the changed rows of one chunk; return whether anything was."""
+    # The last record of a barcode or external key wins, like sequential
+    # ingests would; a single upsert statement must not touch a row twice.
+    by_barcode = {row.fields["barcode"]: row for row in rows}
+    by_external = {_external_key(row): row for row in by_barcode.values()}
+    stats.superseded += len(rows) - len(by_external)
+    rows = list(by_external.values())
+
+    existing = {
+        values["barcode"]: values
+        for values in FoodItem.objects.filter(barcode__in=list(by_barcode)).values(
+            "id",
+            "barcode",
+            "content_hash",
+            "image_signature",
+            "image_status",
+            "image_large",
+            "image_small",
+            *FoodItem.MACRO_FIELDS,
+        )
+    }
+    owners = _external_key_owners(rows)
+
+    to_write: list[ImportRow] = []
+    updated: list[int] = []
+    macros_changed: list[int] = []
+    for row in rows:
+        fields = row.fields
+        barcode = fields["barcode"]
+        if owners.get(_external_key(row), barcode) != barcode:
+            stats.conflicts += 1
+            continue
+        current = existing.get(barcode)
+        if current is None:
+            stats.created += 1
+        elif (
+            current["content_hash"]
+            and current["content_hash"] == fields["content_hash"]
+        ):
+            stats.unchanged += 1
+            continue
+        else:
+            stats.updated += 1
+            updated.append(current["id"])
+            if any(current[name] != fields[name] for name in FoodItem.MACRO_FIELDS):
+                macros_changed.append(current["id"])
+        to_write.append(row)
+    if not to_write:
+        return False
+
+    now = timezone.now()
+    if connection.vendor == "postgresql":
+        ids = _copy_merge(to_write, now)
+    else:
+        ids = _bulk_upsert(to_write, now)
+    if queue_images:
+        enqueue_image_jobs(_image_jobs(to_write, ids, existing))
+    if updated:
+        food_items_changed.send(sender=FoodItem, food_item_ids=updated)
+    if macros_changed:
+        food_macros_changed.send(sender=FoodItem, food_item_ids=macros_changed)
+    return True
+
+
+def _external_key(row: ImportRow) -> tuple[str, str]:
+    return row.fields["source"], row.fields["external_id"]
+
+
+def _external_key_owners(rows: list[ImportRow]) -> dict[tuple[str, str], str]:
+    """Barcode of the item holding each row's ``(source, external_id)``."""
+    external_ids: dict[str, list[str]] = {}
+    for row in rows:
+        source, external_id = _external_key(row)
+        external_ids.setdefault(source, []).append(external_id)
+    external_filter = Q()
+    for source, ids in external_ids.items():
+        external_filter |= Q(source=source, external_id__in=ids)
+    return {
+        (source, external_id): barcode
+        for source, external_id, barcode in FoodItem.objects.filter(
+            external_filter
+        ).values_list("source", "external_id", "barcode")
+    }
+
+
+def _bulk_upsert(rows: list[ImportRow], now: Any) -> dict[str, int]:
+    FoodItem.objects.bulk_create(
+        [FoodItem(**row.fields, updated_at=now) for row in rows],
+        update_conflicts=True,
+        unique_fields=["barcode"],
+        update_fields=[
+            *(name for name in IMPORT_FIELDS if name != "barcode"),
+            "updated_at",
+        ],
+    )
+    ids = dict(
+        FoodItem.objects.filter(
+            barcode__in=[row.fields["barcode"] for row in rows]
+        ).values_list("barcode", "id")
+    )
+    FoodSourceDocument.objects.bulk_create(
+        [
+            FoodSourceDocument(
+                food_item_id=ids[row.fields["barcode"]],
+                codec=FoodSourceDocument.CODEC_ZLIB,
+                data=row.document,
+                size=row.document_size,
+            )
+            for row in rows
+        ],
+        update_conflicts=True,
+        unique_fields=["food_item"],
+        update_fields=["codec", "data", "size"],
+    )
+    return ids
+
+
+def _copy_merge(rows: list[ImportRow], now: Any) -> dict[str, int]:
+    """``COPY`` rows into a staging table dropped at commit, then merge it into
+    ``FoodItem`` and ``FoodSourceDocument`` with one statement each."""
+    quote = connection.ops.quote_name
+    items = quote(FoodItem._meta.db_table)
+    documents = quote(FoodSourceDocument._meta.db_table)
+    columns = [quote(FoodItem._meta.get_field(name).column) for name in IMPORT_FIELDS]
+    column_list = ", ".join(columns)
+    barcode = quote(FoodItem._meta.get_field("barcode").column)
+    updates = ", ".join(
+        f"{column} = EXCLUDED.{column}"
+        for column in [*columns, quote("updated_at")]
+        if column != barcode
+    )
+    json_fields = {"nutriments_json"}
+    with connection.cursor() as cursor:
+        # Inside an outer transaction the previous chunk's table still exists.
+        cursor.execute(f"DROP TABLE IF EXISTS pg_temp.{STAGE_TABLE}")
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {STAGE_TABLE} ON COMMIT DROP AS "
+            f"SELECT {column_list} FROM {items} WITH NO DATA"
+        )
+        cursor.execute(
+            f"ALTER TABLE {STAGE_TABLE} "
+            "ADD COLUMN document bytea, ADD COLUMN document_size integer"
+        )
+        # ``cursor.cursor`` is the psycopg cursor under Django's wrapper.
+        with cursor.cursor.copy(
+            f"COPY {STAGE_TABLE} ({column_list}, document, document_size) FROM STDIN"
+        ) as copy:
+            for row in rows:
+                copy.write_row(
+                    [
+                        *(
+                            _json_text(row.fields[name])
+                            if name in json_fields
+                            else row.fields[name]
+                            for name in IMPORT_FIELDS
+                        ),
+                        row.document,
+                        row.document_size,
+                    ]
+                )
+        cursor.execute(
+            f"INSERT INTO {items} ({column_list}, image_status, updated_at) "
+            f"SELECT {column_list}, %s, %s FROM {STAGE_TABLE} "
+            f"ON CONFLICT ({barcode}) DO UPDATE SET {updates} "
+            f"RETURNING {barcode}, id",
+            [FoodItem.IMAGE_STATUS_NONE, now],
+        )
+        ids = dict(cursor.fetchall())
+        cursor.execute(
+            f"INSERT INTO {documents} (food_item_id, codec, data, size) "
+            "SELECT item.id, %s, stage.document, stage.document_size "
+            f"FROM {STAGE_TABLE} stage JOIN {items} item "
+            f"ON item.{barcode} = stage.{barcode} "
+            "ON CONFLICT (food_item_id) DO UPDATE SET "
+            "codec = EXCLUDED.codec, data = EXCLUDED.data, size = EXCLUDED.size",
+            [FoodSourceDocument.CODEC_ZLIB],
+        )
+    return ids
+
+
+def _json_text(value: Any) -> str | None:
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+def _image_jobs(
+    rows: list[ImportRow], ids: dict[str, int], existing: dict[str, dict[str, Any]]
+) -> list[ImageJobRequest]:
+    jobs = []
+    for row in rows:
+        fields = row.fields
+        current = existing.get(fields["barcode"], {})
+        item = FoodItem(
+            id=ids[fields["barcode"]],
+            image_status=current.get("image_status", FoodItem.IMAGE_STATUS_NONE),
+            image_large=current.get("image_large"),
+            image_small=current.get("image_small"),
+        )
+        signature = fields["image_signature"]
+        signature_changed = bool(signature) and signature != (
+            current.get("image_signature") or ""
+        )
+        if should_download_images(item, signature_changed):
+            jobs.append(
+                ImageJobRequest(
+                    item,
+                    fields["image_large_source_url"],
+                    fields["image_small_source_url"],
+                    signature,
+                )
+            )
+    return jobs
+
+
+def _load_checkpoint(path: str, fresh: _Checkpoint) -> _Checkpoint:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            state = json.load(handle)
+    except FileNotFoundError:
+        return fresh
+    if state.get("version") != CHECKPOINT_VERSION or (
+        state.get("path"),
+        state.get("size"),
+        state.get("format"),
+    ) != (fresh.path, fresh.size, fresh.format):
+        raise ValueError(
+            f"Checkpoint {path} belongs to another dump; remove it or restart."
+        )
+    return _Checkpoint(
+        fresh.path,
+        fresh.size,
+        fresh.format,
+        offset=state["offset"],
+        stats=ImportStats(**state["stats"]),
+    )
+
+
+def _save_checkpoint(path: str, checkpoint: _Checkpoint) -> None:
+    state = {"version": CHECKPOINT_VERSION, **asdict(checkpoint)}
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump(state, handle)
+    os.replace(temporary, path)
@@ -0,0 +1,22 @@
+from collections.abc import Iterator
+from typing import Any
+
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """Expose a newline-delimited JSON body as a lazy iterator of raw lines.
+
+    Lines are read from the request stream only as the view consumes them,
+    so arbitrarily large uploads never have to be buffered in memory.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(
+        self,
+        stream: Any,
+        media_type: str | None = None,
+        parser_context: dict[str, Any] | None = None,
+    ) -> Iterator[bytes]:
+        return iter(stream.readline, b"")
@@ -0,0 +1,84 @@
+"""Fast-path rendering of ``FoodItemCompactSerializer`` output.
+
+Hot list responses (typeahead, the nutrition day log) render dozens of compact
+foods per request, and once their queries are cheap the ``ModelSerializer``
+machinery dominates: field binding, a ``SerializerMethodField`` dispatch per
+image URL and ``images_ok`` evaluated twice per row. ``CompactFoodRenderer``
+builds the same dicts straight from ``FoodRow`` tuples
+(``foods.search.FOOD_ROW_FIELDS``), with every per-request lookup done once.
+The serializer stays the documented schema and the reference the renderer is
+tested against.
+"""
+
+from collections.abc import Iterable
+from datetime import datetime, tzinfo
+from decimal import Decimal
+from typing import Any
+
+from foods.models import FoodItem
+from foods.search import FoodRow
+
+CENT = Decimal("0.01")
+
+
+def decimal_string(value: Decimal) -> str:
+    """DRF's ``DecimalField(decimal_places=2)`` representation of ``value``."""
+    return f"{value.quantize(CENT):f}"
+
+
+def datetime_string(value: datetime | None, zone: tzinfo) -> str | None:
+    """DRF's ISO 8601 ``DateTimeField`` representation of an aware ``value``
+    in ``zone`` (normally ``timezone.get_current_timezone()``)."""
+    if not value:
+        return None
+    text = value.astimezone(zone).isoformat()
+    if text.endswith("+00:00"):
+        text = text[:-6] + "Z"
+    return text
+
+
+class CompactFoodRenderer:
+    """Render ``FoodRow`` tuples exactly like ``FoodItemCompactSerializer``."""
+
+    def __init__(self, request: Any | None = None) -> None:
+        self._small_url = FoodItem._meta.get_field("image_small").storage.url
+        self._small_webp_url = FoodItem._meta.get_field("image_small_webp").storage.url
+        self._absolute = request.build_absolute_uri if request is not None else None
+
+    def render(self, row: FoodRow) -> dict[str, Any]:
+        (
+            item_id,
+            name,
+            _search_text,
+            barcode,
+            brands,
+            kcal,
+            image_url,
+            image_large,
+            image_small,
+            image_small_webp,
+            image_status,
+        ) = row
+        small_url = small_webp_url = None
+        # ``images_ok``, evaluated once for both URLs.
+        if image_large and image_small and image_status == FoodItem.IMAGE_STATUS_OK:
+            small_url = self._url(self._small_url(image_small))
+            if image_small_webp:
+                small_webp_url = self._url(self._small_webp_url(image_small_webp))
+        return {
+            "id": item_id,
+            "name": name,
+            "brands": brands,
+            "kcal_100g": None if kcal is None else decimal_string(kcal),
+            "image_url": small_url or (image_url.strip() if image_url else "") or None,
+            "image_small_url": small_url,
+            "image_small_webp_url": small_webp_url,
+            "barcode": barcode,
+        }
+
+    def render_many(self, rows: Iterable[FoodRow]) -> list[dict[str, Any]]:
+        render = self.render
+        return [render(row) for row in rows]
+
+    def _url(self, url: str) -> str:
+        return url if self._absolute is None else self._absolute(url)
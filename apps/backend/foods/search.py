@@ -0,0 +1,164 @@
+import heapq
+from collections.abc import Iterable
+from decimal import Decimal
+from typing import Any
+
+from django.db import connection
+from django.db.models import Case, F, IntegerField, QuerySet, Value, When
+from django.db.models.functions import Collate
+
+from foods.models import FoodItem, normalize_search_text
+
+MATCH_RANK_PREFIX = 0
+MATCH_RANK_WORD = 1
+MATCH_RANK_SUBSTRING = 2
+
+# Compact snapshot of the columns a typeahead response needs, used by the
+# in-process index and the result cache.
+FOOD_ROW_FIELDS = (
+    "id",
+    "name",
+    "search_text",
+    "barcode",
+    "brands",
+    "kcal_100g",
+    "image_url",
+    "image_large",
+    "image_small",
+    "image_small_webp",
+    "image_status",
+)
+# Bumped whenever FOOD_ROW_FIELDS changes so cached rows are never misread.
+FOOD_ROW_VERSION = 2
+FoodRow = tuple[
+    int,
+    str,
+    str,
+    str,
+    str,
+    Decimal | None,
+    str,
+    str | None,
+    str | None,
+    str | None,
+    str,
+]
+
+
+def search_food_items(query: str, limit: int) -> QuerySet[FoodItem]:
+    """Rank catalog matches for ``query``: prefix, then word start, then substring.
+
+    Filtering runs against the normalized ``search_text`` column, which is
+    covered by a trigram GIN index on Postgres; other backends fall back to a
+    plain ``LIKE`` scan with the same ranking. Names tie-break by code point,
+    like the in-process index and the result cache do in Python, rather than
+    by the database collation.
+    """
+    term = normalize_search_text(query)
+    if not term:
+        return FoodItem.objects.none()
+    return (
+        FoodItem.objects.light()
+        .filter(search_text__contains=term)
+        .annotate(
+            match_rank=Case(
+                When(search_text__startswith=term, then=Value(MATCH_RANK_PREFIX)),
+                When(search_text__contains=f" {term}", then=Value(MATCH_RANK_WORD)),
+                default=Value(MATCH_RANK_SUBSTRING),
+                output_field=IntegerField(),
+            )
+        )
+        .order_by("match_rank", _code_point_order("name"), "id")[:limit]
+    )
+
+
+def _code_point_order(field: str) -> F | Collate:
+    # SQLite compares text bytewise already; Postgres' "C" collation does too.
+    if connection.vendor == "postgresql":
+        return Collate(F(field), "C")
+    return F(field)
+
+
+def food_row(values: tuple[Any, ...]) -> FoodRow:
+    """Build a row from ``values_list(*FOOD_ROW_FIELDS)`` output."""
+    (
+        item_id,
+        name,
+        search_text,
+        barcode,
+        brands,
+        kcal,
+        image_url,
+        image_large,
+        image_small,
+        image_small_webp,
+        image_status,
+    ) = values
+    return (
+        item_id,
+        name,
+        search_text,
+        barcode,
+        brands,
+        kcal,
+        image_url,
+        image_large or None,
+        image_small or None,
+        image_small_webp or None,
+        image_status,
+    )
+
+
+def food_row_from_item(item: FoodItem) -> FoodRow:
+    return food_row(
+        (
+            item.id,
+            item.name,
+            item.search_text,
+            item.barcode,
+            item.brands,
+            item.kcal_100g,
+            item.image_url,
+            item.image_large.name if item.image_large else None,
+            item.image_small.name if item.image_small else None,
+            item.image_small_webp.name if item.image_small_webp else None,
+            item.image_status,
+        )
+    )
+
+
+def food_item_from_row(row: FoodRow) -> FoodItem:
+    """Rebuild an unsaved ``FoodItem`` that serializes like the stored one."""
+    return FoodItem(
+        id=row[0],
+        name=row[1],
+        search_text=row[2],
+        barcode=row[3],
+        brands=row[4],
+        kcal_100g=row[5],
+        image_url=row[6],
+        image_large=row[7],
+        image_small=row[8],
+        image_small_webp=row[9],
+        image_status=row[10],
+    )
+
+
+def match_rank(text: str, term: str) -> int | None:
+    """Python mirror of the ``match_rank`` annotation in ``search_food_items``."""
+    if text.startswith(term):
+        return MATCH_RANK_PREFIX
+    if f" {term}" in text:
+        return MATCH_RANK_WORD
+    if term in text:
+        return MATCH_RANK_SUBSTRING
+    return None
+
+
+def rank_food_rows(rows: Iterable[FoodRow], term: str, limit: int) -> list[FoodRow]:
+    ranked = []
+    for row in rows:
+        rank = match_rank(row[2], term)
+        if rank is not None:
+            ranked.append((rank, row[1], row[0], row))
+    return [hit[3] for hit in heapq.nsmallest(limit, ranked)]
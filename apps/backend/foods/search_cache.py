@@ -0,0 +1,145 @@
+"""Versioned typeahead result cache with prefix refinement.
+
+Entries live in the default Django cache under a catalog version that is
+bumped on every food write, so stale pages simply stop being addressed.
+
+When the database reports at most ``FOODS_TYPEAHEAD_CACHE_CANDIDATES`` matches
+for a term, the full ranked candidate set is cached. Any longer query that
+extends a cached term (typing "chi", "chic", "chick") can only match a subset
+of those candidates, so it is answered by filtering and re-ranking them in
+memory. Larger result sets are cached as a single ``(term, limit)`` page.
+
+The version is only bumped in the process that wrote, so the cache is
+bypassed unless the default cache is shared between processes (see
+``config.caches``).
+"""
+
+import hashlib
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from config.caches import default_cache_is_shared
+from foods.models import FoodItem, normalize_search_text
+from foods.search import (
+    FOOD_ROW_FIELDS,
+    FOOD_ROW_VERSION,
+    FoodRow,
+    food_item_from_row,
+    food_row,
+    rank_food_rows,
+    search_food_items,
+)
+
+KEY_PREFIX = f"foods:typeahead:r{FOOD_ROW_VERSION}"
+VERSION_KEY = f"{KEY_PREFIX}:version"
+
+
+@dataclass
+class TypeaheadCacheStats:
+    hits: int = 0
+    refinements: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+
+class TypeaheadCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats = TypeaheadCacheStats()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return asdict(self._stats)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = TypeaheadCacheStats()
+
+    def invalidate(self) -> None:
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, time.time_ns(), None)
+        self._count("invalidations")
+
+    def search(self, query: str, limit: int) -> list[FoodItem]:
+        return [food_item_from_row(row) for row in self.search_rows(query, limit)]
+
+    def search_rows(self, query: str, limit: int) -> list[FoodRow]:
+        """``search`` as ``FoodRow`` tuples, for ``foods.rendering``."""
+        term = normalize_search_text(query)
+        if not term:
+            return []
+        if not default_cache_is_shared():
+            self._count("misses")
+            return self._query(term, limit)
+        version = self._version()
+        candidate_keys = {
+            self._key(version, term[:size]): size for size in range(len(term), 0, -1)
+        }
+        page_key = self._key(version, term, limit)
+        found = cache.get_many([page_key, *candidate_keys])
+
+        rows: list[FoodRow] | None = found.get(page_key)
+        if rows is not None:
+            self._count("hits")
+            return rows
+
+        for key, size in candidate_keys.items():
+            candidates = found.get(key)
+            if candidates is None:
+                continue
+            rows = rank_food_rows(candidates, term, limit)
+            if size == len(term):
+                self._count("hits")
+            else:
+                self._count("refinements")
+                refined = rank_food_rows(candidates, term, len(candidates))
+                self._set(self._key(version, term), refined)
+            return rows
+
+        self._count("misses")
+        max_candidates = getattr(settings, "FOODS_TYPEAHEAD_CACHE_CANDIDATES", 200)
+        rows = self._query(term, max(limit, max_candidates + 1))
+        if len(rows) <= max_candidates:
+            self._set(self._key(version, term), rows)
+        else:
+            rows = rows[:limit]
+            self._set(page_key, rows)
+        return rows[:limit]
+
+    @staticmethod
+    def _query(term: str, limit: int) -> list[FoodRow]:
+        return [
+            food_row(values)
+            for values in search_food_items(term, limit).values_list(*FOOD_ROW_FIELDS)
+        ]
+
+    def _version(self) -> int:
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            version = time.time_ns()
+            if not cache.add(VERSION_KEY, version, None):
+                version = cache.get(VERSION_KEY, version)
+        return version
+
+    @staticmethod
+    def _key(version: int, term: str, limit: int | None = None) -> str:
+        digest = hashlib.sha1(term.encode()).hexdigest()
+        suffix = "all" if limit is None else str(limit)
+        return f"{KEY_PREFIX}:{version}:{digest}:{suffix}"
+
+    @staticmethod
+    def _set(key: str, rows: list[FoodRow]) -> None:
+        cache.set(key, rows, getattr(settings, "FOODS_TYPEAHEAD_CACHE_TTL", 300))
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self._stats, counter, getattr(self._stats, counter) + 1)
+
+
+typeahead_cache = TypeaheadCache()
@@ -0,0 +1,369 @@
+"""In-process typeahead index over ``FoodItem.search_text``.
+
+Each worker keeps trigram and word-prefix posting lists (``array("I")`` of
+slot numbers) plus one compact row tuple per food, so a typeahead request can
+be answered without a database round trip. Results use the same ranking as
+``foods.search.search_food_items``; whenever the index cannot guarantee an
+identical answer (cold, still warming, or a short query whose page would need
+substring matches) ``search`` returns ``None`` and the caller queries the DB.
+
+Slots are assigned in ``(name, id)`` order when the index is warmed, which lets
+scans stop as soon as a full page of prefix matches is found. Names compare by
+code point, which is what ``search_food_items`` orders by on every backend.
+Items written afterwards are appended to an unsorted tail and their old slot
+is tombstoned, as are deleted items. Every ``FOODS_TYPEAHEAD_INDEX_REFRESH_SECONDS``
+a background refresh pulls rows other workers changed, drops items deleted
+elsewhere, and re-sorts the index in memory once the tail or the tombstones
+outgrow ``COMPACT_MIN_ROWS`` or ``COMPACT_RATIO`` of the sorted rows.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from foods.models import FoodItem, normalize_search_text
+from foods.search import (
+    FOOD_ROW_FIELDS,
+    MATCH_RANK_PREFIX,
+    MATCH_RANK_SUBSTRING,
+    MATCH_RANK_WORD,
+    FoodRow,
+    food_item_from_row,
+    food_row,
+    food_row_from_item,
+    match_rank,
+)
+
+logger = logging.getLogger(__name__)
+
+GRAM_SIZE = 3
+WARM_CHUNK_SIZE = 5000
+COMPACT_MIN_ROWS = 1000
+COMPACT_RATIO = 0.1
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i : i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _prefixes(text: str) -> set[str]:
+    return {text[:size] for size in range(1, GRAM_SIZE + 1) if len(text) >= size}
+
+
+def _word_prefixes(text: str) -> set[str]:
+    prefixes: set[str] = set()
+    for word in text.split():
+        prefixes.update(_prefixes(word))
+    return prefixes
+
+
+@dataclass
+class _IndexState:
+    rows: list[FoodRow | None] = field(default_factory=list)
+    slots_by_id: dict[int, int] = field(default_factory=dict)
+    starts: dict[str, array] = field(default_factory=dict)
+    words: dict[str, array] = field(default_factory=dict)
+    grams: dict[str, array] = field(default_factory=dict)
+    sorted_count: int = 0
+    tombstones: int = 0
+    # Ids removed since the state was built, replayed onto a compacted copy.
+    removed: list[int] = field(default_factory=list)
+    watermark: datetime | None = None
+
+    @classmethod
+    def build(cls, rows: list[FoodRow], watermark: datetime | None) -> _IndexState:
+        rows.sort(key=lambda row: (row[1], row[0]))
+        state = cls(watermark=watermark)
+        for row in rows:
+            state.add(row)
+        state.sorted_count = len(state.rows)
+        return state
+
+    @property
+    def needs_compaction(self) -> bool:
+        limit = max(COMPACT_MIN_ROWS, int(self.sorted_count * COMPACT_RATIO))
+        tail = len(self.rows) - self.sorted_count
+        return tail > limit or self.tombstones > limit
+
+    def add(self, row: FoodRow) -> None:
+        previous = self.slots_by_id.get(row[0])
+        if previous is not None:
+            self.rows[previous] = None
+            self.tombstones += 1
+        slot = len(self.rows)
+        self.rows.append(row)
+        self.slots_by_id[row[0]] = slot
+        for prefix in _prefixes(row[2]):
+            self.starts.setdefault(prefix, array("I")).append(slot)
+        for prefix in _word_prefixes(row[2]):
+            self.words.setdefault(prefix, array("I")).append(slot)
+        for gram in _grams(row[2]):
+            self.grams.setdefault(gram, array("I")).append(slot)
+
+    def remove(self, item_id: int) -> None:
+        slot = self.slots_by_id.pop(item_id, None)
+        if slot is None:
+            return
+        self.rows[slot] = None
+        self.tombstones += 1
+        self.removed.append(item_id)
+
+
+class TypeaheadIndex:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state: _IndexState | None = None
+        self._warming = False
+        self._refreshing = False
+        self._last_refresh = 0.0
+
+    @property
+    def is_ready(self) -> bool:
+        return self._state is not None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = None
+            self._warming = False
+            self._refreshing = False
+            self._last_refresh = 0.0
+
+    def warm(self) -> None:
+        """Load the whole catalog and atomically replace the current state."""
+        started_at = timezone.now()
+        started = time.perf_counter()
+        rows = [
+            food_row(values)
+            for values in FoodItem.objects.values_list(*FOOD_ROW_FIELDS).iterator(
+                chunk_size=WARM_CHUNK_SIZE
+            )
+        ]
+        state = _IndexState.build(rows, started_at)
+        with self._lock:
+            self._state = state
+            self._warming = False
+            self._last_refresh = time.monotonic()
+        logger.info(
+            "typeahead index warmed with %d items in %.2fs",
+            len(rows),
+            time.perf_counter() - started,
+        )
+
+    def start_warming(self) -> None:
+        with self._lock:
+            if self._state is not None or self._warming:
+                return
+            self._warming = True
+        threading.Thread(
+            target=self._warm_in_background, name="typeahead-index-warm", daemon=True
+        ).start()
+
+    def _warm_in_background(self) -> None:
+        try:
+            self.warm()
+        except Exception:
+            logger.exception("typeahead index warm failed")
+            with self._lock:
+                self._warming = False
+        finally:
+            connection.close()
+
+    def upsert(self, items: Iterable[FoodItem]) -> None:
+        with self._lock:
+            if self._state is None:
+                return
+            for item in items:
+                self._state.add(food_row_from_item(item))
+
+    def remove(self, item_ids: Iterable[int]) -> None:
+        with self._lock:
+            if self._state is None:
+                return
+            for item_id in item_ids:
+                self._state.remove(item_id)
+
+    def start_refreshing(self) -> None:
+        with self._lock:
+            if self._state is None or self._refreshing:
+                return
+            self._refreshing = True
+            self._last_refresh = time.monotonic()
+        threading.Thread(
+            target=self._refresh_in_background,
+            name="typeahead-index-refresh",
+            daemon=True,
+        ).start()
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("typeahead index refresh failed")
+        finally:
+            with self._lock:
+                self._refreshing = False
+            connection.close()
+
+    def refresh(self) -> None:
+        """Catch up with writes made elsewhere (e.g. by other workers), then
+        compact the index if it has drifted far from its sorted layout."""
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            self._last_refresh = time.monotonic()
+        refreshed_at = timezone.now()
+        changed = [
+            food_row(values)
+            for values in FoodItem.objects.filter(
+                updated_at__gte=state.watermark
+            ).values_list(*FOOD_ROW_FIELDS)
+        ]
+        with self._lock:
+            if self._state is not state:
+                return
+            for row in changed:
+                state.add(row)
+            state.watermark = refreshed_at
+            indexed = len(state.slots_by_id)
+        # Rows inserted since the query above only make the database count
+        # larger; a smaller count means items were deleted by another process.
+        if FoodItem.objects.count() < indexed:
+            live = set(FoodItem.objects.values_list("id", flat=True).iterator())
+            with self._lock:
+                if self._state is not state:
+                    return
+                for item_id in [i for i in state.slots_by_id if i not in live]:
+                    state.remove(item_id)
+        self._compact(state)
+
+    def _compact(self, state: _IndexState) -> None:
+        """Rebuild ``state`` sorted and without tombstones. The rebuild runs
+        outside the lock; writes that land meanwhile are replayed onto it."""
+        with self._lock:
+            if self._state is not state or not state.needs_compaction:
+                return
+            rows = [row for row in state.rows if row is not None]
+            rows_seen, removed_seen = len(state.rows), len(state.removed)
+        compacted = _IndexState.build(rows, state.watermark)
+        with self._lock:
+            if self._state is not state:
+                return
+            for row in state.rows[rows_seen:]:
+                if row is not None:
+                    compacted.add(row)
+            for item_id in state.removed[removed_seen:]:
+                compacted.remove(item_id)
+            compacted.watermark = state.watermark
+            self._state = compacted
+        logger.info("typeahead index compacted to %d items", compacted.sorted_count)
+
+    def search(self, query: str, limit: int) -> list[FoodItem] | None:
+        rows = self.search_rows(query, limit)
+        if rows is None:
+            return None
+        return [food_item_from_row(row) for row in rows]
+
+    def search_rows(self, query: str, limit: int) -> list[FoodRow] | None:
+        """``search`` as ``FoodRow`` tuples, for ``foods.rendering``."""
+        if not getattr(settings, "FOODS_TYPEAHEAD_INDEX_ENABLED", False):
+            return None
+        if self._state is None:
+            self.start_warming()
+            return None
+        refresh_seconds = getattr(settings, "FOODS_TYPEAHEAD_INDEX_REFRESH_SECONDS", 30)
+        if time.monotonic() - self._last_refresh >= refresh_seconds:
+            self.start_refreshing()
+        term = normalize_search_text(query)
+        if not term:
+            return []
+        with self._lock:
+            state = self._state
+            if state is None:
+                return None
+            return self._ranked_rows(state, term, limit)
+
+    def _ranked_rows(
+        self, state: _IndexState, term: str, limit: int
+    ) -> list[FoodRow] | None:
+        complete = len(term) >= GRAM_SIZE
+        gram_postings: list[array] = []
+        if complete:
+            for gram in _grams(term):
+                posting = state.grams.get(gram)
+                if posting is None:
+                    return []
+                gram_postings.append(posting)
+
+        # Every posting below is a superset of that rank's matches; scan the
+        # shortest one.
+        # Word prefixes never span a space: a term like "7 up" starts a word
+        # wherever its first token ("7") does.
+        first_word = term.split()[0] if term.split() else term
+        stages: list[tuple[int, array]] = []
+        for rank, prefix_postings, key in (
+            (MATCH_RANK_PREFIX, state.starts, term[:GRAM_SIZE]),
+            (MATCH_RANK_WORD, state.words, first_word[:GRAM_SIZE]),
+        ):
+            posting = prefix_postings.get(key)
+            if posting is not None:
+                stages.append((rank, min([posting, *gram_postings], key=len)))
+        if gram_postings:
+            stages.append((MATCH_RANK_SUBSTRING, min(gram_postings, key=len)))
+
+        hits: list[tuple[int, FoodRow]] = []
+        sorted_hits = 0
+        for rank, candidates in stages:
+            found = self._scan(state, candidates, term, rank, limit - sorted_hits)
+            sorted_hits += found[0]
+            hits.extend(found[1])
+            if sorted_hits >= limit:
+                break
+
+        if not complete and len(hits) < limit:
+            # Short queries only index prefixes; substring matches would be
+            # needed to fill the page, so let the database answer.
+            return None
+        page = heapq.nsmallest(
+            limit, hits, key=lambda hit: (hit[0], hit[1][1], hit[1][0])
+        )
+        return [row for _, row in page]
+
+    @staticmethod
+    def _scan(
+        state: _IndexState, candidates: array, term: str, rank: int, needed: int
+    ) -> tuple[int, list[tuple[int, FoodRow]]]:
+        """Collect ``rank`` matches: up to ``needed`` from the sorted region
+        (they come out in name order) plus every match from the unsorted tail."""
+        hits: list[tuple[int, FoodRow]] = []
+        split = bisect_left(candidates, state.sorted_count)
+        sorted_hits = 0
+        if needed > 0:
+            for slot in islice(candidates, split):
+                row = state.rows[slot]
+                if row is not None and match_rank(row[2], term) == rank:
+                    hits.append((rank, row))
+                    sorted_hits += 1
+                    if sorted_hits >= needed:
+                        break
+        for slot in islice(candidates, split, None):
+            row = state.rows[slot]
+            if row is not None and match_rank(row[2], term) == rank:
+                hits.append((rank, row))
+        return sorted_hits, hits
+
+
+typeahead_index = TypeaheadIndex()
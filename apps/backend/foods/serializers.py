@@ -1,15 +1,27 @@
+from collections.abc import Iterable
 from typing import Any
 
 from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
 
-from foods.models import FoodItem
+from config.renderers import PreEncodedJSON
 from foods.images import images_ok
+from foods.models import FoodItem
+from foods.search_cache import typeahead_cache
+from foods.search_index import typeahead_index
+from foods.signals import food_macros_changed
+
+
+BARCODE_CONFLICT_MESSAGE = "Barcode already belongs to another food item."
+INGEST_RESULT_STATUS_CHOICES = ["created", "updated", "error"]
+CHECK_BATCH_MAX_ITEMS = 500
 
 
 class FoodItemCompactSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
     image_small_url = serializers.SerializerMethodField()
+    image_small_webp_url = serializers.SerializerMethodField()
 
     class Meta:
         model = FoodItem
@@ -20,6 +32,7 @@ class FoodItemCompactSerializer(serializers.ModelSerializer):
             "kcal_100g",
             "image_url",
             "image_small_url",
+            "image_small_webp_url",
             "barcode",
         )
 
@@ -35,11 +48,30 @@ class FoodItemCompactSerializer(serializers.ModelSerializer):
             return None
         return _absolute_file_url(self.context.get("request"), obj.image_small)
 
+    def get_image_small_webp_url(self, obj: FoodItem) -> str | None:
+        if not images_ok(obj) or not obj.image_small_webp:
+            return None
+        return _absolute_file_url(self.context.get("request"), obj.image_small_webp)
+
+
+class SourceDocumentField(serializers.JSONField):
+    """Read-only ``raw_source_json`` handed to the renderer still encoded when
+    it comes straight from the stored document."""
+
+    def get_attribute(self, instance: FoodItem) -> Any:
+        encoded = instance.raw_source_json_encoded()
+        if encoded is None:
+            return super().get_attribute(instance)
+        return PreEncodedJSON(encoded)
+
 
 class FoodItemSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
     image_large_url = serializers.SerializerMethodField()
     image_small_url = serializers.SerializerMethodField()
+    image_large_webp_url = serializers.SerializerMethodField()
+    image_small_webp_url = serializers.SerializerMethodField()
+    raw_source_json = SourceDocumentField(read_only=True)
 
     class Meta:
         model = FoodItem
@@ -53,6 +85,8 @@ class FoodItemSerializer(serializers.ModelSerializer):
             "image_url",
             "image_large_url",
             "image_small_url",
+            "image_large_webp_url",
+            "image_small_webp_url",
             "kcal_100g",
             "protein_g_100g",
             "carbs_g_100g",
@@ -67,6 +101,13 @@ class FoodItemSerializer(serializers.ModelSerializer):
             "nutriments_json",
         )
 
+    def __init__(self, *args: Any, fields: Iterable[str] | None = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            # Sparse fieldset: drop everything the caller did not ask for.
+            for name in set(self.fields).difference(fields):
+                self.fields.pop(name)
+
     def get_image_url(self, obj: FoodItem) -> str | None:
         small_url = self.get_image_small_url(obj)
         if small_url:
@@ -84,6 +125,16 @@ class FoodItemSerializer(serializers.ModelSerializer):
             return None
         return _absolute_file_url(self.context.get("request"), obj.image_small)
 
+    def get_image_large_webp_url(self, obj: FoodItem) -> str | None:
+        if not images_ok(obj) or not obj.image_large_webp:
+            return None
+        return _absolute_file_url(self.context.get("request"), obj.image_large_webp)
+
+    def get_image_small_webp_url(self, obj: FoodItem) -> str | None:
+        if not images_ok(obj) or not obj.image_small_webp:
+            return None
+        return _absolute_file_url(self.context.get("request"), obj.image_small_webp)
+
 
 def _absolute_file_url(request: Any | None, field: Any) -> str:
     url = field.url
@@ -140,12 +191,13 @@ class FoodItemIngestSerializer(serializers.Serializer):
     incoming_image_large_url: str | None = None
     incoming_image_small_url: str | None = None
     image_signature_changed: bool = False
+    created: bool = False
 
-    def save(self, **kwargs: Any) -> FoodItem:
-        data = dict(self.validated_data)
-        source = data["source"]
-        external_id = data["external_id"]
-        barcode = data["barcode"]
+    def get_item_fields(
+        self, validated_data: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        """Map the validated payload onto ``FoodItem`` field values."""
+        data = dict(self.validated_data if validated_data is None else validated_data)
         large_url = data.pop("image_large_url", None)
         small_url = data.pop("image_small_url", None)
         if isinstance(large_url, str) and large_url.strip():
@@ -171,13 +223,31 @@ class FoodItemIngestSerializer(serializers.Serializer):
                 data["content_hash"] = incoming_hash
             else:
                 data.pop("content_hash", None)
+        return data
 
+    def save(self, **kwargs: Any) -> FoodItem:
+        data = self.get_item_fields()
+        source = data["source"]
+        external_id = data["external_id"]
+        barcode = data["barcode"]
         previous_signature: str | None = None
         item: FoodItem | None = None
 
-        def apply_changes(target: FoodItem) -> None:
+        unchanged = self._unchanged_item(data)
+        if unchanged is not None:
+            # Re-ingest of the stored content: nothing to write or lock.
+            self.created = False
+            self.image_signature_changed = False
+            return unchanged
+
+        def apply_changes(target: FoodItem) -> list[str]:
+            changed = []
             for field, value in data.items():
-                setattr(target, field, value)
+                # Comparing the source document would mean loading it.
+                if field == "raw_source_json" or getattr(target, field) != value:
+                    setattr(target, field, value)
+                    changed.append(field)
+            return changed
 
         def resolve_and_save(lock: bool) -> FoodItem:
             queryset = FoodItem.objects.all()
@@ -189,16 +259,20 @@ class FoodItemIngestSerializer(serializers.Serializer):
             ).first()
 
             if by_barcode and by_external and by_barcode.id != by_external.id:
-                raise serializers.ValidationError(
-                    {"barcode": "Barcode already belongs to another food item."}
-                )
+                raise serializers.ValidationError({"barcode": BARCODE_CONFLICT_MESSAGE})
 
             candidate = by_barcode or by_external
             nonlocal previous_signature
             previous_signature = candidate.image_signature if candidate else None
+            self.created = candidate is None
             if candidate:
-                apply_changes(candidate)
-                candidate.save()
+                previous_macros = candidate.macros()
+                changed = apply_changes(candidate)
+                candidate.save(update_fields=[*changed, "updated_at"])
+                if candidate.macros() != previous_macros:
+                    food_macros_changed.send(
+                        sender=FoodItem, food_item_ids=[candidate.id]
+                    )
                 return candidate
             return FoodItem.objects.create(**data)
 
@@ -212,6 +286,41 @@ class FoodItemIngestSerializer(serializers.Serializer):
         self.image_signature_changed = bool(self.incoming_image_signature) and (
             self.incoming_image_signature != (previous_signature or "")
         )
+        typeahead_index.upsert([item])
+        typeahead_cache.invalidate()
+        return item
+
+    def _unchanged_item(self, data: dict[str, Any]) -> FoodItem | None:
+        """The stored item when it already holds this payload's
+        ``content_hash`` and image signature under the same keys, found with
+        one unlocked query."""
+        content_hash = data.get("content_hash")
+        if not content_hash:
+            return None
+        matches = list(
+            FoodItem.objects.filter(
+                Q(barcode=data["barcode"])
+                | Q(source=data["source"], external_id=data["external_id"])
+            )[:2]
+        )
+        if len(matches) != 1:
+            return None
+        item = matches[0]
+        signature = data.get("image_signature", item.image_signature)
+        if (
+            item.barcode,
+            item.source,
+            item.external_id,
+            item.content_hash,
+            item.image_signature,
+        ) != (
+            data["barcode"],
+            data["source"],
+            data["external_id"],
+            content_hash,
+            signature,
+        ):
+            return None
         return item
 
 
@@ -229,3 +338,32 @@ class FoodItemCheckResponseSerializer(serializers.Serializer):
     up_to_date = serializers.BooleanField()
     food_item_id = serializers.IntegerField(allow_null=True)
     images_ok = serializers.BooleanField()
+
+
+class FoodItemCheckBatchSerializer(serializers.Serializer):
+    items = FoodItemCheckSerializer(
+        many=True, allow_empty=False, max_length=CHECK_BATCH_MAX_ITEMS
+    )
+
+
+class FoodItemCheckBatchResultSerializer(FoodItemCheckResponseSerializer):
+    source = serializers.CharField()
+    external_id = serializers.CharField()
+
+
+class FoodItemCheckBatchResponseSerializer(serializers.Serializer):
+    results = FoodItemCheckBatchResultSerializer(many=True)
+
+
+class FoodIngestBatchResultSerializer(serializers.Serializer):
+    line = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=INGEST_RESULT_STATUS_CHOICES)
+    food_item_id = serializers.IntegerField(required=False, allow_null=True)
+    errors = serializers.DictField(required=False)
+
+
+class TypeaheadCacheStatsSerializer(serializers.Serializer):
+    hits = serializers.IntegerField()
+    refinements = serializers.IntegerField()
+    misses = serializers.IntegerField()
+    invalidations = serializers.IntegerField()
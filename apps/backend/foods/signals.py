@@ -0,0 +1,43 @@
+from typing import Any
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import Signal, receiver
+
+from foods.blobs import release_blob
+from foods.images import IMAGE_VARIANTS
+from foods.models import FoodItem
+from foods.search_cache import typeahead_cache
+from foods.search_index import typeahead_index
+
+
+@receiver(post_delete, sender=FoodItem)
+def release_food_item_images(
+    sender: type[FoodItem], instance: FoodItem, **kwargs: Any
+) -> None:
+    for variant in IMAGE_VARIANTS:
+        release_blob(getattr(instance, f"image_{variant}_blob_id"))
+
+
+@receiver(post_delete, sender=FoodItem)
+def remove_food_item_from_index(
+    sender: type[FoodItem], instance: FoodItem, **kwargs: Any
+) -> None:
+    # Other workers drop it from their index on their next refresh.
+    item_id = instance.pk
+
+    def forget() -> None:
+        typeahead_index.remove([item_id])
+        typeahead_cache.invalidate()
+
+    transaction.on_commit(forget)
+
+
+# Sent with ``food_item_ids`` after the per-100 g macros of existing items
+# change, so data derived from them (daily nutrition summaries) can refresh.
+food_macros_changed = Signal()
+
+# Sent with ``food_item_ids`` after a bulk write (which ``post_save`` does not
+# see) replaces columns of existing items, so data derived from how they
+# render (the nutrition day view's ETag) can refresh.
+food_items_changed = Signal()
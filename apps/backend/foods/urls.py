@@ -1,9 +1,22 @@
 from django.urls import path
 
-from foods.views import FoodCheckView, FoodIngestView, FoodTypeaheadView
+from foods.views import (
+    FoodCheckBatchView,
+    FoodCheckView,
+    FoodDetailView,
+    FoodIngestBatchView,
+    FoodIngestView,
+    FoodTypeaheadCacheStatsView,
+    FoodTypeaheadView,
+)
 
 urlpatterns = [
+    path("<int:pk>", FoodDetailView.as_view()),
+    path("barcode/<str:barcode>", FoodDetailView.as_view()),
     path("typeahead", FoodTypeaheadView.as_view()),
+    path("typeahead/cache-stats", FoodTypeaheadCacheStatsView.as_view()),
     path("ingest", FoodIngestView.as_view()),
+    path("ingest/batch", FoodIngestBatchView.as_view()),
     path("check", FoodCheckView.as_view()),
+    path("check/batch", FoodCheckBatchView.as_view()),
 ]
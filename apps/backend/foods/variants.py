@@ -0,0 +1,99 @@
+"""Derive every stored image variant from one downloaded source image.
+
+Decoding and resizing are CPU bound, so ``render_variants`` runs in a process
+pool (``FOODS_IMAGE_PROCESS_WORKERS``; ``0`` renders inline). It only depends
+on Pillow so worker processes never need Django set up.
+"""
+
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from multiprocessing import get_context
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+SMALL_MAX_SIZE = 200
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+# Well below Pillow's decompression bomb limit; OFF images are a few MP.
+MAX_SOURCE_PIXELS = 40_000_000
+RENDER_TIMEOUT_SECONDS = 30
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def render_variants(image: str | bytes) -> dict[str, bytes]:
+    """Return the ``small`` JPEG and ``large_webp``/``small_webp`` renditions
+    of ``image``, a file path or the raw bytes."""
+    try:
+        with Image.open(
+            BytesIO(image) if isinstance(image, bytes) else image
+        ) as source:
+            if source.width * source.height > MAX_SOURCE_PIXELS:
+                raise ValueError("Image dimensions exceed limit.")
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except (OSError, Image.DecompressionBombError, SyntaxError) as exc:
+        raise ValueError(f"Invalid image: {exc}") from exc
+
+    has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+    image = image.convert("RGBA" if has_alpha else "RGB")
+    small = image.copy()
+    small.thumbnail((SMALL_MAX_SIZE, SMALL_MAX_SIZE), Image.Resampling.LANCZOS)
+    return {
+        "small": _encode(_without_alpha(small), "JPEG", quality=JPEG_QUALITY),
+        "large_webp": _encode(image, "WEBP", quality=WEBP_QUALITY),
+        "small_webp": _encode(small, "WEBP", quality=WEBP_QUALITY),
+    }
+
+
+def generate_variants(source_path: str) -> dict[str, bytes]:
+    """Render variants of a spooled download; workers read it from disk, so
+    the source bytes are never pickled across processes."""
+    workers = getattr(settings, "FOODS_IMAGE_PROCESS_WORKERS", 2)
+    if workers <= 0:
+        return render_variants(source_path)
+    pool = _get_pool(workers)
+    try:
+        return pool.submit(render_variants, source_path).result(
+            timeout=RENDER_TIMEOUT_SECONDS
+        )
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM killed); start a fresh pool next time.
+        _discard_pool(pool)
+        raise
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=get_context("spawn")
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _without_alpha(image: Image.Image) -> Image.Image:
+    if image.mode != "RGBA":
+        return image
+    background = Image.new("RGB", image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel("A"))
+    return background
+
+
+def _encode(image: Image.Image, image_format: str, **options: object) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format=image_format, **options)
+    return buffer.getvalue()
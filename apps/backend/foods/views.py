@@ -1,20 +1,48 @@
-from django.db.models import Q
+import json
+import logging
+from typing import Any
+
+from django.conf import settings
+from django.http import HttpResponseBase, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from foods.barcode import UpstreamError, lookup_barcode
+from foods.detail import (
+    ETAG_COLUMNS,
+    HEAVY_COLUMNS,
+    detail_columns,
+    food_etag,
+    parse_detail_fields,
+)
+from foods.freshness import CHECK_FIELDS, check_food_items, check_result
+from foods.image_jobs import ImageJobRequest, enqueue_image_jobs
+from foods.images import should_download_images
+from foods.ingest import ingest_ndjson
 from foods.models import FoodItem
-from foods.images import download_food_images, images_ok, should_download_images
+from foods.parsers import NDJSONParser
+from foods.rendering import CompactFoodRenderer
+from foods.search_cache import typeahead_cache
+from foods.search_index import typeahead_index
 from foods.serializers import (
+    FoodIngestBatchResultSerializer,
+    FoodItemCheckBatchResponseSerializer,
+    FoodItemCheckBatchSerializer,
     FoodItemCheckResponseSerializer,
     FoodItemCheckSerializer,
     FoodItemCompactSerializer,
     FoodItemIngestSerializer,
     FoodItemSerializer,
+    TypeaheadCacheStatsSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class FoodTypeaheadView(APIView):
     permission_classes = [IsAuthenticated]
@@ -51,17 +79,26 @@ class FoodTypeaheadView(APIView):
             limit = 10
         limit = max(1, min(limit, 50))
 
-        items = (
-            FoodItem.objects.filter(
-                Q(name__icontains=query) | Q(brands__icontains=query)
-            )
-            .order_by("name")
-            .distinct()[:limit]
-        )
-        serializer = FoodItemCompactSerializer(
-            items, many=True, context={"request": request}
-        )
-        return Response(serializer.data)
+        rows = typeahead_index.search_rows(query, limit)
+        if rows is None:
+            rows = typeahead_cache.search_rows(query, limit)
+        # Same output as FoodItemCompactSerializer(many=True), without its
+        # per-row field machinery.
+        return Response(CompactFoodRenderer(request).render_many(rows))
+
+
+class FoodTypeaheadCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(
+        responses={
+            200: TypeaheadCacheStatsSerializer,
+            401: OpenApiResponse(description="Unauthorized"),
+            403: OpenApiResponse(description="Forbidden"),
+        },
+    )
+    def get(self, request: Request) -> Response:
+        return Response(typeahead_cache.stats())
 
 
 class FoodIngestView(APIView):
@@ -80,16 +117,48 @@ class FoodIngestView(APIView):
         serializer.is_valid(raise_exception=True)
         item = serializer.save()
         if should_download_images(item, serializer.image_signature_changed):
-            download_food_images(
-                item,
-                serializer.incoming_image_large_url or item.image_large_source_url,
-                serializer.incoming_image_small_url or item.image_small_source_url,
-                serializer.incoming_image_signature or item.image_signature,
+            enqueue_image_jobs(
+                [
+                    ImageJobRequest(
+                        item,
+                        serializer.incoming_image_large_url
+                        or item.image_large_source_url,
+                        serializer.incoming_image_small_url
+                        or item.image_small_source_url,
+                        serializer.incoming_image_signature or item.image_signature,
+                    )
+                ]
             )
         output = FoodItemSerializer(item, context={"request": request})
         return Response(output.data)
 
 
+class FoodIngestBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [NDJSONParser]
+
+    @extend_schema(
+        request={NDJSONParser.media_type: FoodItemIngestSerializer},
+        responses={
+            (200, NDJSONParser.media_type): OpenApiResponse(
+                response=FoodIngestBatchResultSerializer,
+                description="One result per non-blank input line, streamed as NDJSON.",
+            ),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+        description=(
+            "Upsert food items from a newline-delimited JSON body, one "
+            "FoodItemIngest object per line. Image downloads are queued."
+        ),
+    )
+    def post(self, request: Request) -> StreamingHttpResponse:
+        results = ingest_ndjson(request.data)
+        return StreamingHttpResponse(
+            (json.dumps(result) + "\n" for result in results),
+            content_type=NDJSONParser.media_type,
+        )
+
+
 class FoodCheckView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -105,30 +174,105 @@ class FoodCheckView(APIView):
         serializer = FoodItemCheckSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
-        item = FoodItem.objects.filter(
-            source=data["source"], external_id=data["external_id"]
-        ).first()
-        if item is None:
-            return Response(
-                {
-                    "exists": False,
-                    "up_to_date": False,
-                    "food_item_id": None,
-                    "images_ok": False,
-                }
+        item = (
+            FoodItem.objects.filter(
+                source=data["source"], external_id=data["external_id"]
             )
-
-        images_ok_value = images_ok(item)
-        signature_matches = (item.image_signature or "") == (
-            data.get("image_signature") or ""
+            .only(*CHECK_FIELDS)
+            .first()
         )
-        hash_matches = (item.content_hash or "") == data["content_hash"]
-        up_to_date = hash_matches and signature_matches and images_ok_value
         return Response(
-            {
-                "exists": True,
-                "up_to_date": up_to_date,
-                "food_item_id": item.id,
-                "images_ok": images_ok_value,
-            }
+            check_result(item, data["content_hash"], data.get("image_signature"))
+        )
+
+
+class FoodCheckBatchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=FoodItemCheckBatchSerializer,
+        responses={
+            200: FoodItemCheckBatchResponseSerializer,
+            400: OpenApiResponse(description="Invalid payload"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+    )
+    def post(self, request: Request) -> Response:
+        serializer = FoodItemCheckBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(
+            {"results": check_food_items(serializer.validated_data["items"])}
+        )
+
+
+class FoodDetailView(APIView):
+    """Read one food item by ``pk`` or ``barcode``, optionally as a sparse
+    fieldset. Unknown barcodes are looked up upstream (``foods.barcode``)."""
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="fields",
+                required=False,
+                type=str,
+                description=(
+                    "Comma-separated FoodItem fields to return (default: all). "
+                    "raw_source_json and nutriments_json are only loaded when "
+                    "requested."
+                ),
+            ),
+        ],
+        responses={
+            200: FoodItemSerializer,
+            304: OpenApiResponse(description="Not modified (If-None-Match)"),
+            400: OpenApiResponse(description="Unknown field requested"),
+            401: OpenApiResponse(description="Unauthorized"),
+            404: OpenApiResponse(description="Not found"),
+            502: OpenApiResponse(description="Upstream product lookup failed"),
+        },
+    )
+    def get(self, request: Request, **lookup: Any) -> HttpResponseBase:
+        try:
+            fields = parse_detail_fields(request.query_params.get("fields"))
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        columns = detail_columns(fields)
+        queryset = FoodItem.objects.only(
+            *ETAG_COLUMNS, *columns.difference(HEAVY_COLUMNS)
+        )
+        item = queryset.filter(**lookup).first()
+        if item is None and "barcode" in lookup:
+            try:
+                item_id = lookup_barcode(lookup["barcode"])
+            except UpstreamError as exc:
+                logger.warning("barcode lookup %s failed: %s", lookup["barcode"], exc)
+                return Response(
+                    {"detail": "Product lookup is temporarily unavailable."},
+                    status=status.HTTP_502_BAD_GATEWAY,
+                )
+            if item_id is not None:
+                item = queryset.filter(pk=item_id).first()
+        if item is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        etag = food_etag(item, fields)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            heavy = [name for name in HEAVY_COLUMNS if name in columns]
+            if heavy:
+                item.refresh_from_db(fields=heavy)
+            serializer = FoodItemSerializer(
+                item, fields=fields, context={"request": request}
+            )
+            response = Response(serializer.data)
+        response["ETag"] = etag
+        # Authenticated responses: only the client may cache them; shared
+        # caches would hand them to anyone. The ETag still saves the body.
+        patch_cache_control(
+            response,
+            private=True,
+            max_age=getattr(settings, "FOODS_DETAIL_CACHE_SECONDS", 300),
         )
+        return response
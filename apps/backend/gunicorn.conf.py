@@ -0,0 +1,10 @@
+# Loaded automatically by gunicorn from the working directory (/app).
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+
+    if settings.FOODS_TYPEAHEAD_INDEX_ENABLED:
+        from foods.search_index import typeahead_index
+
+        typeahead_index.start_warming()
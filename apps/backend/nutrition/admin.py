@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from nutrition.models import MealEntry
+from nutrition.models import DailyNutritionSummary, MealEntry, MealEntryTombstone
 
 
 @admin.register(MealEntry)
@@ -8,3 +8,16 @@ class MealEntryAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "meal_type", "food_item", "quantity_g", "consumed_at")
     list_filter = ("meal_type",)
     search_fields = ("user__username", "food_item__name", "food_item__barcode")
+
+
+@admin.register(DailyNutritionSummary)
+class DailyNutritionSummaryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "date", "kcal", "entry_count", "version")
+    search_fields = ("user__username",)
+    readonly_fields = ("meals", "version", "updated_at")
+
+
+@admin.register(MealEntryTombstone)
+class MealEntryTombstoneAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "entry_id", "deleted_at")
+    search_fields = ("user__username",)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class NutritionConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "nutrition"
+
+    def ready(self) -> None:
+        from nutrition import signals  # noqa: F401
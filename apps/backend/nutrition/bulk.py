@@ -0,0 +1,102 @@
+"""Bulk meal entry creation for clients replaying an offline queue.
+
+Every entry carries a client-generated ``idempotency_key``; the unique
+``(user, idempotency_key)`` constraint makes a replay report the stored entry
+as a ``duplicate`` instead of logging it twice. Entries are validated one by
+one, their foods resolved with a single ``in_bulk`` query and the new rows
+written with one ``bulk_create``. ``bulk_create`` skips the model signals, so
+the daily summaries are updated here, in the same transaction.
+"""
+
+from typing import Any
+
+from django.contrib.auth.models import AbstractBaseUser
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from rest_framework.serializers import as_serializer_error
+
+from foods.models import FoodItem
+from nutrition.models import MealEntry
+from nutrition.serializers import MealEntryBulkItemSerializer
+from nutrition.summaries import apply_contributions, entry_contribution
+
+INSERT_ATTEMPTS = 2
+
+_Pending = tuple[dict[str, Any], dict[str, Any]]
+
+
+def create_meal_entries(
+    user: AbstractBaseUser, payloads: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """Create ``payloads`` for ``user``; return one result per payload, in order."""
+    validator = MealEntryBulkItemSerializer()
+    results: list[dict[str, Any]] = []
+    pending: list[_Pending] = []
+    for index, payload in enumerate(payloads):
+        key = payload.get("idempotency_key")
+        result = {
+            "index": index,
+            "idempotency_key": key if isinstance(key, str) else None,
+            "status": "error",
+            "entry_id": None,
+        }
+        results.append(result)
+        try:
+            fields = validator.run_validation(payload)
+        except serializers.ValidationError as exc:
+            result["errors"] = as_serializer_error(exc)
+            continue
+        pending.append((result, fields))
+
+    foods = FoodItem.objects.only("id", *FoodItem.MACRO_FIELDS).in_bulk(
+        {fields["food_item_id"] for _, fields in pending}
+    )
+    resolved: list[_Pending] = []
+    for result, fields in pending:
+        food_item = foods.get(fields.pop("food_item_id"))
+        if food_item is None:
+            result["errors"] = {"food_item_id": ["Food item does not exist."]}
+            continue
+        fields["food_item"] = food_item
+        resolved.append((result, fields))
+
+    if resolved:
+        for attempt in range(INSERT_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    _insert(user, resolved)
+                break
+            except IntegrityError:
+                # A concurrent replay stored one of the keys first; its entry
+                # is found as a duplicate on the next attempt.
+                if attempt == INSERT_ATTEMPTS - 1:
+                    raise
+    return results
+
+
+def _insert(user: AbstractBaseUser, resolved: list[_Pending]) -> None:
+    existing = dict(
+        MealEntry.objects.filter(
+            user=user,
+            idempotency_key__in=[fields["idempotency_key"] for _, fields in resolved],
+        ).values_list("idempotency_key", "id")
+    )
+    entries: dict[str, MealEntry] = {}
+    for _, fields in resolved:
+        key = fields["idempotency_key"]
+        if key not in existing and key not in entries:
+            entries[key] = MealEntry(user=user, **fields)
+    MealEntry.objects.bulk_create(entries.values())
+    apply_contributions(added=[entry_contribution(entry) for entry in entries.values()])
+
+    created: set[str] = set()
+    for result, fields in resolved:
+        key = fields["idempotency_key"]
+        if key in existing:
+            result.update(status="duplicate", entry_id=existing[key])
+        elif key in created:
+            # Repeated within this request: the first occurrence was stored.
+            result.update(status="duplicate", entry_id=entries[key].id)
+        else:
+            created.add(key)
+            result.update(status="created", entry_id=entries[key].id)
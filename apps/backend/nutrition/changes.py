@@ -0,0 +1,91 @@
+"""Change feed of a user's meal entries for incremental sync.
+
+Live entries are read in ``(updated_at, id)`` order and deletions from
+``MealEntryTombstone`` in ``(deleted_at, entry_id)`` order, each a keyset scan
+of a ``(user, timestamp, id)`` index. Both are merged into one page and the
+cursor encodes the ``(timestamp, id)`` of its last change.
+
+Changes younger than ``NUTRITION_CHANGES_SETTLE_SECONDS`` are held back: a
+transaction can commit after one that stamped a later ``updated_at``, and
+without the delay a client could move its cursor past a row it never saw.
+"""
+
+import base64
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from nutrition.models import MealEntry, MealEntryTombstone
+
+Cursor = tuple[datetime, int]
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    changed_at, entry_id = cursor
+    micros = (changed_at - _EPOCH) // timedelta(microseconds=1)
+    return base64.urlsafe_b64encode(f"{micros}:{entry_id}".encode()).decode()
+
+
+def decode_cursor(value: str) -> Cursor:
+    """Inverse of ``encode_cursor``; raises ``ValueError`` on garbage."""
+    try:
+        micros, entry_id = base64.urlsafe_b64decode(value.encode()).split(b":")
+        return _EPOCH + timedelta(microseconds=int(micros)), int(entry_id)
+    except (TypeError, ValueError, OverflowError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+
+
+@dataclass
+class ChangePage:
+    entries: list[MealEntry]
+    deleted: list[int]
+    cursor: Cursor | None
+    has_more: bool
+
+
+def entry_changes(user_id: int, since: Cursor | None, limit: int) -> ChangePage:
+    """Up to ``limit`` changes after ``since`` (everything live when ``None``)."""
+    settled = timezone.now() - timedelta(
+        seconds=settings.NUTRITION_CHANGES_SETTLE_SECONDS
+    )
+    entries = MealEntry.objects.filter(user_id=user_id, updated_at__lte=settled)
+    tombstones = MealEntryTombstone.objects.filter(
+        user_id=user_id, deleted_at__lte=settled
+    )
+    if since is None:
+        # A first sync has nothing to delete.
+        tombstones = tombstones.none()
+    else:
+        changed_at, entry_id = since
+        entries = entries.filter(
+            Q(updated_at__gt=changed_at) | Q(updated_at=changed_at, id__gt=entry_id)
+        )
+        tombstones = tombstones.filter(
+            Q(deleted_at__gt=changed_at)
+            | Q(deleted_at=changed_at, entry_id__gt=entry_id)
+        )
+
+    changes: list[tuple[datetime, int, MealEntry | None]] = [
+        (entry.updated_at, entry.id, entry)
+        for entry in entries.with_food()
+        .with_kcal()
+        .order_by("updated_at", "id")[: limit + 1]
+    ]
+    changes.extend(
+        (deleted_at, entry_id, None)
+        for deleted_at, entry_id in tombstones.order_by(
+            "deleted_at", "entry_id"
+        ).values_list("deleted_at", "entry_id")[: limit + 1]
+    )
+    changes.sort(key=lambda change: change[:2])
+    page = changes[:limit]
+    return ChangePage(
+        entries=[entry for _, _, entry in page if entry is not None],
+        deleted=[entry_id for _, entry_id, entry in page if entry is None],
+        cursor=page[-1][:2] if page else since,
+        has_more=len(changes) > limit,
+    )
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from nutrition.summaries import (
+    REBUILD_CHUNK_SIZE,
+    rebuild_all_summaries,
+    refresh_queued_food_items,
+)
+
+
+class Command(BaseCommand):
+    help = "Recompute every daily nutrition summary from the meal entries."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Chunks rebuilt concurrently.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=REBUILD_CHUNK_SIZE,
+            help="Users rebuilt per transaction.",
+        )
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help="Only recompute the days of foods whose macro changes are "
+            "still queued.",
+        )
+
+    def handle(self, *args: object, **options: object) -> None:
+        if options["pending"]:
+            refreshed = refresh_queued_food_items()
+            self.stdout.write(f"Refreshed the days of {refreshed} food(s).")
+            return
+        written = rebuild_all_summaries(
+            max(1, int(options["workers"])), max(1, int(options["chunk_size"]))
+        )
+        self.stdout.write(f"Rewrote {written} daily summary row(s).")
@@ -0,0 +1,164 @@
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+MACRO_COLUMNS = {
+    "kcal": "kcal_100g",
+    "protein_g": "protein_g_100g",
+    "carbs_g": "carbs_g_100g",
+    "fat_g": "fat_g_100g",
+}
+USER_CHUNK_SIZE = 500
+EXACT = Decimal("0.000001")
+
+
+def _empty_summary():
+    return {
+        **{macro: Decimal("0") for macro in MACRO_COLUMNS},
+        "meals": {},
+        "entry_count": 0,
+    }
+
+
+def backfill_summaries(apps, schema_editor):
+    """Summarize every existing day, keeping the version (and so the ETag
+    clients hold) of days that already had one."""
+    MealEntry = apps.get_model("nutrition", "MealEntry")
+    DailyNutritionSummary = apps.get_model("nutrition", "DailyNutritionSummary")
+    user_ids = list(
+        MealEntry.objects.order_by("user_id")
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    for start in range(0, len(user_ids), USER_CHUNK_SIZE):
+        chunk = user_ids[start : start + USER_CHUNK_SIZE]
+        summaries = {}
+        entries = MealEntry.objects.filter(user_id__in=chunk).values_list(
+            "user_id",
+            "consumed_at",
+            "meal_type",
+            "quantity_g",
+            *(f"food_item__{column}" for column in MACRO_COLUMNS.values()),
+        )
+        for (
+            user_id,
+            consumed_at,
+            meal_type,
+            quantity_g,
+            *per_100g,
+        ) in entries.iterator():
+            summary = summaries.setdefault(
+                (user_id, timezone.localdate(consumed_at)), _empty_summary()
+            )
+            meal = summary["meals"].setdefault(
+                meal_type,
+                {**{macro: Decimal("0") for macro in MACRO_COLUMNS}, "entries": 0},
+            )
+            factor = (quantity_g or Decimal("0")) / Decimal("100")
+            for macro, value in zip(MACRO_COLUMNS, per_100g, strict=True):
+                amount = (value or Decimal("0")) * factor
+                summary[macro] += amount
+                meal[macro] += amount
+            summary["entry_count"] += 1
+            meal["entries"] += 1
+
+        existing = {
+            (row.user_id, row.date): row
+            for row in DailyNutritionSummary.objects.filter(user_id__in=chunk)
+        }
+        created, changed = [], []
+        for key, fresh in summaries.items():
+            fresh["meals"] = {
+                meal_type: {
+                    name: value if name == "entries" else str(value.quantize(EXACT))
+                    for name, value in meal.items()
+                }
+                for meal_type, meal in fresh["meals"].items()
+            }
+            row = existing.get(key)
+            if row is None:
+                created.append(
+                    DailyNutritionSummary(
+                        user_id=key[0], date=key[1], version=1, **fresh
+                    )
+                )
+                continue
+            for name, value in fresh.items():
+                setattr(row, name, value)
+            changed.append(row)
+        DailyNutritionSummary.objects.bulk_create(created)
+        DailyNutritionSummary.objects.bulk_update(
+            changed, [*MACRO_COLUMNS, "meals", "entry_count"]
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("nutrition", "0002_nutritiondayversion"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RenameModel("NutritionDayVersion", "DailyNutritionSummary"),
+        migrations.RemoveConstraint(
+            model_name="dailynutritionsummary",
+            name="nutrition_dayversion_user_date",
+        ),
+        migrations.AlterField(
+            model_name="dailynutritionsummary",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="daily_nutrition_summaries",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailynutritionsummary",
+            name="kcal",
+            field=models.DecimalField(
+                decimal_places=6, default=Decimal("0"), max_digits=20
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailynutritionsummary",
+            name="protein_g",
+            field=models.DecimalField(
+                decimal_places=6, default=Decimal("0"), max_digits=20
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailynutritionsummary",
+            name="carbs_g",
+            field=models.DecimalField(
+                decimal_places=6, default=Decimal("0"), max_digits=20
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailynutritionsummary",
+            name="fat_g",
+            field=models.DecimalField(
+                decimal_places=6, default=Decimal("0"), max_digits=20
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailynutritionsummary",
+            name="meals",
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name="dailynutritionsummary",
+            name="entry_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name="dailynutritionsummary",
+            constraint=models.UniqueConstraint(
+                fields=("user", "date"), name="nutrition_dailysummary_user_date"
+            ),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0009_fooditem_source_document"),
+        ("nutrition", "0003_dailynutritionsummary"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="mealentry",
+            name="idempotency_key",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="mealentry",
+            constraint=models.UniqueConstraint(
+                fields=("user", "idempotency_key"),
+                name="nutrition_mealentry_user_idempotency_key",
+            ),
+        ),
+    ]
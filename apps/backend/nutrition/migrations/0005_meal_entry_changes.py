@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0009_fooditem_source_document"),
+        ("nutrition", "0004_mealentry_idempotency_key"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MealEntryTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("entry_id", models.BigIntegerField(unique=True)),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="mealentry",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="mealentry",
+            index=models.Index(
+                fields=["user", "updated_at", "id"], name="nutrition_mealentry_changes"
+            ),
+        ),
+        migrations.AddField(
+            model_name="mealentrytombstone",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="meal_entry_tombstones",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="mealentrytombstone",
+            index=models.Index(
+                fields=["user", "deleted_at", "entry_id"],
+                name="nutrition_tombstone_changes",
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("foods", "0009_fooditem_source_document"),
+        ("nutrition", "0005_meal_entry_changes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FoodSummaryRefresh",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "requested_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "food_item",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="summary_refresh",
+                        to="foods.fooditem",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -1,8 +1,79 @@
+from decimal import Decimal
+from typing import Any
+
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Cast, Coalesce, Round
 from django.utils import timezone
 
 from foods.models import FoodItem
+from foods.search import FOOD_ROW_FIELDS
+
+# Per-100 g ``FoodItem`` column behind each macro of ``calculate_macros``.
+MACRO_COLUMNS = {
+    "kcal": "kcal_100g",
+    "protein_g": "protein_g_100g",
+    "carbs_g": "carbs_g_100g",
+    "fat_g": "fat_g_100g",
+}
+# Columns of ``MealEntryQuerySet.entry_rows``, rendered by
+# ``nutrition.rendering.MealEntryRenderer``; the food columns form a ``FoodRow``.
+ENTRY_ROW_FIELDS = (
+    "id",
+    "meal_type",
+    "consumed_at",
+    "quantity_g",
+    "kcal_micros",
+    *(f"food_item__{name}" for name in FOOD_ROW_FIELDS),
+)
+
+
+def centi_expression(path: str) -> models.Expression:
+    """A two-decimal column as an integer count of hundredths. Rounding
+    first keeps SQLite's float arithmetic exact (0.29 * 100 is 28.99...)."""
+    return Cast(
+        Round(Coalesce(models.F(path), models.Value(Decimal("0"))) * 100),
+        models.BigIntegerField(),
+    )
+
+
+def macro_micros_expression(macro: str) -> models.Expression:
+    """SQL mirror of ``nutrition.utils.calculate_macro_micros``: one macro of
+    a ``MealEntry`` in millionths, an exact integer on every backend."""
+    return models.ExpressionWrapper(
+        centi_expression("quantity_g")
+        * centi_expression(f"food_item__{MACRO_COLUMNS[macro]}"),
+        output_field=models.BigIntegerField(),
+    )
+
+
+class MealEntryQuerySet(models.QuerySet["MealEntry"]):
+    def with_food(self) -> "MealEntryQuerySet":
+        """Join each entry's food item without its heavy JSON columns."""
+        return self.select_related("food_item").defer(
+            *(f"food_item__{name}" for name in FoodItem.HEAVY_FIELDS)
+        )
+
+    def with_kcal(self) -> "MealEntryQuerySet":
+        """Annotate each entry's ``kcal_micros`` so serializers need not
+        recompute it."""
+        return self.annotate(kcal_micros=macro_micros_expression("kcal"))
+
+    def macro_centis(self) -> "models.QuerySet[Any]":
+        """``(quantity, *per-100 g macros)`` rows in hundredths, the input of
+        ``nutrition.utils.calculate_macros_many``."""
+        return self.values_list(
+            centi_expression("quantity_g"),
+            *(
+                centi_expression(f"food_item__{column}")
+                for column in MACRO_COLUMNS.values()
+            ),
+        )
+
+    def entry_rows(self) -> "models.QuerySet[Any]":
+        """``ENTRY_ROW_FIELDS`` tuples: everything ``MealEntrySerializer``
+        renders, in one joined query without model instances."""
+        return self.with_kcal().values_list(*ENTRY_ROW_FIELDS)
 
 
 class MealEntry(models.Model):
@@ -32,6 +103,108 @@ class MealEntry(models.Model):
     )
     consumed_at = models.DateTimeField(default=timezone.now)
     quantity_g = models.DecimalField(max_digits=8, decimal_places=2)
+    # Client-generated key that makes replayed bulk creates no-ops.
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = MealEntryQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "idempotency_key"],
+                name="nutrition_mealentry_user_idempotency_key",
+            )
+        ]
+        indexes = [
+            # Serves the ``(updated_at, id)`` keyset scan of the change feed.
+            models.Index(
+                fields=["user", "updated_at", "id"],
+                name="nutrition_mealentry_changes",
+            )
+        ]
 
     def __str__(self) -> str:
         return f"{self.user_id} {self.meal_type} {self.food_item_id}"
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        # Signals apply the summary delta; commit it together with the row.
+        # (Deletes already run in a transaction.)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class MealEntryTombstone(models.Model):
+    """Records a deleted ``MealEntry`` so the change feed can report it."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="meal_entry_tombstones",
+    )
+    entry_id = models.BigIntegerField(unique=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "deleted_at", "entry_id"],
+                name="nutrition_tombstone_changes",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} -{self.entry_id}"
+
+
+class DailyNutritionSummary(models.Model):
+    """Per-user, per-day macro totals kept current by ``nutrition.summaries``.
+
+    ``meals`` breaks the totals down by ``meal_type`` (macro values as decimal
+    strings). ``version`` is bumped on every change and backs the day view's
+    ETag.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_nutrition_summaries",
+    )
+    date = models.DateField()
+    kcal = models.DecimalField(max_digits=20, decimal_places=6, default=Decimal("0"))
+    protein_g = models.DecimalField(
+        max_digits=20, decimal_places=6, default=Decimal("0")
+    )
+    carbs_g = models.DecimalField(max_digits=20, decimal_places=6, default=Decimal("0"))
+    fat_g = models.DecimalField(max_digits=20, decimal_places=6, default=Decimal("0"))
+    meals = models.JSONField(default=dict)
+    entry_count = models.PositiveIntegerField(default=0)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "date"], name="nutrition_dailysummary_user_date"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user_id} {self.date} v{self.version}"
+
+    @property
+    def totals(self) -> dict[str, Decimal]:
+        return {macro: getattr(self, macro) for macro in MACRO_COLUMNS}
+
+
+class FoodSummaryRefresh(models.Model):
+    """A food whose macros changed and whose logged days still need their
+    summaries recomputed (``nutrition.summaries.refresh_queued_food_items``)."""
+
+    food_item = models.OneToOneField(
+        FoodItem, on_delete=models.CASCADE, related_name="summary_refresh"
+    )
+    requested_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"Summary refresh for {self.food_item_id}"
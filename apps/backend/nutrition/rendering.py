@@ -0,0 +1,39 @@
+"""Fast-path rendering of ``MealEntrySerializer`` output.
+
+The day log renders every entry of a day with its nested compact food. Working
+from ``MealEntryQuerySet.entry_rows`` tuples skips both model instantiation
+and the serializer's per-field dispatch; see ``foods.rendering``.
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from django.utils import timezone
+
+from foods.rendering import CompactFoodRenderer, datetime_string, decimal_string
+from foods.search import food_row
+from nutrition.utils import serialize_micros
+
+
+class MealEntryRenderer:
+    """Render ``ENTRY_ROW_FIELDS`` tuples exactly like ``MealEntrySerializer``
+    with ``request`` in its context."""
+
+    def __init__(self, request: Any | None = None) -> None:
+        self._foods = CompactFoodRenderer(request)
+        self._zone = timezone.get_current_timezone()
+
+    def render(self, row: tuple[Any, ...]) -> dict[str, Any]:
+        entry_id, meal_type, consumed_at, quantity_g, kcal_micros, *food = row
+        return {
+            "id": entry_id,
+            "meal_type": meal_type,
+            "consumed_at": datetime_string(consumed_at, self._zone),
+            "quantity_g": decimal_string(quantity_g),
+            "food_item": self._foods.render(food_row(food)),
+            "kcal": serialize_micros(kcal_micros),
+        }
+
+    def render_many(self, rows: Iterable[tuple[Any, ...]]) -> list[dict[str, Any]]:
+        render = self.render
+        return [render(row) for row in rows]
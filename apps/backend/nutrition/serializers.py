@@ -5,12 +5,19 @@ from rest_framework import serializers
 from foods.models import FoodItem
 from foods.serializers import FoodItemCompactSerializer
 from nutrition.models import MealEntry
-from nutrition.utils import calculate_macros, serialize_decimal
+from nutrition.trends import BUCKETS
+from nutrition.utils import (
+    calculate_macro_micros,
+    serialize_micros,
+)
+
+MEAL_ENTRY_BULK_MAX_ITEMS = 200
+MEAL_ENTRY_BULK_STATUS_CHOICES = ["created", "duplicate", "error"]
 
 
 class MealEntryCreateSerializer(serializers.Serializer):
     food_item_id = serializers.PrimaryKeyRelatedField(
-        queryset=FoodItem.objects.all(), source="food_item"
+        queryset=FoodItem.objects.light(), source="food_item"
     )
     meal_type = serializers.ChoiceField(choices=MealEntry.MEAL_TYPE_CHOICES)
     quantity_g = serializers.DecimalField(max_digits=8, decimal_places=2)
@@ -24,6 +31,43 @@ class MealEntryCreateSerializer(serializers.Serializer):
         return MealEntry.objects.create(user=user, **validated_data)
 
 
+class MealEntryBulkItemSerializer(serializers.Serializer):
+    """One entry of a bulk create; ``food_item_id`` is resolved in bulk."""
+
+    idempotency_key = serializers.CharField(max_length=64)
+    food_item_id = serializers.IntegerField(min_value=1)
+    meal_type = serializers.ChoiceField(choices=MealEntry.MEAL_TYPE_CHOICES)
+    quantity_g = serializers.DecimalField(max_digits=8, decimal_places=2)
+    consumed_at = serializers.DateTimeField(required=False)
+
+
+class MealEntryBulkCreateSerializer(serializers.Serializer):
+    # Items are validated one by one so a bad entry does not fail the rest.
+    entries = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MEAL_ENTRY_BULK_MAX_ITEMS,
+    )
+
+
+class MealEntryBulkRequestSerializer(serializers.Serializer):
+    """Documented shape of ``MealEntryBulkCreateSerializer``."""
+
+    entries = MealEntryBulkItemSerializer(many=True)
+
+
+class MealEntryBulkResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    idempotency_key = serializers.CharField(allow_null=True)
+    status = serializers.ChoiceField(choices=MEAL_ENTRY_BULK_STATUS_CHOICES)
+    entry_id = serializers.IntegerField(allow_null=True)
+    errors = serializers.DictField(required=False)
+
+
+class MealEntryBulkResponseSerializer(serializers.Serializer):
+    results = MealEntryBulkResultSerializer(many=True)
+
+
 class MealEntrySerializer(serializers.ModelSerializer):
     food_item = FoodItemCompactSerializer()
     kcal = serializers.SerializerMethodField()
@@ -40,8 +84,11 @@ class MealEntrySerializer(serializers.ModelSerializer):
         )
 
     def get_kcal(self, obj: MealEntry) -> float:
-        macros = calculate_macros(obj.food_item, obj.quantity_g)
-        return serialize_decimal(macros["kcal"])
+        # Annotated by ``MealEntryQuerySet.with_kcal`` on list paths.
+        kcal_micros = getattr(obj, "kcal_micros", None)
+        if kcal_micros is None:
+            kcal_micros = calculate_macro_micros(obj.food_item, obj.quantity_g)["kcal"]
+        return serialize_micros(kcal_micros)
 
 
 class NutritionTotalsSerializer(serializers.Serializer):
@@ -62,3 +109,35 @@ class NutritionDaySerializer(serializers.Serializer):
     date = serializers.DateField()
     totals = NutritionTotalsSerializer()
     meals = NutritionMealsSerializer()
+
+
+class NutritionTrendPointSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    days = serializers.IntegerField()
+    logged_days = serializers.IntegerField()
+    totals = NutritionTotalsSerializer()
+    daily_average = NutritionTotalsSerializer(allow_null=True)
+    days_on_goal = serializers.IntegerField(allow_null=True)
+    adherence = serializers.FloatField(allow_null=True)
+
+
+class NutritionTrendBucketSerializer(NutritionTrendPointSerializer):
+    rolling_average = NutritionTotalsSerializer(allow_null=True)
+
+
+class NutritionTrendsSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    bucket = serializers.ChoiceField(choices=BUCKETS)
+    window = serializers.IntegerField()
+    goal_kcal = serializers.IntegerField(allow_null=True)
+    overall = NutritionTrendPointSerializer()
+    series = NutritionTrendBucketSerializer(many=True)
+
+
+class NutritionChangesSerializer(serializers.Serializer):
+    entries = MealEntrySerializer(many=True)
+    deleted = serializers.ListField(child=serializers.IntegerField())
+    cursor = serializers.CharField(allow_null=True)
+    has_more = serializers.BooleanField()
@@ -0,0 +1,88 @@
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from foods.models import FoodItem
+from foods.search import FOOD_ROW_FIELDS
+from foods.signals import food_items_changed, food_macros_changed
+from nutrition.models import MealEntry, MealEntryTombstone
+from nutrition.summaries import (
+    apply_contributions,
+    entry_contribution,
+    queue_food_item_refresh,
+    stored_contribution,
+)
+
+
+@receiver(pre_save, sender=MealEntry)
+def remember_previous_contribution(
+    sender: type[MealEntry], instance: MealEntry, **kwargs: Any
+) -> None:
+    instance._previous_contribution = None
+    if instance.pk is None or instance._state.adding:
+        return
+    instance._previous_contribution = stored_contribution(instance.pk)
+
+
+@receiver(post_save, sender=MealEntry)
+def summarize_saved_entry(
+    sender: type[MealEntry], instance: MealEntry, **kwargs: Any
+) -> None:
+    previous = getattr(instance, "_previous_contribution", None)
+    apply_contributions(
+        added=[entry_contribution(instance)],
+        removed=[previous] if previous is not None else [],
+    )
+
+
+def _deleted_with_user(origin: Any) -> bool:
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model is get_user_model()
+
+
+@receiver(post_delete, sender=MealEntry)
+def summarize_deleted_entry(
+    sender: type[MealEntry], instance: MealEntry, origin: Any = None, **kwargs: Any
+) -> None:
+    if _deleted_with_user(origin):
+        # The user's summaries are being deleted with them.
+        return
+    apply_contributions(removed=[entry_contribution(instance)])
+
+
+@receiver(post_delete, sender=MealEntry)
+def record_entry_tombstone(
+    sender: type[MealEntry], instance: MealEntry, origin: Any = None, **kwargs: Any
+) -> None:
+    if _deleted_with_user(origin):
+        return
+    MealEntryTombstone.objects.create(user_id=instance.user_id, entry_id=instance.pk)
+
+
+@receiver(food_macros_changed)
+def resummarize_food_days(sender: Any, food_item_ids: list[int], **kwargs: Any) -> None:
+    queue_food_item_refresh(food_item_ids)
+
+
+@receiver(post_save, sender=FoodItem)
+def restamp_saved_food_days(
+    sender: type[FoodItem],
+    instance: FoodItem,
+    created: bool,
+    update_fields: frozenset[str] | None = None,
+    **kwargs: Any,
+) -> None:
+    # The day view renders only the row fields of a food.
+    if created or (
+        update_fields is not None and update_fields.isdisjoint(FOOD_ROW_FIELDS)
+    ):
+        return
+    queue_food_item_refresh([instance.pk])
+
+
+@receiver(food_items_changed)
+def restamp_food_days(sender: Any, food_item_ids: list[int], **kwargs: Any) -> None:
+    queue_food_item_refresh(food_item_ids)
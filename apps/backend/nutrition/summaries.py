@@ -0,0 +1,427 @@
+"""Daily nutrition summaries, maintained by delta on every ``MealEntry`` write.
+
+Entries belong to the local day of ``consumed_at`` (the ``__date`` lookup the
+day view filters on). The model signals subtract an entry's previous
+contribution and add its new one under a lock on the affected summary rows,
+inside the write's transaction. Every change bumps ``version``, from which the
+day view derives its ETag and the trends view the cache key of the range.
+
+Writes that bypass the signals (``bulk_create``, ``QuerySet.update``) must call
+``apply_contributions`` themselves. A logged food that changes (``post_save``,
+``foods.signals.food_items_changed`` and ``food_macros_changed``) only queues a
+``FoodSummaryRefresh``; after commit a background thread recomputes the days
+that log it, however many they are, and bumps their ``version`` even when the
+totals stay the same, since the day view also renders the food's name and
+images. Until then a day's ETag can still match its previous rendering.
+``manage.py rebuild_nutrition_summaries`` recomputes everything, or with
+``--pending`` whatever refreshes are still queued.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from foods.models import FoodItem
+from nutrition.models import (
+    MACRO_COLUMNS,
+    DailyNutritionSummary,
+    FoodSummaryRefresh,
+    MealEntry,
+    macro_micros_expression,
+)
+from nutrition.utils import calculate_macro_micros, micros_to_decimal
+
+logger = logging.getLogger(__name__)
+
+DayKey = tuple[int, date]
+REBUILD_CHUNK_SIZE = 500
+# Foods whose logged days are recomputed per pass of the refresh queue.
+FOOD_REFRESH_BATCH_SIZE = 50
+REBUILD_ATTEMPTS = 3
+_SUMMARY_FIELDS = [*MACRO_COLUMNS, "meals", "entry_count", "version"]
+_EXACT = Decimal("0.000001")
+
+
+@dataclass
+class Contribution:
+    """What one entry adds to its day's summary."""
+
+    user_id: int
+    day: date
+    meal_type: str
+    macros: dict[str, Decimal]
+
+    @property
+    def key(self) -> DayKey:
+        return self.user_id, self.day
+
+
+def entry_day(consumed_at: datetime) -> date:
+    return timezone.localdate(consumed_at)
+
+
+def entry_contribution(entry: MealEntry) -> Contribution:
+    return Contribution(
+        entry.user_id,
+        entry_day(entry.consumed_at),
+        entry.meal_type,
+        _macros(entry.food_item, Decimal(str(entry.quantity_g))),
+    )
+
+
+def stored_contribution(entry_id: int) -> Contribution | None:
+    """The contribution of entry ``entry_id`` as currently stored."""
+    row = (
+        MealEntry.objects.filter(pk=entry_id)
+        .values(
+            "user_id",
+            "consumed_at",
+            "meal_type",
+            "quantity_g",
+            *(f"food_item__{column}" for column in MACRO_COLUMNS.values()),
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    food = FoodItem(
+        **{column: row[f"food_item__{column}"] for column in MACRO_COLUMNS.values()}
+    )
+    return Contribution(
+        row["user_id"],
+        entry_day(row["consumed_at"]),
+        row["meal_type"],
+        _macros(food, row["quantity_g"]),
+    )
+
+
+def _macros(item: FoodItem, quantity_g: Decimal) -> dict[str, Decimal]:
+    return {
+        macro: micros_to_decimal(micros)
+        for macro, micros in calculate_macro_micros(item, quantity_g).items()
+    }
+
+
+def apply_contributions(
+    added: Iterable[Contribution] = (), removed: Iterable[Contribution] = ()
+) -> None:
+    changes: dict[DayKey, list[tuple[int, Contribution]]] = defaultdict(list)
+    for contribution in added:
+        changes[contribution.key].append((1, contribution))
+    for contribution in removed:
+        changes[contribution.key].append((-1, contribution))
+    with transaction.atomic():
+        # Sorted, so concurrent writers lock rows in the same order.
+        for key in sorted(changes):
+            summary = _locked_summary(*key)
+            for sign, contribution in changes[key]:
+                _add(summary, contribution, sign)
+            summary.version += 1
+            summary.save(update_fields=[*_SUMMARY_FIELDS, "updated_at"])
+
+
+def _locked_summary(user_id: int, day: date) -> DailyNutritionSummary:
+    summaries = DailyNutritionSummary.objects.select_for_update()
+    summary = summaries.filter(user_id=user_id, date=day).first()
+    if summary is not None:
+        return summary
+    try:
+        with transaction.atomic():
+            return DailyNutritionSummary.objects.create(user_id=user_id, date=day)
+    except IntegrityError:
+        # Created concurrently by another writer.
+        return summaries.get(user_id=user_id, date=day)
+
+
+def _add(summary: DailyNutritionSummary, contribution: Contribution, sign: int) -> None:
+    meal = summary.meals.setdefault(contribution.meal_type, _empty_meal())
+    for macro, value in contribution.macros.items():
+        setattr(summary, macro, getattr(summary, macro) + sign * value)
+        meal[macro] = _format(Decimal(meal[macro]) + sign * value)
+    summary.entry_count += sign
+    meal["entries"] += sign
+    if meal["entries"] <= 0:
+        del summary.meals[contribution.meal_type]
+
+
+def _empty_meal() -> dict[str, Any]:
+    return {**{macro: _format(Decimal("0")) for macro in MACRO_COLUMNS}, "entries": 0}
+
+
+def _format(value: Decimal) -> str:
+    return str(value.quantize(_EXACT))
+
+
+def rebuild_user_summaries(user_ids: Iterable[int]) -> int:
+    """Recompute every summary of ``user_ids``; return the rows written."""
+    ids = list(user_ids)
+    return _rebuild(Q(user_id__in=ids), Q(user_id__in=ids))
+
+
+def rebuild_all_summaries(workers: int, chunk_size: int = REBUILD_CHUNK_SIZE) -> int:
+    """Recompute every summary, ``chunk_size`` users at a time on ``workers``
+    threads (inline with one worker); return the rows written."""
+    user_ids = sorted(
+        set(MealEntry.objects.values_list("user_id", flat=True).distinct())
+        | set(
+            DailyNutritionSummary.objects.values_list("user_id", flat=True).distinct()
+        )
+    )
+    chunks = [
+        user_ids[start : start + chunk_size]
+        for start in range(0, len(user_ids), chunk_size)
+    ]
+    if workers <= 1:
+        return sum(rebuild_user_summaries(chunk) for chunk in chunks)
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="nutrition-rebuild"
+    ) as pool:
+        return sum(pool.map(_rebuild_in_thread, chunks))
+
+
+def _rebuild_in_thread(user_ids: list[int]) -> int:
+    try:
+        return rebuild_user_summaries(user_ids)
+    finally:
+        connection.close()
+
+
+_refresh_lock = threading.Lock()
+_refresh_requested = False
+_refreshing = False
+
+
+def queue_food_item_refresh(food_item_ids: Iterable[int]) -> None:
+    """Queue the days logging these foods for recomputation once the current
+    transaction commits; the write itself only upserts one row per logged
+    food."""
+    logged = set(
+        MealEntry.objects.filter(food_item_id__in=list(food_item_ids))
+        .values_list("food_item_id", flat=True)
+        .distinct()
+        .order_by()
+    )
+    if not logged:
+        return
+    now = timezone.now()
+    FoodSummaryRefresh.objects.bulk_create(
+        [
+            FoodSummaryRefresh(food_item_id=food_item_id, requested_at=now)
+            for food_item_id in logged
+        ],
+        update_conflicts=True,
+        unique_fields=["food_item"],
+        update_fields=["requested_at"],
+    )
+    transaction.on_commit(start_food_refreshes)
+
+
+def start_food_refreshes() -> None:
+    """Drain the refresh queue on a background thread of this process (inline
+    with ``NUTRITION_FOOD_REFRESH_INLINE``); a call while it runs makes it look
+    again before stopping."""
+    global _refresh_requested, _refreshing
+    if getattr(settings, "NUTRITION_FOOD_REFRESH_INLINE", False):
+        refresh_queued_food_items()
+        return
+    with _refresh_lock:
+        _refresh_requested = True
+        if _refreshing:
+            return
+        _refreshing = True
+    # Not a daemon: a command such as import_off_dump waits for it on exit.
+    threading.Thread(target=_drain_refreshes, name="nutrition-food-refresh").start()
+
+
+def _drain_refreshes() -> None:
+    global _refresh_requested, _refreshing
+    try:
+        while True:
+            with _refresh_lock:
+                if not _refresh_requested:
+                    _refreshing = False
+                    return
+                _refresh_requested = False
+            try:
+                refresh_queued_food_items()
+            except Exception:
+                logger.exception("food summary refresh failed")
+    finally:
+        with _refresh_lock:
+            _refreshing = False
+        connection.close()
+
+
+def refresh_queued_food_items(batch_size: int = FOOD_REFRESH_BATCH_SIZE) -> int:
+    """Recompute the days of every queued food; return the foods refreshed.
+
+    A food changed again while its days were rebuilt keeps its newer row and
+    is refreshed in the next pass.
+    """
+    refreshed = 0
+    while True:
+        pending = list(
+            FoodSummaryRefresh.objects.order_by("requested_at", "id").values_list(
+                "food_item_id", "requested_at"
+            )[:batch_size]
+        )
+        if not pending:
+            return refreshed
+        rebuild_food_item_days(
+            (food_item_id for food_item_id, _ in pending), touch=True
+        )
+        done = Q()
+        for food_item_id, requested_at in pending:
+            done |= Q(food_item_id=food_item_id, requested_at=requested_at)
+        FoodSummaryRefresh.objects.filter(done).delete()
+        refreshed += len(pending)
+
+
+def rebuild_food_item_days(food_item_ids: Iterable[int], touch: bool = False) -> int:
+    """Recompute the summaries of every day that logs one of these foods;
+    ``touch`` bumps the ``version`` of unchanged ones too."""
+    days = list(
+        MealEntry.objects.filter(food_item_id__in=list(food_item_ids))
+        .annotate(day=TruncDate("consumed_at"))
+        .values_list("user_id", "day")
+        .distinct()
+        .order_by()
+    )
+    written = 0
+    for start in range(0, len(days), REBUILD_CHUNK_SIZE):
+        entries, summaries = Q(), Q()
+        for user_id, day in days[start : start + REBUILD_CHUNK_SIZE]:
+            entries |= Q(user_id=user_id, consumed_at__date=day)
+            summaries |= Q(user_id=user_id, date=day)
+        written += _rebuild(entries, summaries, touch)
+    return written
+
+
+def _rebuild(entries: Q, summaries: Q, touch: bool = False) -> int:
+    """Replace the summaries matching ``summaries`` with totals recomputed
+    from the entries matching ``entries`` (which must cover the same days)."""
+    for attempt in range(REBUILD_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return _rebuild_locked(entries, summaries, touch)
+        except IntegrityError:
+            # A writer created one of the missing rows meanwhile; its delta is
+            # part of a fresh aggregate, so start over.
+            if attempt == REBUILD_ATTEMPTS - 1:
+                raise
+    raise AssertionError("unreachable")
+
+
+def _rebuild_locked(entries: Q, summaries: Q, touch: bool) -> int:
+    # Lock first so no delta lands between the aggregate and the write.
+    existing = {
+        (summary.user_id, summary.date): summary
+        for summary in DailyNutritionSummary.objects.select_for_update().filter(
+            summaries
+        )
+    }
+    created: list[DailyNutritionSummary] = []
+    changed: list[DailyNutritionSummary] = []
+    for key, fresh in _aggregate(entries).items():
+        summary = existing.pop(key, None)
+        if summary is None:
+            created.append(
+                DailyNutritionSummary(user_id=key[0], date=key[1], version=1, **fresh)
+            )
+        elif _differs(summary, fresh):
+            for name, value in fresh.items():
+                setattr(summary, name, value)
+            changed.append(summary)
+        elif touch:
+            changed.append(summary)
+    empty = {
+        **{macro: Decimal("0") for macro in MACRO_COLUMNS},
+        "meals": {},
+        "entry_count": 0,
+    }
+    for summary in existing.values():
+        # Every entry of the day is gone.
+        if _differs(summary, empty):
+            for name, value in empty.items():
+                setattr(summary, name, value)
+            changed.append(summary)
+    for summary in changed:
+        summary.version += 1
+    DailyNutritionSummary.objects.bulk_update(changed, _SUMMARY_FIELDS)
+    DailyNutritionSummary.objects.bulk_create(created)
+    return len(created) + len(changed)
+
+
+def _aggregate(entries: Q) -> dict[DayKey, dict[str, Any]]:
+    rows = (
+        MealEntry.objects.filter(entries)
+        .annotate(day=TruncDate("consumed_at"))
+        .values("user_id", "day", "meal_type")
+        .annotate(
+            entries=Count("id"),
+            **{macro: Sum(macro_micros_expression(macro)) for macro in MACRO_COLUMNS},
+        )
+        .order_by()
+    )
+    summaries: dict[DayKey, dict[str, Any]] = {}
+    for row in rows:
+        summary = summaries.setdefault(
+            (row["user_id"], row["day"]),
+            {
+                **{macro: Decimal("0") for macro in MACRO_COLUMNS},
+                "meals": {},
+                "entry_count": 0,
+            },
+        )
+        meal = _empty_meal()
+        for macro in MACRO_COLUMNS:
+            value = micros_to_decimal(row[macro] or 0)
+            summary[macro] += value
+            meal[macro] = _format(value)
+        meal["entries"] = row["entries"]
+        summary["meals"][row["meal_type"]] = meal
+        summary["entry_count"] += row["entries"]
+    return summaries
+
+
+def _differs(summary: DailyNutritionSummary, fresh: dict[str, Any]) -> bool:
+    return any(getattr(summary, name) != value for name, value in fresh.items())
+
+
+def day_summary(user_id: int, day: date) -> DailyNutritionSummary | None:
+    return DailyNutritionSummary.objects.filter(user_id=user_id, date=day).first()
+
+
+def day_foods_updated_at(user_id: int, day: date) -> datetime | None:
+    """When a food logged by ``user_id`` on ``day`` last changed: the ETag
+    stamp of a day without a summary row (last written before summaries
+    existed), whose ``version`` no food change can bump."""
+    return MealEntry.objects.filter(user_id=user_id, consumed_at__date=day).aggregate(
+        updated_at=Max("food_item__updated_at")
+    )["updated_at"]
+
+
+def day_etag(
+    user_id: int,
+    day: date,
+    summary: DailyNutritionSummary | None,
+    foods_updated_at: datetime | None,
+) -> str:
+    """Strong ETag for the day view of ``user_id`` on ``day``."""
+    version = summary.version if summary is not None else 0
+    foods = foods_updated_at.isoformat() if foods_updated_at is not None else ""
+    stamp = f"{user_id}:{day.isoformat()}:{version}:{foods}"
+    return f'"{hashlib.sha1(stamp.encode()).hexdigest()}"'
@@ -0,0 +1,193 @@
+"""Nutrition trends over a date range, read from ``DailyNutritionSummary``.
+
+One indexed query loads the pre-aggregated day rows for the range plus the
+rolling window's lookback. Cumulative sums over the dense day axis then give
+the totals of any bucket or window with two lookups, so a year of history is a
+few hundred rows and no per-entry work.
+
+Rendered results are cached per user, range and options under a stamp of the
+rows they were computed from (``trends_cache_key``). The stamp is read from the
+database, so a summary write made by any process changes the key at once.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from typing import Any
+
+from django.conf import settings
+from django.db.models import Count, Sum
+
+from nutrition.models import MACRO_COLUMNS, DailyNutritionSummary
+from nutrition.utils import serialize_decimal
+
+BUCKET_DAY = "day"
+BUCKET_WEEK = "week"
+BUCKET_MONTH = "month"
+BUCKETS = (BUCKET_DAY, BUCKET_WEEK, BUCKET_MONTH)
+# Buckets averaged by ``rolling_average`` unless the request says otherwise.
+DEFAULT_WINDOWS = {BUCKET_DAY: 7, BUCKET_WEEK: 4, BUCKET_MONTH: 3}
+MAX_WINDOW = 90
+
+KEY_PREFIX = "nutrition:trends"
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == BUCKET_WEEK:
+        return day - timedelta(days=day.weekday())
+    if bucket == BUCKET_MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, bucket: str) -> date:
+    if bucket == BUCKET_WEEK:
+        return start + timedelta(days=7)
+    if bucket == BUCKET_MONTH:
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def previous_bucket(start: date, bucket: str, count: int = 1) -> date:
+    for _ in range(count):
+        if bucket == BUCKET_WEEK:
+            start -= timedelta(days=7)
+        elif bucket == BUCKET_MONTH:
+            start = (start - timedelta(days=1)).replace(day=1)
+        else:
+            start -= timedelta(days=1)
+    return start
+
+
+class _DayAxis:
+    """Per-day cumulative sums from ``origin`` through ``end``."""
+
+    def __init__(self, origin: date, end: date) -> None:
+        self.origin = origin
+        size = (end - origin).days + 1
+        self._daily = {macro: [Decimal("0")] * size for macro in MACRO_COLUMNS}
+        self._logged = [0] * size
+        self._on_goal = [0] * size
+
+    def add(self, day: date, macros: dict[str, Decimal], on_goal: bool) -> None:
+        index = (day - self.origin).days
+        for macro, value in macros.items():
+            self._daily[macro][index] = value
+        self._logged[index] = 1
+        self._on_goal[index] = int(on_goal)
+
+    def freeze(self) -> None:
+        self.sums = {
+            macro: list(accumulate(values, initial=Decimal("0")))
+            for macro, values in self._daily.items()
+        }
+        self.logged = list(accumulate(self._logged, initial=0))
+        self.on_goal = list(accumulate(self._on_goal, initial=0))
+
+    def span(self, first: date, last: date) -> tuple[int, int]:
+        return (first - self.origin).days, (last - self.origin).days + 1
+
+
+def nutrition_trends(
+    user_id: int,
+    start: date,
+    end: date,
+    bucket: str,
+    window: int,
+    goal_kcal: int | None,
+) -> dict[str, Any]:
+    """Per-bucket totals, daily and rolling averages and goal adherence.
+
+    Averages are per logged day (days with at least one entry); the rolling
+    average spans the ``window`` buckets ending with each bucket. A logged day
+    is on goal when its kcal is within ``NUTRITION_GOAL_TOLERANCE`` of the goal.
+    """
+    origin = _origin(start, bucket, window)
+    axis = _DayAxis(origin, end)
+    goal = Decimal(goal_kcal) if goal_kcal else None
+    tolerance = goal * Decimal(str(settings.NUTRITION_GOAL_TOLERANCE)) if goal else None
+    rows = DailyNutritionSummary.objects.filter(
+        user_id=user_id, date__range=(origin, end), entry_count__gt=0
+    ).values_list("date", *MACRO_COLUMNS)
+    for day, *values in rows:
+        macros = dict(zip(MACRO_COLUMNS, values, strict=True))
+        on_goal = goal is not None and abs(macros["kcal"] - goal) <= tolerance
+        axis.add(day, macros, on_goal)
+    axis.freeze()
+
+    series = []
+    cursor = bucket_start(start, bucket)
+    while cursor <= end:
+        following = next_bucket(cursor, bucket)
+        first, last = max(cursor, start), min(following - timedelta(days=1), end)
+        point = _point(axis, first, last, goal is not None)
+        rolling = axis.span(previous_bucket(cursor, bucket, window - 1), last)
+        point["rolling_average"] = _average(axis, *rolling)
+        series.append(point)
+        cursor = following
+    return {
+        "start": start,
+        "end": end,
+        "bucket": bucket,
+        "window": window,
+        "goal_kcal": goal_kcal,
+        "overall": _point(axis, start, end, goal is not None),
+        "series": series,
+    }
+
+
+def _point(axis: _DayAxis, first: date, last: date, has_goal: bool) -> dict[str, Any]:
+    low, high = axis.span(first, last)
+    logged = axis.logged[high] - axis.logged[low]
+    on_goal = axis.on_goal[high] - axis.on_goal[low]
+    return {
+        "start": first,
+        "end": last,
+        "days": high - low,
+        "logged_days": logged,
+        "totals": {
+            macro: serialize_decimal(sums[high] - sums[low])
+            for macro, sums in axis.sums.items()
+        },
+        "daily_average": _average(axis, low, high),
+        "days_on_goal": on_goal if has_goal else None,
+        "adherence": round(on_goal / logged, 4) if has_goal and logged else None,
+    }
+
+
+def _average(axis: _DayAxis, low: int, high: int) -> dict[str, float] | None:
+    logged = axis.logged[high] - axis.logged[low]
+    if not logged:
+        return None
+    return {
+        macro: serialize_decimal((sums[high] - sums[low]) / logged)
+        for macro, sums in axis.sums.items()
+    }
+
+
+def trends_cache_key(
+    user_id: int,
+    start: date,
+    end: date,
+    bucket: str,
+    window: int,
+    goal_kcal: int | None,
+) -> str:
+    """Cache key of ``nutrition_trends`` for these arguments.
+
+    Summary rows are never deleted and every change bumps their ``version``,
+    so the row count and version sum over the range read by
+    ``nutrition_trends`` change whenever its result can.
+    """
+    stamp = DailyNutritionSummary.objects.filter(
+        user_id=user_id, date__range=(_origin(start, bucket, window), end)
+    ).aggregate(rows=Count("id"), versions=Sum("version"))
+    return (
+        f"{KEY_PREFIX}:{user_id}:{stamp['rows']}:{stamp['versions'] or 0}:"
+        f"{start}:{end}:{bucket}:{window}:{goal_kcal}"
+    )
+
+
+def _origin(start: date, bucket: str, window: int) -> date:
+    """First day the rolling window of the first bucket reaches back to."""
+    return previous_bucket(bucket_start(start, bucket), bucket, window - 1)
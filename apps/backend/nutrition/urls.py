@@ -1,8 +1,19 @@
 from django.urls import path
 
-from nutrition.views import MealEntryCreateView, NutritionDayView
+from nutrition.views import (
+    MealEntryBulkCreateView,
+    MealEntryCreateView,
+    MealEntryDetailView,
+    NutritionChangesView,
+    NutritionDayView,
+    NutritionSummaryView,
+)
 
 urlpatterns = [
     path("entries", MealEntryCreateView.as_view()),
+    path("entries/bulk", MealEntryBulkCreateView.as_view()),
+    path("entries/<int:pk>", MealEntryDetailView.as_view()),
+    path("changes", NutritionChangesView.as_view()),
     path("day", NutritionDayView.as_view()),
+    path("summary", NutritionSummaryView.as_view()),
 ]
@@ -1,6 +1,14 @@
+from collections.abc import Iterable, Sequence
 from decimal import Decimal, ROUND_HALF_UP
+from operator import mul
 
 from foods.models import FoodItem
+from nutrition.models import MACRO_COLUMNS
+
+# Fixed-point macros: per-100 g values and quantities are stored with two
+# decimal places, so in centi-units their product is the macro in micro-units
+# (value * quantity / 100 == value_c * quantity_c / 10**6), exactly.
+MICROS_PER_CENT = 10_000
 
 
 def _decimal_or_zero(value: Decimal | None) -> Decimal:
@@ -19,3 +27,54 @@ def calculate_macros(item: FoodItem, quantity_g: Decimal | None) -> dict[str, De
 
 def serialize_decimal(value: Decimal) -> float:
     return float(value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+
+
+def to_centi(value: Decimal | None) -> int:
+    """``value`` in hundredths, rounded half up like the two-decimal columns
+    it is read from (stored values convert exactly)."""
+    if value is None:
+        return 0
+    scaled = value * 100
+    centi = int(scaled)
+    if centi != scaled:
+        centi = int(scaled.quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    return centi
+
+
+def calculate_macro_micros(
+    item: FoodItem, quantity_g: Decimal | None
+) -> dict[str, int]:
+    """Integer fixed-point ``calculate_macros``: each macro in millionths."""
+    quantity = to_centi(quantity_g)
+    return {
+        macro: to_centi(getattr(item, field)) * quantity
+        for macro, field in MACRO_COLUMNS.items()
+    }
+
+
+def calculate_macros_many(rows: Iterable[Sequence[int]]) -> dict[str, int]:
+    """Total many entries' macros, in millionths, in one pass per macro.
+
+    ``rows`` are ``(quantity, kcal, protein, carbs, fat)`` in hundredths (per
+    100 g for the macros), e.g. from ``MealEntryQuerySet.macro_centis``. The
+    columns are transposed once and each total is an integer dot product, so
+    the result is exact.
+    """
+    columns = list(zip(*rows, strict=True)) or [()] * (len(MACRO_COLUMNS) + 1)
+    quantities, *per_100g = columns
+    return {
+        macro: sum(map(mul, column, quantities))
+        for macro, column in zip(MACRO_COLUMNS, per_100g, strict=True)
+    }
+
+
+def micros_to_decimal(micros: int) -> Decimal:
+    return Decimal(micros).scaleb(-6)
+
+
+def serialize_micros(micros: int) -> float:
+    """``serialize_decimal`` for a value in millionths: ROUND_HALF_UP to 0.01."""
+    cents, remainder = divmod(abs(micros), MICROS_PER_CENT)
+    if remainder * 2 >= MICROS_PER_CENT:
+        cents += 1
+    return (-cents if micros < 0 else cents) / 100
@@ -1,8 +1,12 @@
-from datetime import date
-from decimal import Decimal
+from datetime import date, timedelta
+from typing import Any
 
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponseBase
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import status
@@ -11,13 +15,38 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from nutrition.bulk import create_meal_entries
+from nutrition.changes import decode_cursor, encode_cursor, entry_changes
 from nutrition.models import MealEntry
+from nutrition.rendering import MealEntryRenderer
 from nutrition.serializers import (
+    MealEntryBulkCreateSerializer,
+    MealEntryBulkRequestSerializer,
+    MealEntryBulkResponseSerializer,
     MealEntryCreateSerializer,
     MealEntrySerializer,
+    NutritionChangesSerializer,
     NutritionDaySerializer,
+    NutritionTrendsSerializer,
 )
-from nutrition.utils import calculate_macros, serialize_decimal
+from nutrition.summaries import day_etag, day_foods_updated_at, day_summary
+from nutrition.trends import (
+    BUCKET_DAY,
+    BUCKETS,
+    DEFAULT_WINDOWS,
+    MAX_WINDOW,
+    nutrition_trends,
+    trends_cache_key,
+)
+from nutrition.utils import (
+    calculate_macros_many,
+    micros_to_decimal,
+    serialize_decimal,
+)
+from preferences.models import UserPreferences
+
+CHANGES_DEFAULT_LIMIT = 500
+CHANGES_MAX_LIMIT = 1000
 
 
 class MealEntryCreateView(APIView):
@@ -41,6 +70,102 @@ class MealEntryCreateView(APIView):
         return Response(output.data, status=status.HTTP_201_CREATED)
 
 
+class MealEntryBulkCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=MealEntryBulkRequestSerializer,
+        responses={
+            200: MealEntryBulkResponseSerializer,
+            400: OpenApiResponse(description="Invalid payload"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+    )
+    def post(self, request: Request) -> Response:
+        serializer = MealEntryBulkCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = create_meal_entries(
+            request.user, serializer.validated_data["entries"]
+        )
+        return Response({"results": results})
+
+
+class MealEntryDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        responses={
+            204: OpenApiResponse(description="Deleted"),
+            401: OpenApiResponse(description="Unauthorized"),
+            404: OpenApiResponse(description="Not found"),
+        },
+    )
+    def delete(self, request: Request, pk: int) -> Response:
+        entry = MealEntry.objects.filter(user=request.user, pk=pk).first()
+        if entry is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        entry.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class NutritionChangesView(APIView):
+    """Meal entries created, updated or deleted since ``since``.
+
+    Clients store the returned ``cursor`` and pass it back; while ``has_more``
+    is true they fetch again straight away.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="since",
+                type=OpenApiTypes.STR,
+                required=False,
+                description="Cursor from the previous response (omit to start).",
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                required=False,
+                description=(
+                    f"Changes per page (default {CHANGES_DEFAULT_LIMIT}, "
+                    f"max {CHANGES_MAX_LIMIT})."
+                ),
+            ),
+        ],
+        responses={
+            200: NutritionChangesSerializer,
+            400: OpenApiResponse(description="Invalid cursor"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+    )
+    def get(self, request: Request) -> Response:
+        since_raw = request.query_params.get("since")
+        try:
+            since = decode_cursor(since_raw) if since_raw else None
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get("limit", CHANGES_DEFAULT_LIMIT))
+        except ValueError:
+            limit = CHANGES_DEFAULT_LIMIT
+        limit = max(1, min(limit, CHANGES_MAX_LIMIT))
+
+        assert isinstance(request.user, User)
+        page = entry_changes(request.user.id, since, limit)
+        serializer = NutritionChangesSerializer(
+            {
+                "entries": page.entries,
+                "deleted": page.deleted,
+                "cursor": encode_cursor(page.cursor) if page.cursor else None,
+                "has_more": page.has_more,
+            }
+        )
+        return Response(serializer.data)
+
+
 class NutritionDayView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -55,6 +180,7 @@ class NutritionDayView(APIView):
         ],
         responses={
             200: NutritionDaySerializer,
+            304: OpenApiResponse(description="Not modified (If-None-Match)"),
             400: OpenApiResponse(description="Invalid date"),
             401: OpenApiResponse(description="Unauthorized"),
         },
@@ -74,33 +200,42 @@ class NutritionDayView(APIView):
 
         assert isinstance(request.user, User)
         user = request.user
-        entries = (
-            MealEntry.objects.filter(user=user, consumed_at__date=target_date)
-            .select_related("food_item")
-            .order_by("consumed_at")
+        summary = day_summary(user.id, target_date)
+        # The summary's version also moves when a logged food changes (see
+        # nutrition.summaries), so a 304 reads that one row. Days last written
+        # before summaries existed have none and fall back to their foods.
+        foods_updated_at = (
+            day_foods_updated_at(user.id, target_date) if summary is None else None
         )
+        etag = day_etag(user.id, target_date, summary, foods_updated_at)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return _with_validators(not_modified, etag)
 
-        meals: dict[str, list[MealEntry]] = {
+        day_entries = MealEntry.objects.filter(user=user, consumed_at__date=target_date)
+        meals: dict[str, list[dict[str, Any]]] = {
             MealEntry.MEAL_BREAKFAST: [],
             MealEntry.MEAL_LUNCH: [],
             MealEntry.MEAL_DINNER: [],
             MealEntry.MEAL_SNACKS: [],
         }
-        totals = {
-            "kcal": Decimal("0"),
-            "protein_g": Decimal("0"),
-            "carbs_g": Decimal("0"),
-            "fat_g": Decimal("0"),
-        }
+        # Same output as NutritionDaySerializer, which renders the nested
+        # foods without a request (relative image URLs).
+        renderer = MealEntryRenderer()
+        for row in day_entries.entry_rows().order_by("consumed_at"):
+            meals[row[1]].append(renderer.render(row))
 
-        for entry in entries:
-            meals[entry.meal_type].append(entry)
-            macros = calculate_macros(entry.food_item, entry.quantity_g)
-            for key, value in macros.items():
-                totals[key] += value
+        if summary is not None:
+            totals = summary.totals
+        else:
+            # No write since summaries were introduced: total the entries.
+            micros = calculate_macros_many(day_entries.macro_centis())
+            totals = {
+                macro: micros_to_decimal(value) for macro, value in micros.items()
+            }
 
         response_data = {
-            "date": target_date,
+            "date": target_date.isoformat(),
             "totals": {key: serialize_decimal(value) for key, value in totals.items()},
             "meals": {
                 "breakfast": meals[MealEntry.MEAL_BREAKFAST],
@@ -109,5 +244,103 @@ class NutritionDayView(APIView):
                 "snacks": meals[MealEntry.MEAL_SNACKS],
             },
         }
-        serializer = NutritionDaySerializer(response_data)
-        return Response(serializer.data)
+        return _with_validators(Response(response_data), etag)
+
+
+class NutritionSummaryView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="from",
+                type=OpenApiTypes.DATE,
+                required=False,
+                description="First day (defaults to 29 days before `to`).",
+            ),
+            OpenApiParameter(
+                name="to",
+                type=OpenApiTypes.DATE,
+                required=False,
+                description="Last day (defaults to today).",
+            ),
+            OpenApiParameter(
+                name="bucket",
+                type=OpenApiTypes.STR,
+                enum=BUCKETS,
+                required=False,
+                description="Series granularity (defaults to day).",
+            ),
+            OpenApiParameter(
+                name="window",
+                type=OpenApiTypes.INT,
+                required=False,
+                description=(
+                    "Buckets in the rolling average (defaults to 7 days, "
+                    "4 weeks or 3 months)."
+                ),
+            ),
+        ],
+        responses={
+            200: NutritionTrendsSerializer,
+            400: OpenApiResponse(description="Invalid range or options"),
+            401: OpenApiResponse(description="Unauthorized"),
+        },
+    )
+    def get(self, request: Request) -> Response:
+        params = request.query_params
+        try:
+            end = _parse_date(params.get("to")) or timezone.localdate()
+            start = _parse_date(params.get("from")) or end - timedelta(days=29)
+        except ValueError:
+            return Response(
+                {"detail": "Invalid date format. Use YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        max_days = settings.NUTRITION_SUMMARY_MAX_DAYS
+        if start > end or (end - start).days >= max_days:
+            return Response(
+                {"detail": f"`from` must not be after `to`, at most {max_days} days."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        bucket = params.get("bucket", BUCKET_DAY)
+        if bucket not in BUCKETS:
+            return Response(
+                {"detail": f"bucket must be one of: {', '.join(BUCKETS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            window = int(params.get("window", DEFAULT_WINDOWS[bucket]))
+        except ValueError:
+            window = 0
+        if not 1 <= window <= MAX_WINDOW:
+            return Response(
+                {"detail": f"window must be between 1 and {MAX_WINDOW}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        assert isinstance(request.user, User)
+        user = request.user
+        goal = (
+            UserPreferences.objects.filter(user=user)
+            .values_list("daily_calorie_goal", flat=True)
+            .first()
+        )
+        key = trends_cache_key(user.id, start, end, bucket, window, goal)
+        data = cache.get(key)
+        if data is None:
+            trends = nutrition_trends(user.id, start, end, bucket, window, goal)
+            data = NutritionTrendsSerializer(trends).data
+            cache.set(key, data, settings.NUTRITION_SUMMARY_CACHE_TTL)
+        return Response(data)
+
+
+def _parse_date(value: str | None) -> date | None:
+    return date.fromisoformat(value) if value else None
+
+
+def _with_validators(response: HttpResponseBase, etag: str) -> HttpResponseBase:
+    response["ETag"] = etag
+    # Cached copies must be revalidated; the ETag makes that a cheap 304.
+    response["Cache-Control"] = "private, no-cache"
+    return response
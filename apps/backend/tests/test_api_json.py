@@ -0,0 +1,111 @@
+import io
+import uuid
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils.functional import lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from config.parsers import ORJSONParser
+from config.renderers import ORJSONRenderer, PreEncodedJSON
+from foods.models import FoodItem
+
+PAYLOAD = {
+    "id": 7,
+    "name": "Skyr\u2028line\u2029sep — üñí",
+    "errors": {"name": [ErrorDetail("Required.", code="required")]},
+    "consumed_at": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=UTC),
+    "naive": datetime(2026, 1, 2, 3, 4, 5),
+    "day": date(2026, 1, 2),
+    "elapsed": timedelta(seconds=90),
+    "kcal": Decimal("12.50"),
+    "key": uuid.UUID(int=1),
+    "label": lazy(lambda: "lazy", str)(),
+    "pairs": ((1, 2.5), [None, True]),
+    "by_id": {1: "one"},
+}
+
+
+def test_renderer_matches_drf_json_renderer() -> None:
+    assert ORJSONRenderer().render(PAYLOAD) == JSONRenderer().render(PAYLOAD)
+    assert ORJSONRenderer().render(None) == b""
+
+
+def test_renderer_falls_back_for_indent_and_wide_integers() -> None:
+    renderer = ORJSONRenderer()
+    indented = "application/json; indent=2"
+    assert renderer.render(PAYLOAD, indented) == JSONRenderer().render(
+        PAYLOAD, indented
+    )
+    wide = {"id": 2**70}
+    assert renderer.render(wide) == JSONRenderer().render(wide)
+
+
+def test_pre_encoded_json_is_spliced_or_decoded() -> None:
+    document = PreEncodedJSON('{"product":{"name":"Äpfel\u2028"}}'.encode())
+    expected = JSONRenderer().render({"raw": {"product": {"name": "Äpfel\u2028"}}})
+
+    assert ORJSONRenderer().render({"raw": document}) == expected
+    assert JSONRenderer().render({"raw": document}) == expected
+
+
+def test_non_finite_numbers_are_rejected_like_json_renderer() -> None:
+    for data in (
+        {"fat_g": float("nan")},
+        {"nutriments": [None, {"salt": float("-inf")}]},
+        {"raw": PreEncodedJSON(b'{"n":[1.5,Infinity]}')},
+    ):
+        with pytest.raises(ValueError, match="not JSON compliant"):
+            JSONRenderer().render(data)
+        with pytest.raises(ValueError, match="not JSON compliant"):
+            ORJSONRenderer().render(data)
+
+    # The tokens inside strings are not numbers.
+    document = PreEncodedJSON(b'{"name":"NaN","note":"Infinity","fat":null}')
+    expected = b'{"raw":{"name":"NaN","note":"Infinity","fat":null}}'
+    assert ORJSONRenderer().render({"raw": document}) == expected
+
+
+def test_parser_reads_json_and_rejects_invalid_bodies() -> None:
+    parser = ORJSONParser()
+    assert parser.parse(io.BytesIO('{"a": [1, "ü"]}'.encode())) == {"a": [1, "ü"]}
+    latin = {"encoding": "latin-1"}
+    assert parser.parse(io.BytesIO('{"a": "é"}'.encode("latin-1")), None, latin) == {
+        "a": "é"
+    }
+    for body in (b'{"a": NaN}', b"{", b""):
+        with pytest.raises(ParseError, match="JSON parse error"):
+            parser.parse(io.BytesIO(body))
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_food_detail_passes_stored_source_document_through() -> None:
+    user = User.objects.create_user(username="json", password="Str0ngPass!word")
+    client = APIClient()
+    client.force_authenticate(user)
+    document = {"product": {"product_name": "Crème\u2028", "nutriments": [1.5, 2]}}
+    item = FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="json-1",
+        barcode="json-1",
+        name="Crème",
+        raw_source_json=document,
+    )
+
+    response = client.post(
+        "/api/v1/foods/check",
+        {"external_id": "json-1", "content_hash": "x"},
+        format="json",
+    )
+    assert response.json()["exists"] is True
+    response = client.get(f"/api/v1/foods/{item.id}?fields=id,raw_source_json")
+
+    assert response.status_code == 200
+    assert response.content == JSONRenderer().render(
+        {"id": item.id, "raw_source_json": document}
+    )
@@ -0,0 +1,265 @@
+import json
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from foods.barcode import LEASE_KEY_PREFIX, UpstreamError, lookup_barcode
+from foods.models import FoodImageJob, FoodItem
+
+PRODUCTS = {
+    "4000000000017": {
+        "code": "4000000000017",
+        "product_name": "Upstream Oats",
+        "brands": "Mill",
+        "nutriments": {"energy-kcal_100g": 372, "proteins_100g": 13.5},
+        "image_front_url": "https://images.example.org/oats.400.jpg",
+        "image_front_thumb_url": "https://images.example.org/oats.100.jpg",
+    },
+    "0041196910759": {
+        "code": "0041196910759",
+        "product_name": "Upstream Cola",
+        "nutriments": {"energy-kcal_100g": 42},
+    },
+}
+
+
+class _ProductHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        self.server.paths.append(self.path)  # type: ignore[attr-defined]
+        self.server.user_agents.append(self.headers["User-Agent"])  # type: ignore[attr-defined]
+        # Like OFF, answer shorter codes under their 13-digit EAN form.
+        code = urlsplit(self.path).path.rsplit("/", 1)[-1].zfill(13)
+        if code.startswith("5"):
+            self._respond(500, {"status": "failure"})
+        elif code in PRODUCTS:
+            self._respond(200, {"code": code, "status": 1, "product": PRODUCTS[code]})
+        else:
+            self._respond(404, {"code": code, "status": 0})
+
+    def _respond(self, status: int, document: dict[str, object]) -> None:
+        body = json.dumps(document).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def upstream(tmp_path: Path) -> Iterator[ThreadingHTTPServer]:
+    """A local stand-in for the OFF product endpoint that records requests."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ProductHandler)
+    server.paths = []  # type: ignore[attr-defined]
+    server.user_agents = []  # type: ignore[attr-defined]
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    # A file cache is visible to every process, like the deployed dbcache.
+    shared_caches = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    }
+    with override_settings(
+        FOODS_OFF_BASE_URL=base_url,
+        CACHES=shared_caches,
+        OFF_USER_AGENT="NutritionTest/1.0",
+    ):
+        cache.clear()
+        try:
+            yield server
+        finally:
+            cache.clear()
+            server.shutdown()
+            server.server_close()
+
+
+def _auth_client() -> APIClient:
+    user = get_user_model().objects.create_user(
+        username="barcodeuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_code_the_upstream_normalizes_is_then_served_locally(
+    upstream: ThreadingHTTPServer,
+) -> None:
+    client = _auth_client()
+
+    first = client.get("/api/v1/foods/barcode/041196910759")
+    second = client.get("/api/v1/foods/barcode/041196910759")
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.json()["id"] == second.json()["id"]
+    assert first.json()["barcode"] == "0041196910759"
+    assert len(upstream.paths) == 1  # type: ignore[attr-defined]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_barcode_miss_is_fetched_ingested_and_then_served_locally(
+    upstream: ThreadingHTTPServer,
+) -> None:
+    client = _auth_client()
+
+    first = client.get("/api/v1/foods/barcode/4000000000017")
+    second = client.get("/api/v1/foods/barcode/4000000000017")
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.json()["id"] == second.json()["id"]
+    assert first.json()["name"] == "Upstream Oats"
+    assert first.json()["kcal_100g"] == "372.00"
+    assert len(upstream.paths) == 1  # type: ignore[attr-defined]
+    path = upstream.paths[0]  # type: ignore[attr-defined]
+    assert path.startswith("/api/v2/product/4000000000017?fields=code%2C")
+    assert upstream.user_agents == ["NutritionTest/1.0"]  # type: ignore[attr-defined]
+
+    item = FoodItem.objects.get(barcode="4000000000017")
+    assert item.source == FoodItem.SOURCE_OPEN_FOOD_FACTS
+    assert item.raw_source_json["product"]["product_name"] == "Upstream Oats"
+    assert item.image_signature == "oats"
+    assert FoodImageJob.objects.filter(food_item=item).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_unknown_barcode_is_negative_cached(upstream: ThreadingHTTPServer) -> None:
+    client = _auth_client()
+
+    first = client.get("/api/v1/foods/barcode/4000000000024")
+    second = client.get("/api/v1/foods/barcode/4000000000024")
+
+    assert first.status_code == 404
+    assert second.status_code == 404
+    assert len(upstream.paths) == 1  # type: ignore[attr-defined]
+    assert not FoodItem.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_upstream_failure_is_a_bad_gateway_and_not_cached(
+    upstream: ThreadingHTTPServer,
+) -> None:
+    client = _auth_client()
+
+    first = client.get("/api/v1/foods/barcode/5000000000015")
+    second = client.get("/api/v1/foods/barcode/5000000000015")
+
+    assert first.status_code == 502
+    assert first.json() == {"detail": "Product lookup is temporarily unavailable."}
+    assert second.status_code == 502
+    assert len(upstream.paths) == 2  # type: ignore[attr-defined]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_non_numeric_barcodes_are_not_looked_up(upstream: ThreadingHTTPServer) -> None:
+    client = _auth_client()
+
+    response = client.get("/api/v1/foods/barcode/not-a-code")
+
+    assert response.status_code == 404
+    assert upstream.paths == []  # type: ignore[attr-defined]
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.integration
+def test_concurrent_misses_share_one_upstream_request(
+    upstream: ThreadingHTTPServer,
+) -> None:
+    entered, release = threading.Event(), threading.Event()
+    calls = []
+
+    def fetch(barcode: str) -> dict[str, object]:
+        calls.append(barcode)
+        entered.set()
+        release.wait(5)
+        return {"code": barcode, "status": 1, "product": PRODUCTS[barcode]}
+
+    results = []
+
+    def lookup() -> None:
+        results.append(lookup_barcode("4000000000017"))
+
+    with patch("foods.barcode.fetch_product", side_effect=fetch):
+        leader = threading.Thread(target=lookup)
+        leader.start()
+        assert entered.wait(5)
+        followers = [threading.Thread(target=lookup) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        time.sleep(0.2)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+
+    item = FoodItem.objects.get(barcode="4000000000017")
+    assert results == [item.id] * 4
+    assert calls == ["4000000000017"]
+    assert cache.get(f"{LEASE_KEY_PREFIX}:4000000000017") is None
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_lookup_leased_by_another_process_is_awaited(
+    upstream: ThreadingHTTPServer,
+) -> None:
+    # Another worker holds the lease and finds that the product is unknown.
+    cache.add(f"{LEASE_KEY_PREFIX}:4000000000024", "other", 30)
+    timer = threading.Timer(
+        0.2, lambda: cache.set("foods:barcode:miss:4000000000024", True)
+    )
+    timer.start()
+
+    assert lookup_barcode("4000000000024") is None
+
+    timer.join()
+    assert upstream.paths == []  # type: ignore[attr-defined]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_failed_lookup_of_another_process_is_an_upstream_error(
+    upstream: ThreadingHTTPServer,
+) -> None:
+    lease_key = f"{LEASE_KEY_PREFIX}:4000000000017"
+    cache.add(lease_key, "other", 30)
+    timer = threading.Timer(0.2, lambda: cache.delete(lease_key))
+    timer.start()
+
+    with pytest.raises(UpstreamError):
+        lookup_barcode("4000000000017")
+
+    timer.join()
+    assert upstream.paths == []  # type: ignore[attr-defined]
+    # The next caller asks the upstream itself.
+    assert lookup_barcode("4000000000017") is not None
@@ -1,7 +1,9 @@
 import pytest
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
 from foods.models import FoodItem
@@ -100,3 +102,115 @@ def test_foods_check_returns_not_up_to_date_when_images_missing() -> None:
     assert response.data["up_to_date"] is False
     assert response.data["images_ok"] is False
     assert response.data["food_item_id"] == item.id
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_foods_check_batch_resolves_keys_with_one_query(tmp_path) -> None:
+    client = _auth_client()
+    with override_settings(MEDIA_ROOT=tmp_path):
+        fresh = FoodItem.objects.create(
+            source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+            external_id="1",
+            barcode="1",
+            name="Fresh",
+            content_hash="hash-1",
+            image_signature="sig-1",
+            image_status=FoodItem.IMAGE_STATUS_OK,
+            raw_source_json={},
+        )
+        fresh.image_large.save("1_large.jpg", ContentFile(b"large"), save=False)
+        fresh.image_small.save("1_small.jpg", ContentFile(b"small"), save=False)
+        fresh.save()
+        stale = FoodItem.objects.create(
+            source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+            external_id="2",
+            barcode="2",
+            name="Stale",
+            content_hash="hash-2",
+            raw_source_json={},
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                "/api/v1/foods/check/batch",
+                {
+                    "items": [
+                        {
+                            "external_id": "2",
+                            "content_hash": "hash-2",
+                        },
+                        {
+                            "external_id": "1",
+                            "content_hash": "hash-1",
+                            "image_signature": "sig-1",
+                        },
+                        {"external_id": "1", "content_hash": "other"},
+                        {"external_id": "missing", "content_hash": "hash-3"},
+                    ]
+                },
+                format="json",
+            )
+
+    assert response.status_code == 200
+    assert response.data["results"] == [
+        {
+            "source": "openfoodfacts",
+            "external_id": "2",
+            "exists": True,
+            "up_to_date": False,
+            "food_item_id": stale.id,
+            "images_ok": False,
+        },
+        {
+            "source": "openfoodfacts",
+            "external_id": "1",
+            "exists": True,
+            "up_to_date": True,
+            "food_item_id": fresh.id,
+            "images_ok": True,
+        },
+        {
+            "source": "openfoodfacts",
+            "external_id": "1",
+            "exists": True,
+            "up_to_date": False,
+            "food_item_id": fresh.id,
+            "images_ok": True,
+        },
+        {
+            "source": "openfoodfacts",
+            "external_id": "missing",
+            "exists": False,
+            "up_to_date": False,
+            "food_item_id": None,
+            "images_ok": False,
+        },
+    ]
+    food_queries = [
+        query["sql"]
+        for query in queries.captured_queries
+        if "foods_fooditem" in query["sql"]
+    ]
+    assert len(food_queries) == 1
+    assert "raw_source_json" not in food_queries[0]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_foods_check_batch_rejects_oversized_batches() -> None:
+    client = _auth_client()
+
+    response = client.post(
+        "/api/v1/foods/check/batch",
+        {
+            "items": [
+                {"external_id": str(index), "content_hash": "hash"}
+                for index in range(501)
+            ]
+        },
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert "items" in response.data
@@ -0,0 +1,110 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+
+
+def _auth_client() -> APIClient:
+    user = get_user_model().objects.create_user(
+        username="detailuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client
+
+
+def _food_item() -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="8001",
+        barcode="8001",
+        name="Detail Bar",
+        brands="Detail Brand",
+        kcal_100g=Decimal("410"),
+        content_hash="hash-1",
+        image_signature="front.1",
+        raw_source_json={"product": {"product_name": "Detail Bar"}},
+        nutriments_json={"energy-kcal_100g": 410},
+    )
+
+
+def _food_item_queries(queries: CaptureQueriesContext) -> list[str]:
+    return [query["sql"] for query in queries if "foods_fooditem" in query["sql"]]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_detail_by_id_and_barcode_returns_full_item() -> None:
+    client = _auth_client()
+    item = _food_item()
+
+    by_id = client.get(f"/api/v1/foods/{item.id}")
+    by_barcode = client.get("/api/v1/foods/barcode/8001")
+
+    assert by_id.status_code == 200
+    assert by_id.json() == by_barcode.json()
+    assert by_id.json()["raw_source_json"] == item.raw_source_json
+    assert by_id.json()["image_url"] is None
+    assert by_id["ETag"] == by_barcode["ETag"]
+    assert "private" in by_id["Cache-Control"]
+    assert "public" not in by_id["Cache-Control"]
+    assert "max-age=300" in by_id["Cache-Control"]
+    assert client.get("/api/v1/foods/barcode/missing").status_code == 404
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_sparse_fieldset_skips_heavy_columns() -> None:
+    client = _auth_client()
+    item = _food_item()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/api/v1/foods/{item.id}?fields=name,kcal_100g,id")
+
+    assert response.status_code == 200
+    assert response.data == {"id": item.id, "name": "Detail Bar", "kcal_100g": "410.00"}
+    (sql,) = _food_item_queries(queries)
+    assert "raw_source_json" not in sql
+    assert "nutriments_json" not in sql
+
+    full = client.get(f"/api/v1/foods/{item.id}")
+    assert full["ETag"] != response["ETag"]
+
+    invalid = client.get(f"/api/v1/foods/{item.id}?fields=name,secret")
+    assert invalid.status_code == 400
+    assert "secret" in invalid.data["detail"]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_if_none_match_returns_304_until_content_changes() -> None:
+    client = _auth_client()
+    item = _food_item()
+    url = f"/api/v1/foods/{item.id}"
+    etag = client.get(url)["ETag"]
+
+    with CaptureQueriesContext(connection) as queries:
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert not_modified.status_code == 304
+    assert not_modified["ETag"] == etag
+    (sql,) = _food_item_queries(queries)
+    assert "raw_source_json" not in sql
+
+    item.content_hash = "hash-2"
+    item.save()
+    changed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert changed.status_code == 200
+    assert changed["ETag"] != etag
@@ -0,0 +1,159 @@
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from PIL import Image
+
+from foods.images import ImageSpool, download_food_images
+from foods.models import FoodItem, ImageBlob
+
+LARGE_URL = "https://images.openfoodfacts.org/front.400.jpg"
+SMALL_URL = "https://images.openfoodfacts.org/front.100.jpg"
+
+
+def _image_bytes(color: str) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (320, 240), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _spooled(content: bytes):
+    """``_fetch_image_file`` stand-in returning a fresh spool of ``content``."""
+
+    def fetch(url: str) -> ImageSpool:
+        spool = ImageSpool()
+        spool.write(content)
+        spool.finish()
+        return spool
+
+    return fetch
+
+
+def _food_item(barcode: str) -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id=barcode,
+        barcode=barcode,
+        name=f"Item {barcode}",
+        raw_source_json={},
+    )
+
+
+def _download(item: FoodItem, source: bytes) -> None:
+    with patch("foods.images._fetch_image_file", side_effect=_spooled(source)):
+        result = download_food_images(item, LARGE_URL, SMALL_URL)
+    assert result.success
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path):
+    with override_settings(MEDIA_ROOT=tmp_path):
+        yield tmp_path
+
+
+def _stored_files(media_root) -> list[str]:
+    return sorted(
+        str(path.relative_to(media_root))
+        for path in media_root.rglob("*")
+        if path.is_file()
+    )
+
+
+@pytest.mark.django_db
+def test_items_with_identical_images_share_blobs(media_root) -> None:
+    first = _food_item("1")
+    second = _food_item("2")
+    source = _image_bytes("red")
+
+    _download(first, source)
+    _download(second, source)
+
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert first.image_large.name == second.image_large.name
+    assert first.image_small_webp_blob_id == second.image_small_webp_blob_id
+    assert first.image_large.name.startswith("foods/blobs/")
+    assert first.image_large.read() == source
+    assert list(ImageBlob.objects.values_list("ref_count", flat=True)) == [2] * 4
+    assert len(_stored_files(media_root)) == 4
+
+
+@pytest.mark.django_db
+def test_unchanged_download_writes_nothing(media_root) -> None:
+    item = _food_item("1")
+    _download(item, _image_bytes("red"))
+    item.refresh_from_db()
+    large_name = item.image_large.name
+
+    with (
+        patch("foods.images.acquire_blob") as acquire,
+        patch("foods.images.generate_variants") as generate,
+        patch("foods.images.typeahead_cache") as cache,
+    ):
+        _download(item, _image_bytes("red"))
+
+    acquire.assert_not_called()
+    generate.assert_not_called()
+    cache.invalidate.assert_not_called()
+    item.refresh_from_db()
+    assert item.image_large.name == large_name
+    assert item.image_status == FoodItem.IMAGE_STATUS_OK
+    assert list(ImageBlob.objects.values_list("ref_count", flat=True)) == [1] * 4
+
+
+@pytest.mark.django_db
+def test_changed_images_release_previous_blobs(media_root) -> None:
+    first = _food_item("1")
+    second = _food_item("2")
+    _download(first, _image_bytes("red"))
+    _download(second, _image_bytes("red"))
+    first.refresh_from_db()
+    red_blob_ids = {
+        first.image_large_blob_id,
+        first.image_small_blob_id,
+        first.image_large_webp_blob_id,
+        first.image_small_webp_blob_id,
+    }
+
+    _download(first, _image_bytes("blue"))
+
+    assert set(
+        ImageBlob.objects.filter(pk__in=red_blob_ids).values_list(
+            "ref_count", flat=True
+        )
+    ) == {1}
+    second.refresh_from_db()
+    assert second.image_large.read() == _image_bytes("red")
+
+    _download(second, _image_bytes("blue"))
+
+    assert not ImageBlob.objects.filter(pk__in=red_blob_ids).exists()
+    assert len(_stored_files(media_root)) == 4
+    assert list(ImageBlob.objects.values_list("ref_count", flat=True)) == [2] * 4
+
+
+@pytest.mark.django_db
+def test_deleting_item_releases_blobs(media_root) -> None:
+    first = _food_item("1")
+    second = _food_item("2")
+    _download(first, _image_bytes("red"))
+    _download(second, _image_bytes("blue"))
+
+    first.delete()
+
+    assert ImageBlob.objects.count() == 4
+    assert len(_stored_files(media_root)) == 4
+
+
+@pytest.mark.django_db
+def test_legacy_per_item_files_are_replaced(media_root) -> None:
+    item = _food_item("1")
+    item.image_large.save("front_large.jpg", ContentFile(b"old"), save=False)
+    item.image_small.save("front_small.jpg", ContentFile(b"old"), save=False)
+    item.save()
+
+    _download(item, _image_bytes("red"))
+
+    assert all(name.startswith("foods/blobs/") for name in _stored_files(media_root))
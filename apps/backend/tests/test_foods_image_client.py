@@ -0,0 +1,160 @@
+import hashlib
+import ipaddress
+import socket
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+
+from foods import images
+
+PUBLIC_IP = "93.184.216.34"
+BODIES = {"/large.jpg": b"L" * 2048, "/small.jpg": b"S" * 256}
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1  # type: ignore[attr-defined]
+
+    def do_GET(self) -> None:
+        if self.path in BODIES:
+            self._respond(200, BODIES[self.path], {"Content-Type": "image/jpeg"})
+        elif self.path == "/redirect":
+            self._respond(302, b"", {"Location": "/small.jpg"})
+        elif self.path == "/private-redirect":
+            self._respond(302, b"", {"Location": "http://10.0.0.1/small.jpg"})
+        else:
+            self._respond(200, b"<html></html>", {"Content-Type": "text/html"})
+
+    def _respond(self, status: int, body: bytes, headers: dict[str, str]) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def image_server() -> Iterator[ThreadingHTTPServer]:
+    """Serve images for ``images.example.org``, which resolves to a public IP
+    whose connections are routed to a local server."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+    server.connections = 0  # type: ignore[attr-defined]
+    server.resolutions = 0  # type: ignore[attr-defined]
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    real_resolve = images._resolve_host_addresses
+    real_connect = socket.create_connection
+
+    def resolve(hostname: str):
+        if hostname != "images.example.org":
+            return real_resolve(hostname)
+        server.resolutions += 1  # type: ignore[attr-defined]
+        return [ipaddress.ip_address(PUBLIC_IP)]
+
+    def connect(address, *args, **kwargs):
+        assert address[0] == PUBLIC_IP
+        return real_connect(server.server_address, *args, **kwargs)
+
+    images._connections.clear()
+    images._resolutions.clear()
+    with (
+        patch("foods.images._resolve_host_addresses", side_effect=resolve),
+        patch("foods.images.socket.create_connection", side_effect=connect),
+    ):
+        yield server
+    images._connections.clear()
+    images._resolutions.clear()
+    server.shutdown()
+    server.server_close()
+
+
+def _fetch(url: str) -> bytes:
+    with images._fetch_image_file(url) as spool:
+        return spool.file.read()
+
+
+def test_fetches_reuse_connection_and_cached_resolution(image_server) -> None:
+    for path in ("/large.jpg", "/small.jpg", "/large.jpg"):
+        content = _fetch(f"http://images.example.org{path}")
+        assert content == BODIES[path]
+
+    assert image_server.connections == 1
+    assert image_server.resolutions == 1
+
+
+@override_settings(FOODS_IMAGE_DNS_TTL_SECONDS=0)
+def test_resolution_is_revalidated_when_ttl_disabled(image_server) -> None:
+    _fetch("http://images.example.org/large.jpg")
+    _fetch("http://images.example.org/large.jpg")
+
+    assert image_server.resolutions == 2
+
+
+def test_follows_redirects_on_same_host(image_server) -> None:
+    content = _fetch("http://images.example.org/redirect")
+
+    assert content == BODIES["/small.jpg"]
+
+
+def test_redirect_to_private_address_is_blocked(image_server) -> None:
+    with pytest.raises(ValueError, match="Blocked image URL host."):
+        _fetch("http://images.example.org/private-redirect")
+
+
+def test_rejects_non_image_responses(image_server) -> None:
+    with pytest.raises(ValueError, match="Unexpected content type"):
+        _fetch("http://images.example.org/page.html")
+
+
+def test_spools_download_to_disk_with_digest(image_server, tmp_path) -> None:
+    with override_settings(FILE_UPLOAD_TEMP_DIR=str(tmp_path)):
+        with images._fetch_image_file("http://images.example.org/large.jpg") as spool:
+            assert spool.name.startswith(str(tmp_path))
+            assert spool.size == len(BODIES["/large.jpg"])
+            assert spool.digest == hashlib.sha256(BODIES["/large.jpg"]).hexdigest()
+            with open(spool.name, "rb") as spooled:
+                assert spooled.read() == BODIES["/large.jpg"]
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rejects_oversized_images(image_server, tmp_path) -> None:
+    with (
+        override_settings(FILE_UPLOAD_TEMP_DIR=str(tmp_path)),
+        patch("foods.images.MAX_IMAGE_BYTES", 1024),
+    ):
+        with pytest.raises(ValueError, match="Image exceeds max size."):
+            _fetch("http://images.example.org/large.jpg")
+
+    # The partial temp file is removed and the partially read connection is
+    # not returned to the pool.
+    assert list(tmp_path.iterdir()) == []
+    _fetch("http://images.example.org/small.jpg")
+    assert image_server.connections == 2
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "http://127.0.0.1/x.jpg",
+        "http://[::1]/x.jpg",
+        "http://169.254.169.254/latest",
+        "ftp://images.example.org/x.jpg",
+    ],
+)
+def test_blocks_non_public_targets(url: str) -> None:
+    with pytest.raises(ValueError):
+        _fetch(url)
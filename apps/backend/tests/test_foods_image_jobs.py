@@ -0,0 +1,262 @@
+import json
+from datetime import timedelta
+from io import BytesIO
+from unittest.mock import patch
+from urllib.error import URLError
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from foods.image_jobs import (
+    ImageJobRequest,
+    claim_image_jobs,
+    enqueue_image_jobs,
+    process_image_jobs,
+    run_image_job,
+)
+from foods.images import ImageSpool
+from foods.models import FoodImageJob, FoodItem
+
+LARGE_URL = "https://images.openfoodfacts.org/front.400.jpg"
+SMALL_URL = "https://images.openfoodfacts.org/front.100.jpg"
+
+
+def _image_bytes() -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (320, 240), "green").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _spooled(content: bytes):
+    """``_fetch_image_file`` stand-in returning a fresh spool of ``content``."""
+
+    def fetch(url: str) -> ImageSpool:
+        spool = ImageSpool()
+        spool.write(content)
+        spool.finish()
+        return spool
+
+    return fetch
+
+
+def _auth_client() -> APIClient:
+    user = get_user_model().objects.create_user(
+        username="imagejobuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client
+
+
+def _food_item(barcode: str = "123") -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id=barcode,
+        barcode=barcode,
+        name="Queued",
+        image_signature="front.1",
+        raw_source_json={},
+    )
+
+
+def _enqueue(item: FoodItem, signature: str = "front.1") -> FoodImageJob:
+    enqueue_image_jobs([ImageJobRequest(item, LARGE_URL, SMALL_URL, signature)])
+    return FoodImageJob.objects.get(food_item=item)
+
+
+@pytest.mark.django_db
+def test_enqueue_resets_existing_job_for_item() -> None:
+    item = _food_item()
+    job = _enqueue(item)
+    FoodImageJob.objects.filter(pk=job.pk).update(
+        status=FoodImageJob.STATUS_FAILED, attempts=5, last_error="boom"
+    )
+
+    job = _enqueue(item, signature="front.2")
+
+    assert FoodImageJob.objects.count() == 1
+    assert job.status == FoodImageJob.STATUS_PENDING
+    assert job.attempts == 0
+    assert job.image_signature == "front.2"
+    assert job.last_error == ""
+
+
+@pytest.mark.django_db
+def test_worker_downloads_images_and_marks_job_done(tmp_path) -> None:
+    item = _food_item()
+    _enqueue(item)
+
+    with override_settings(MEDIA_ROOT=tmp_path):
+        with patch(
+            "foods.images._fetch_image_file", side_effect=_spooled(_image_bytes())
+        ):
+            assert process_image_jobs(workers=1, batch_size=10) == 1
+
+    job = FoodImageJob.objects.get()
+    assert job.status == FoodImageJob.STATUS_DONE
+    assert job.attempts == 1
+    assert job.locked_at is None
+    item.refresh_from_db()
+    assert item.image_status == FoodItem.IMAGE_STATUS_OK
+    assert item.image_downloaded_at is not None
+    assert process_image_jobs(workers=1, batch_size=10) == 0
+
+
+@pytest.mark.django_db
+@override_settings(FOODS_IMAGE_JOB_MAX_ATTEMPTS=2, FOODS_IMAGE_JOB_RETRY_SECONDS=60)
+def test_worker_retries_with_backoff_then_gives_up() -> None:
+    item = _food_item()
+    _enqueue(item)
+
+    with patch("foods.images._fetch_image_file", side_effect=URLError("timeout")):
+        process_image_jobs(workers=1, batch_size=10)
+        job = FoodImageJob.objects.get()
+        assert job.status == FoodImageJob.STATUS_PENDING
+        assert job.available_at > timezone.now() + timedelta(seconds=50)
+        assert "timeout" in job.last_error
+        assert process_image_jobs(workers=1, batch_size=10) == 0
+
+        FoodImageJob.objects.update(available_at=timezone.now())
+        process_image_jobs(workers=1, batch_size=10)
+
+    job = FoodImageJob.objects.get()
+    assert job.status == FoodImageJob.STATUS_FAILED
+    assert job.attempts == 2
+    item.refresh_from_db()
+    assert item.image_status == FoodItem.IMAGE_STATUS_FAILED
+
+
+@pytest.mark.django_db
+def test_missing_urls_fail_without_retry() -> None:
+    item = _food_item()
+    enqueue_image_jobs([ImageJobRequest(item, "", "", "front.1")])
+
+    process_image_jobs(workers=1, batch_size=10)
+
+    job = FoodImageJob.objects.get()
+    assert job.status == FoodImageJob.STATUS_FAILED
+    assert job.last_error == "missing_urls"
+
+
+@pytest.mark.django_db
+def test_job_of_replaced_images_is_closed_without_download() -> None:
+    item = _food_item()
+    _enqueue(item)
+    # Written without a new job, e.g. by a dump import without image jobs.
+    FoodItem.objects.filter(pk=item.pk).update(image_signature="front.2")
+
+    with patch("foods.image_jobs.download_food_images") as download:
+        assert process_image_jobs(workers=1, batch_size=10) == 1
+
+    download.assert_not_called()
+    job = FoodImageJob.objects.get()
+    assert job.status == FoodImageJob.STATUS_FAILED
+    assert job.last_error == "superseded"
+    item.refresh_from_db()
+    assert item.image_status == FoodItem.IMAGE_STATUS_NONE
+
+
+@pytest.mark.django_db
+def test_job_reenqueued_while_running_stays_pending(tmp_path) -> None:
+    item = _food_item()
+    _enqueue(item)
+    (job,) = claim_image_jobs(10)
+
+    _enqueue(item, signature="front.2")
+    with override_settings(MEDIA_ROOT=tmp_path):
+        with patch(
+            "foods.images._fetch_image_file", side_effect=_spooled(_image_bytes())
+        ):
+            run_image_job(job)
+
+    job.refresh_from_db()
+    assert job.status == FoodImageJob.STATUS_PENDING
+    assert job.image_signature == "front.2"
+
+
+@pytest.mark.django_db
+@override_settings(FOODS_IMAGE_JOB_LEASE_SECONDS=60)
+def test_expired_lease_is_claimed_again() -> None:
+    item = _food_item()
+    _enqueue(item)
+    assert len(claim_image_jobs(10)) == 1
+    assert claim_image_jobs(10) == []
+
+    FoodImageJob.objects.update(locked_at=timezone.now() - timedelta(seconds=61))
+
+    (job,) = claim_image_jobs(10)
+    assert job.attempts == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_ingest_returns_without_fetching_and_queues_job() -> None:
+    client = _auth_client()
+    payload = {
+        "source": "openfoodfacts",
+        "external_id": "42",
+        "barcode": "42",
+        "name": "Queued Bar",
+        "image_signature": "front.1",
+        "image_large_url": LARGE_URL,
+        "image_small_url": SMALL_URL,
+        "raw_source_json": {},
+    }
+
+    with patch("foods.images._fetch_image_file") as mock_fetch:
+        response = client.post("/api/v1/foods/ingest", payload, format="json")
+        batch_response = client.generic(
+            "POST",
+            "/api/v1/foods/ingest/batch",
+            json.dumps({**payload, "external_id": "43", "barcode": "43"}),
+            content_type="application/x-ndjson",
+        )
+        b"".join(batch_response.streaming_content)
+
+    assert response.status_code == 200
+    assert mock_fetch.call_count == 0
+    jobs = FoodImageJob.objects.order_by("food_item__barcode")
+    assert [job.food_item.barcode for job in jobs] == ["42", "43"]
+    assert all(job.status == FoodImageJob.STATUS_PENDING for job in jobs)
+    assert jobs[0].large_url == LARGE_URL
+    assert jobs[1].small_url == SMALL_URL
+
+
+class _InlineThread:
+    def __init__(self, target, **kwargs: object) -> None:
+        self.target = target
+
+    def start(self) -> None:
+        self.target()
+
+
+@pytest.mark.django_db
+@override_settings(FOODS_IMAGE_JOBS_IN_PROCESS=True, FOODS_IMAGE_WORKERS=1)
+def test_in_process_mode_drains_the_queue_after_commit(
+    tmp_path, django_capture_on_commit_callbacks
+) -> None:
+    item = _food_item()
+
+    with (
+        override_settings(MEDIA_ROOT=tmp_path),
+        patch("foods.image_jobs.threading.Thread", _InlineThread),
+        patch("foods.image_jobs.connection"),
+        patch("foods.images._fetch_image_file", side_effect=_spooled(_image_bytes())),
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        _enqueue(item)
+
+    assert FoodImageJob.objects.get().status == FoodImageJob.STATUS_DONE
+    item.refresh_from_db()
+    assert item.image_status == FoodItem.IMAGE_STATUS_OK
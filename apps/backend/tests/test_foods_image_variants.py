@@ -0,0 +1,114 @@
+from io import BytesIO
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from foods.images import ImageSpool, download_food_images
+from foods.models import FoodItem
+from foods.variants import SMALL_MAX_SIZE, generate_variants, render_variants
+
+
+def _image_bytes(mode: str = "RGB", image_format: str = "JPEG") -> bytes:
+    color = (200, 30, 30, 128) if mode == "RGBA" else (200, 30, 30)
+    buffer = BytesIO()
+    Image.new(mode, (800, 600), color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def _spooled(content: bytes):
+    """``_fetch_image_file`` stand-in returning a fresh spool of ``content``."""
+
+    def fetch(url: str) -> ImageSpool:
+        spool = ImageSpool()
+        spool.write(content)
+        spool.finish()
+        return spool
+
+    return fetch
+
+
+def _auth_client() -> APIClient:
+    user = get_user_model().objects.create_user(
+        username="variantuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client
+
+
+def test_render_variants_derives_thumbnail_and_webp() -> None:
+    variants = render_variants(_image_bytes())
+
+    with Image.open(BytesIO(variants["small"])) as small:
+        assert small.format == "JPEG"
+        assert small.size == (SMALL_MAX_SIZE, 150)
+    with Image.open(BytesIO(variants["large_webp"])) as large_webp:
+        assert large_webp.format == "WEBP"
+        assert large_webp.size == (800, 600)
+    with Image.open(BytesIO(variants["small_webp"])) as small_webp:
+        assert small_webp.format == "WEBP"
+        assert small_webp.size == (SMALL_MAX_SIZE, 150)
+
+
+def test_render_variants_flattens_alpha_for_jpeg_only() -> None:
+    variants = render_variants(_image_bytes("RGBA", "PNG"))
+
+    with Image.open(BytesIO(variants["small"])) as small:
+        assert small.mode == "RGB"
+    with Image.open(BytesIO(variants["small_webp"])) as small_webp:
+        assert small_webp.mode == "RGBA"
+
+
+def test_render_variants_rejects_non_images() -> None:
+    with pytest.raises(ValueError, match="Invalid image"):
+        render_variants(b"<html>not an image</html>")
+
+
+@override_settings(FOODS_IMAGE_PROCESS_WORKERS=1)
+def test_process_pool_matches_inline_rendering(tmp_path) -> None:
+    source = tmp_path / "source.jpg"
+    source.write_bytes(_image_bytes())
+
+    assert generate_variants(str(source)) == render_variants(source.read_bytes())
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_single_download_exposes_variant_urls(tmp_path) -> None:
+    client = _auth_client()
+    item = FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="700",
+        barcode="700",
+        name="Variant Bar",
+        raw_source_json={},
+    )
+
+    with override_settings(MEDIA_ROOT=tmp_path):
+        with patch(
+            "foods.images._fetch_image_file", side_effect=_spooled(_image_bytes())
+        ) as mock_fetch:
+            download_food_images(
+                item,
+                "https://images.openfoodfacts.org/700.400.jpg",
+                "https://images.openfoodfacts.org/700.100.jpg",
+            )
+        response = client.get("/api/v1/foods/typeahead?q=variant")
+
+    mock_fetch.assert_called_once_with("https://images.openfoodfacts.org/700.400.jpg")
+    assert response.status_code == 200
+    (row,) = response.data
+    assert row["image_small_url"].endswith(".jpg")
+    assert row["image_small_webp_url"].startswith("http://testserver/media/")
+    assert row["image_small_webp_url"].endswith(".webp")
@@ -0,0 +1,181 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from foods.ingest import ingest_ndjson
+from foods.models import FoodItem
+
+
+def _auth_client() -> APIClient:
+    user = get_user_model().objects.create_user(
+        username="batchuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client
+
+
+def _product(barcode: str, name: str, **extra: object) -> dict[str, object]:
+    return {
+        "source": "openfoodfacts",
+        "external_id": barcode,
+        "barcode": barcode,
+        "name": name,
+        "raw_source_json": {"product": {"product_name": name}},
+        **extra,
+    }
+
+
+def _post_ndjson(client: APIClient, lines: list[str]) -> list[dict[str, object]]:
+    response = client.generic(
+        "POST",
+        "/api/v1/foods/ingest/batch",
+        "\n".join(lines) + "\n",
+        content_type="application/x-ndjson",
+    )
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/x-ndjson"
+    body = b"".join(response.streaming_content).decode()
+    return [json.loads(line) for line in body.splitlines()]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_batch_ingest_creates_and_updates_items() -> None:
+    client = _auth_client()
+    existing = FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="100",
+        barcode="100",
+        name="Old Name",
+        brands="Kept Brand",
+        raw_source_json={"product": {}},
+    )
+
+    results = _post_ndjson(
+        client,
+        [
+            json.dumps(_product("100", "New Name", kcal_100g="120.5")),
+            "",
+            json.dumps(_product("200", "Fresh Item", brands="Farm")),
+        ],
+    )
+
+    assert results == [
+        {"line": 1, "status": "updated", "food_item_id": existing.id},
+        {
+            "line": 3,
+            "status": "created",
+            "food_item_id": FoodItem.objects.get(barcode="200").id,
+        },
+    ]
+    existing.refresh_from_db()
+    assert existing.name == "New Name"
+    assert existing.brands == "Kept Brand"
+    assert str(existing.kcal_100g) == "120.50"
+    assert existing.search_text == "new name kept brand"
+    assert FoodItem.objects.get(barcode="200").search_text == "fresh item farm"
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_batch_ingest_reports_invalid_lines_and_barcode_conflicts() -> None:
+    client = _auth_client()
+    FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="a",
+        barcode="111",
+        name="A",
+        raw_source_json={},
+    )
+    FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="b",
+        barcode="222",
+        name="B",
+        raw_source_json={},
+    )
+
+    results = _post_ndjson(
+        client,
+        [
+            "{not json",
+            json.dumps({"barcode": "333"}),
+            json.dumps({**_product("222", "Clash"), "external_id": "a"}),
+            json.dumps(_product("444", "Valid")),
+        ],
+    )
+
+    assert [result["status"] for result in results] == [
+        "error",
+        "error",
+        "error",
+        "created",
+    ]
+    assert "name" in results[1]["errors"]
+    assert results[2]["errors"] == {
+        "barcode": ["Barcode already belongs to another food item."]
+    }
+    assert FoodItem.objects.get(external_id="a").name == "A"
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_batch_ingest_applies_repeated_keys_in_order() -> None:
+    client = _auth_client()
+
+    results = _post_ndjson(
+        client,
+        [
+            json.dumps(_product("500", "First")),
+            json.dumps(_product("500", "Second")),
+            json.dumps({**_product("501", "Moved"), "external_id": "500"}),
+        ],
+    )
+
+    assert [result["status"] for result in results] == [
+        "created",
+        "updated",
+        "updated",
+    ]
+    assert FoodItem.objects.count() == 1
+    item = FoodItem.objects.get()
+    assert item.barcode == "501"
+    assert item.name == "Moved"
+
+
+@pytest.mark.django_db
+def test_new_row_ids_are_looked_up_once_per_chunk_without_returning() -> None:
+    lines = [
+        json.dumps(_product(f"30{index}", f"Item {index}")).encode()
+        for index in range(5)
+    ]
+
+    with (
+        patch.object(
+            type(connection.features), "can_return_rows_from_bulk_insert", False
+        ),
+        CaptureQueriesContext(connection) as queries,
+    ):
+        results = list(ingest_ndjson(lines))
+
+    ids = dict(FoodItem.objects.values_list("barcode", "id"))
+    assert [result["food_item_id"] for result in results] == [
+        ids[f"30{index}"] for index in range(5)
+    ]
+    lookups = [
+        q for q in queries if q["sql"].startswith('SELECT "foods_fooditem"."barcode"')
+    ]
+    assert len(lookups) == 1
@@ -1,11 +1,33 @@
+from io import BytesIO
 from unittest.mock import patch
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import override_settings
+from PIL import Image
 from rest_framework.test import APIClient
 
-from foods.models import FoodItem
+from foods.images import ImageSpool
+from foods.models import FoodImageJob, FoodItem
+
+
+def _image_bytes(color: str) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (400, 300), color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _spooled(content: bytes):
+    """``_fetch_image_file`` stand-in returning a fresh spool of ``content``."""
+
+    def fetch(url: str) -> ImageSpool:
+        spool = ImageSpool()
+        spool.write(content)
+        spool.finish()
+        return spool
+
+    return fetch
 
 
 def _auth_client() -> APIClient:
@@ -43,17 +65,24 @@ def test_foods_ingest_downloads_and_refreshes_images(tmp_path) -> None:
 
     with override_settings(MEDIA_ROOT=tmp_path):
         with patch(
-            "foods.images._fetch_image_bytes", return_value=b"img"
+            "foods.images._fetch_image_file", side_effect=_spooled(_image_bytes("red"))
         ) as mock_fetch:
             response = client.post("/api/v1/foods/ingest", payload, format="json")
+            assert response.status_code == 200
+            assert mock_fetch.call_count == 0
+            assert FoodImageJob.objects.get().status == FoodImageJob.STATUS_PENDING
 
-        assert response.status_code == 200
-        assert mock_fetch.call_count == 2
+            call_command("process_image_jobs", "--once", "--workers", "1")
+
+        mock_fetch.assert_called_once_with(payload["image_large_url"])
+        assert FoodImageJob.objects.get().status == FoodImageJob.STATUS_DONE
 
         item = FoodItem.objects.get(barcode="123456789")
         assert item.image_status == FoodItem.IMAGE_STATUS_OK
         assert item.image_large.name
         assert item.image_small.name
+        assert item.image_large_webp.name.endswith(".webp")
+        assert item.image_small_webp.name.endswith(".webp")
         first_large_name = item.image_large.name
 
         update_payload = {
@@ -65,16 +94,19 @@ def test_foods_ingest_downloads_and_refreshes_images(tmp_path) -> None:
         }
 
         with patch(
-            "foods.images._fetch_image_bytes", return_value=b"img2"
+            "foods.images._fetch_image_file",
+            side_effect=_spooled(_image_bytes("blue")),
         ) as mock_fetch_update:
             update_response = client.post(
                 "/api/v1/foods/ingest",
                 update_payload,
                 format="json",
             )
+            assert update_response.status_code == 200
+
+            call_command("process_image_jobs", "--once", "--workers", "1")
 
-        assert update_response.status_code == 200
-        assert mock_fetch_update.call_count == 2
+        assert mock_fetch_update.call_count == 1
 
         item.refresh_from_db()
         assert item.image_signature == "front_en.2"
@@ -1,8 +1,13 @@
+from decimal import Decimal
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APIClient
 
 from foods.models import FoodItem
+from foods.serializers import FoodItemIngestSerializer
 
 
 def _auth_client() -> APIClient:
@@ -64,3 +69,76 @@ def test_foods_ingest_upserts_item() -> None:
     item = FoodItem.objects.get(barcode="123456789")
     assert item.name == "Updated Bar"
     assert item.brands == "Updated Brand"
+
+
+def _ingest(payload: dict[str, object]) -> tuple[FoodItemIngestSerializer, FoodItem]:
+    serializer = FoodItemIngestSerializer(data=payload)
+    serializer.is_valid(raise_exception=True)
+    return serializer, serializer.save()
+
+
+def _payload(**overrides: object) -> dict[str, object]:
+    return {
+        "source": "openfoodfacts",
+        "external_id": "555",
+        "barcode": "555",
+        "name": "Hash Bar",
+        "brands": "Hash Brand",
+        "kcal_100g": "120",
+        "content_hash": "hash-1",
+        "image_signature": "front_en.1",
+        "raw_source_json": {"product": {"product_name": "Hash Bar"}},
+        **overrides,
+    }
+
+
+@pytest.mark.django_db
+def test_unchanged_content_hash_skips_the_write() -> None:
+    _, stored = _ingest(_payload())
+
+    with CaptureQueriesContext(connection) as queries:
+        serializer, item = _ingest(
+            _payload(raw_source_json={"product": {"product_name": "Ignored"}})
+        )
+
+    assert len(queries) == 1
+    assert queries[0]["sql"].startswith("SELECT")
+    assert item.id == stored.id
+    assert not serializer.created
+    assert not serializer.image_signature_changed
+    item.refresh_from_db()
+    assert item.updated_at == stored.updated_at
+    assert item.raw_source_json == {"product": {"product_name": "Hash Bar"}}
+
+
+@pytest.mark.django_db
+def test_changed_product_updates_only_differing_columns() -> None:
+    _, stored = _ingest(_payload())
+
+    with CaptureQueriesContext(connection) as queries:
+        _, item = _ingest(_payload(kcal_100g="150", content_hash="hash-2"))
+
+    updates = [
+        query["sql"]
+        for query in queries
+        if query["sql"].startswith('UPDATE "foods_fooditem"')
+    ]
+    assert len(updates) == 1
+    assert '"kcal_100g"' in updates[0]
+    assert '"content_hash"' in updates[0]
+    assert '"name"' not in updates[0]
+    assert '"image_signature"' not in updates[0]
+    item.refresh_from_db()
+    assert item.kcal_100g == Decimal("150.00")
+    assert item.updated_at > stored.updated_at
+
+
+@pytest.mark.django_db
+def test_same_hash_under_a_new_barcode_is_still_written() -> None:
+    _ingest(_payload())
+
+    serializer, item = _ingest(_payload(barcode="556"))
+
+    assert not serializer.created
+    assert FoodItem.objects.get().barcode == "556"
+    assert item.barcode == "556"
@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+from nutrition.models import MealEntry
+
+HEAVY_COLUMNS = ("nutriments_json", "raw_source_json", "foodsourcedocument")
+
+
+def _auth_client() -> tuple[APIClient, User]:
+    user = User.objects.create_user(
+        username="lightuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client, user
+
+
+def _food_item() -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="7001",
+        barcode="7001",
+        name="Light Bar",
+        kcal_100g=Decimal("380"),
+        raw_source_json={"product": {"product_name": "Light Bar"}},
+        nutriments_json={"energy-kcal_100g": 380, "fat_100g": 12},
+    )
+
+
+def _heavy_queries(queries: CaptureQueriesContext) -> list[str]:
+    return [
+        query["sql"]
+        for query in queries
+        if any(column in query["sql"] for column in HEAVY_COLUMNS)
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_typeahead_does_not_select_heavy_columns() -> None:
+    client, _ = _auth_client()
+    _food_item()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/v1/foods/typeahead?q=light")
+
+    assert [row["name"] for row in response.data] == ["Light Bar"]
+    assert any("foods_fooditem" in query["sql"] for query in queries)
+    assert _heavy_queries(queries) == []
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_day_view_and_entry_create_do_not_select_heavy_columns() -> None:
+    client, user = _auth_client()
+    item = _food_item()
+    MealEntry.objects.create(user=user, food_item=item, quantity_g=Decimal("50"))
+
+    with CaptureQueriesContext(connection) as queries:
+        created = client.post(
+            "/api/v1/nutrition/entries",
+            {"food_item_id": item.id, "meal_type": "lunch", "quantity_g": "30"},
+            format="json",
+        )
+        day = client.get(
+            f"/api/v1/nutrition/day?date={timezone.localdate().isoformat()}"
+        )
+
+    assert created.status_code == 201
+    assert day.data["totals"]["kcal"] == pytest.approx(304.0)
+    assert _heavy_queries(queries) == []
+
+
+@pytest.mark.django_db
+def test_light_items_load_heavy_fields_on_access() -> None:
+    item = _food_item()
+
+    light = FoodItem.objects.light().get(pk=item.pk)
+
+    assert light.get_deferred_fields() == set(FoodItem.HEAVY_FIELDS)
+    assert light.nutriments_json == {"energy-kcal_100g": 380, "fat_100g": 12}
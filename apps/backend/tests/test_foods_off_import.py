@@ -0,0 +1,264 @@
+import gzip
+import json
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+from foods import off_import
+from foods.models import FoodImageJob, FoodItem, FoodSourceDocument
+from foods.off_import import ImportStats, import_off_dump, map_lines
+
+
+def _product(index: int, kcal: int = 100, **extra: object) -> dict[str, object]:
+    code = f"{index:013d}"
+    return {
+        "code": code,
+        "product_name": f"Dump product {index}",
+        "brands": "Dump Brand",
+        "serving_size": "30 g",
+        "nutriments": {"energy-kcal_100g": kcal, "proteins_100g": 5.5},
+        "image_front_url": f"https://images.example.org/{code}.400.jpg",
+        "image_front_thumb_url": f"https://images.example.org/{code}.100.jpg",
+        "ingredients_text": "not imported",
+        **extra,
+    }
+
+
+def _write_jsonl(path: Path, lines: list[object]) -> Path:
+    encoded = b"".join(
+        (line if isinstance(line, bytes) else json.dumps(line).encode()) + b"\n"
+        for line in lines
+    )
+    path.write_bytes(gzip.compress(encoded))
+    return path
+
+
+@pytest.mark.django_db
+def test_jsonl_dump_is_imported_with_documents_and_image_jobs(tmp_path: Path) -> None:
+    dump = _write_jsonl(
+        tmp_path / "products.jsonl.gz",
+        [_product(1), b"", b"{not json", {"code": "", "product_name": "No code"}]
+        + [_product(index) for index in range(2, 6)],
+    )
+
+    stats = import_off_dump(str(dump), chunk_size=3, queue_images=True)
+
+    assert stats == ImportStats(records=7, created=5, invalid=2)
+    item = FoodItem.objects.get(barcode="0000000000001")
+    assert item.external_id == "0000000000001"
+    assert item.name == "Dump product 1"
+    assert item.search_text == "dump product 1 dump brand"
+    assert item.kcal_100g == Decimal("100.00")
+    assert item.serving_size_g == Decimal("30.00")
+    assert item.image_large_source_url.endswith("0000000000001.400.jpg")
+    assert item.content_hash
+    assert item.raw_source_json["product"]["product_name"] == "Dump product 1"
+    assert "ingredients_text" not in item.raw_source_json["product"]
+    assert FoodSourceDocument.objects.count() == 5
+    assert FoodImageJob.objects.count() == 5
+    assert not Path(f"{dump}.checkpoint.json").exists()
+
+
+@pytest.mark.django_db
+def test_reimport_skips_unchanged_records_and_updates_changed_ones(
+    tmp_path: Path,
+) -> None:
+    dump = _write_jsonl(
+        tmp_path / "products.jsonl.gz", [_product(index) for index in range(4)]
+    )
+    import_off_dump(str(dump))
+    before = dict(FoodItem.objects.values_list("barcode", "updated_at"))
+    changed = [_product(0, kcal=250), *(_product(index) for index in range(1, 4))]
+    _write_jsonl(dump, changed)
+
+    with patch("foods.off_import.food_macros_changed.send") as macros_changed:
+        stats = import_off_dump(str(dump))
+
+    assert stats == ImportStats(records=4, updated=1, unchanged=3)
+    after = dict(FoodItem.objects.values_list("barcode", "updated_at"))
+    assert not FoodImageJob.objects.exists()
+    assert after["0000000000000"] > before["0000000000000"]
+    assert all(after[code] == before[code] for code in list(before)[1:])
+    assert FoodItem.objects.get(barcode="0000000000000").kcal_100g == Decimal("250")
+    macros_changed.assert_called_once()
+    assert macros_changed.call_args.kwargs["food_item_ids"] == [
+        FoodItem.objects.get(barcode="0000000000000").id
+    ]
+
+
+@pytest.mark.django_db
+def test_later_records_win_and_foreign_external_ids_conflict(tmp_path: Path) -> None:
+    FoodItem.objects.create(
+        external_id="0000000000009",
+        barcode="legacy-9",
+        name="Legacy",
+        raw_source_json={},
+    )
+    dump = _write_jsonl(
+        tmp_path / "products.jsonl.gz",
+        [_product(1, kcal=100), _product(1, kcal=120), _product(9)],
+    )
+
+    stats = import_off_dump(str(dump))
+
+    assert stats == ImportStats(records=3, created=1, conflicts=1, superseded=1)
+    assert FoodItem.objects.get(barcode="0000000000001").kcal_100g == Decimal("120")
+    assert FoodItem.objects.get(external_id="0000000000009").barcode == "legacy-9"
+
+
+@pytest.mark.django_db
+def test_csv_dump_maps_columns_and_nutriments(tmp_path: Path) -> None:
+    header = [
+        "code",
+        "url",
+        "product_name",
+        "brands",
+        "serving_size",
+        "image_url",
+        "image_small_url",
+        "energy-kcal_100g",
+        "proteins_100g",
+        "fat_100g",
+    ]
+    rows = [
+        [
+            "3017620422003",
+            "https://world.openfoodfacts.org/product/3017620422003",
+            "Hazelnut spread",
+            "Ferrero",
+            "15 g",
+            "https://images.example.org/front.400.jpg",
+            "https://images.example.org/front.200.jpg",
+            "539",
+            "6.3",
+            "",
+        ]
+    ]
+    dump = tmp_path / "products.csv"
+    dump.write_text(
+        "\n".join("\t".join(row) for row in [header, *rows]) + "\n", encoding="utf-8"
+    )
+
+    stats = import_off_dump(str(dump))
+
+    assert stats == ImportStats(records=1, created=1)
+    item = FoodItem.objects.get(barcode="3017620422003")
+    assert item.name == "Hazelnut spread"
+    assert item.kcal_100g == Decimal("539.00")
+    assert item.protein_g_100g == Decimal("6.30")
+    assert item.fat_g_100g is None
+    assert item.nutriments_json == {"energy-kcal_100g": 539.0, "proteins_100g": 6.3}
+    assert item.image_large_source_url == "https://images.example.org/front.400.jpg"
+    assert item.image_small_source_url == "https://images.example.org/front.200.jpg"
+
+
+@pytest.mark.django_db
+def test_interrupted_import_resumes_from_the_checkpoint(tmp_path: Path) -> None:
+    dump = _write_jsonl(
+        tmp_path / "products.jsonl.gz", [_product(index) for index in range(10)]
+    )
+    checkpoint = tmp_path / "import.checkpoint"
+
+    def interrupt(stats: ImportStats) -> None:
+        if stats.records == 4:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        import_off_dump(
+            str(dump), chunk_size=4, checkpoint_path=str(checkpoint), progress=interrupt
+        )
+    assert FoodItem.objects.count() == 4
+    assert json.loads(checkpoint.read_text())["stats"]["records"] == 4
+
+    with patch("foods.off_import.map_lines", wraps=map_lines) as mapped:
+        stats = import_off_dump(
+            str(dump), chunk_size=4, checkpoint_path=str(checkpoint)
+        )
+
+    assert sum(len(call.args[2]) for call in mapped.call_args_list) == 6
+    assert stats == ImportStats(records=10, created=10, resumed=4)
+    assert FoodItem.objects.count() == 10
+    assert not checkpoint.exists()
+
+
+@pytest.mark.django_db
+def test_checkpoint_of_another_dump_is_rejected(tmp_path: Path) -> None:
+    dump = _write_jsonl(tmp_path / "products.jsonl.gz", [_product(1)])
+    checkpoint = Path(f"{dump}.checkpoint.json")
+    checkpoint.write_text(
+        json.dumps({"version": 1, "path": "/elsewhere.jsonl.gz", "size": 1})
+    )
+
+    with pytest.raises(CommandError, match="belongs to another dump"):
+        call_command("import_off_dump", str(dump), workers=0)
+
+    import_off_dump(str(dump), restart=True)
+    assert FoodItem.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_process_pool_matches_inline_mapping(tmp_path: Path) -> None:
+    dump = _write_jsonl(
+        tmp_path / "products.jsonl.gz", [_product(index) for index in range(6)]
+    )
+    out = StringIO()
+
+    call_command("import_off_dump", str(dump), workers=2, chunk_size=2, stdout=out)
+
+    assert "6 record(s)" in out.getvalue()
+    assert "rows/s" in out.getvalue()
+    assert FoodItem.objects.count() == 6
+    assert not FoodImageJob.objects.exists()
+    lines = [json.dumps(_product(index)).encode() for index in range(6)]
+    inline = {
+        row.fields["barcode"]: row.fields["content_hash"]
+        for row in map_lines("jsonl", None, lines).rows
+    }
+    assert dict(FoodItem.objects.values_list("barcode", "content_hash")) == inline
+
+
+@pytest.mark.postgres
+@pytest.mark.skipif(connection.vendor != "postgresql", reason="COPY is PostgreSQL's")
+@pytest.mark.django_db
+def test_copy_merge_inserts_and_updates_rows_on_postgresql(tmp_path: Path) -> None:
+    dump = _write_jsonl(
+        tmp_path / "products.jsonl.gz", [_product(index) for index in range(5)]
+    )
+
+    with (
+        patch("foods.off_import._bulk_upsert") as bulk_upsert,
+        patch(
+            "foods.off_import._copy_merge", wraps=off_import._copy_merge
+        ) as copy_merge,
+    ):
+        stats = import_off_dump(str(dump), chunk_size=2, queue_images=True)
+        _write_jsonl(
+            dump,
+            [_product(0, kcal=250), *(_product(index) for index in range(1, 6))],
+        )
+        reimported = import_off_dump(str(dump), chunk_size=2)
+
+    bulk_upsert.assert_not_called()
+    # Chunks without a changed record are not written.
+    assert copy_merge.call_count == 5
+    assert stats == ImportStats(records=5, created=5)
+    assert reimported == ImportStats(records=6, created=1, updated=1, unchanged=4)
+    item = FoodItem.objects.get(barcode="0000000000000")
+    assert item.kcal_100g == Decimal("250.00")
+    (expected,) = map_lines(
+        "jsonl", None, [json.dumps(_product(0, kcal=250)).encode()]
+    ).rows
+    assert item.nutriments_json == expected.fields["nutriments_json"]
+    assert item.content_hash == expected.fields["content_hash"]
+    assert item.search_text == "dump product 0 dump brand"
+    assert item.raw_source_json["product"]["product_name"] == "Dump product 0"
+    assert FoodSourceDocument.objects.count() == 6
+    assert set(FoodImageJob.objects.values_list("food_item__barcode", flat=True)) == {
+        f"{index:013d}" for index in range(5)
+    }
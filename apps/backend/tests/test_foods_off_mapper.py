@@ -0,0 +1,164 @@
+import hashlib
+from decimal import Decimal
+
+import pytest
+
+from foods.off import OFF_IMAGE_BASE_URL, UNNAMED_PRODUCT, content_hash, map_product
+
+
+def _document(**product: object) -> dict[str, object]:
+    return {"status": 1, "code": "3017620422003", "product": product}
+
+
+def test_map_product_builds_the_ingest_payload() -> None:
+    nutriments = {
+        "energy-kcal_100g": 539,
+        "proteins_100g": "6.3",
+        "carbohydrates_100g": 57.5,
+        "sugars_100g": 56.3,
+        "fat_100g": 30.9,
+        "saturated-fat_100g": 10.6,
+        "fiber_100g": None,
+        "salt_100g": 0.107,
+    }
+    document = _document(
+        code="3017620422003",
+        product_name=" Nutella ",
+        brands="Ferrero",
+        serving_size="15 g",
+        nutriments=nutriments,
+    )
+
+    payload = map_product(document)
+
+    assert payload is not None
+    assert payload["external_id"] == payload["barcode"] == "3017620422003"
+    assert payload["name"] == "Nutella"
+    assert payload["brands"] == "Ferrero"
+    assert payload["kcal_100g"] == Decimal("539.00")
+    assert payload["protein_g_100g"] == Decimal("6.30")
+    assert payload["fiber_g_100g"] is None
+    assert payload["salt_g_100g"] == Decimal("0.11")
+    assert payload["serving_size_g"] == Decimal("15.00")
+    assert payload["nutriments_json"] == nutriments
+    assert payload["raw_source_json"] is document
+    assert payload["image_url"] == ""
+    assert "image_signature" not in payload
+
+
+def test_map_product_rejects_documents_without_a_product() -> None:
+    assert map_product({"status": 0, "status_verbose": "product not found"}) is None
+    assert map_product({"status": 1}) is None
+
+
+@pytest.mark.parametrize(
+    ("product", "expected"),
+    [
+        ({"product_name": "Pâte", "product_name_en": "Spread", "lang": "fr"}, "Spread"),
+        ({"product_name": "Pâte", "lang": "fr"}, "Pâte"),
+        ({"product_name": " ", "generic_name": "Chocolate spread"}, "Chocolate spread"),
+        ({}, UNNAMED_PRODUCT),
+    ],
+)
+def test_map_product_picks_the_best_name(
+    product: dict[str, object], expected: str
+) -> None:
+    payload = map_product(_document(code="1234", **product))
+
+    assert payload is not None
+    assert payload["name"] == expected
+
+
+def test_kcal_falls_back_to_macros() -> None:
+    nutriments = {"proteins_100g": 10, "carbohydrates_100g": 20, "fat_100g": 5}
+
+    payload = map_product(_document(code="1234", nutriments=nutriments))
+
+    assert payload is not None
+    assert payload["kcal_100g"] == Decimal("165.00")
+
+
+@pytest.mark.parametrize(
+    ("serving_size", "expected"),
+    [
+        ("30g", Decimal("30.00")),
+        ("1 bar (42,5 g)", Decimal("1.00")),
+        (25, Decimal("25.00")),
+        ("a bit", None),
+    ],
+)
+def test_serving_size_takes_the_first_number(
+    serving_size: object, expected: Decimal | None
+) -> None:
+    payload = map_product(_document(code="1234", serving_size=serving_size))
+
+    assert payload is not None
+    assert payload["serving_size_g"] == expected
+
+
+def test_selected_front_image_wins_for_the_requested_locale() -> None:
+    document = _document(
+        code="3017620422003",
+        selected_images={
+            "front": {
+                "display": {
+                    "en": "https://img/front_en.4.400.jpg",
+                    "fr": "https://img/fr.400.jpg",
+                },
+                "thumb": {
+                    "en": "https://img/front_en.4.100.jpg",
+                    "fr": "https://img/fr.100.jpg",
+                },
+            }
+        },
+        images={"front_en": {"rev": 4}, "front_fr": {"rev": "7"}},
+        image_front_url="https://img/direct.jpg",
+    )
+
+    english = map_product(document)
+    french = map_product(document, locale="FR")
+
+    assert english is not None and french is not None
+    assert english["image_large_url"] == "https://img/front_en.4.400.jpg"
+    assert english["image_small_url"] == "https://img/front_en.4.100.jpg"
+    assert english["image_url"] == "https://img/front_en.4.100.jpg"
+    assert english["image_signature"] == "front_en.4"
+    assert french["image_large_url"] == "https://img/fr.400.jpg"
+    assert french["image_signature"] == "front_fr.7"
+
+
+def test_images_are_computed_from_image_revisions() -> None:
+    document = _document(code="12345678", images={"front_de": {"rev": 3}, "2": {}})
+
+    payload = map_product(document)
+
+    assert payload is not None
+    base = f"{OFF_IMAGE_BASE_URL}/000/001/234/5678"
+    assert payload["image_large_url"] == f"{base}/front_de.3.400.jpg"
+    assert payload["image_small_url"] == f"{base}/front_de.3.100.jpg"
+    assert payload["image_signature"] == "front_de.3"
+
+
+def test_content_hash_matches_the_app_encoding() -> None:
+    values = {
+        "kcal_100g": 539.0,
+        "protein_g_100g": 6.3,
+        "carbs_g_100g": 57.5,
+        "fat_g_100g": 30.9,
+        "sugars_g_100g": None,
+        "fiber_g_100g": 0.0,
+        "salt_g_100g": 0.25,
+        "serving_size_g": 15.0,
+    }
+    # What the app's ``jsonEncode`` produces for the same product.
+    encoded = (
+        '{"source":"openfoodfacts","external_id":"3017620422003","name":"Pâte",'
+        '"brands":"Ferrero","kcal_100g":"539","protein_g_100g":"6.3",'
+        '"carbs_g_100g":"57.5","fat_g_100g":"30.9","sugars_g_100g":"",'
+        '"fiber_g_100g":"0","salt_g_100g":"0.25","serving_size_g":"15",'
+        '"image_signature":"front_en.4"}'
+    )
+
+    digest = content_hash(" 3017620422003", "Pâte ", "Ferrero", values, "front_en.4")
+
+    assert digest == hashlib.sha256(encoded.encode()).hexdigest()
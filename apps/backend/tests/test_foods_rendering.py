@@ -0,0 +1,78 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIRequestFactory
+
+from foods.models import FoodItem
+from foods.rendering import CompactFoodRenderer
+from foods.search import FOOD_ROW_FIELDS, food_row
+from foods.serializers import FoodItemCompactSerializer
+
+
+def _create_items() -> list[FoodItem]:
+    variants = [
+        {},
+        {"kcal_100g": None, "brands": ""},
+        {"kcal_100g": Decimal("7"), "image_url": "  https://img.example/x.jpg "},
+        {"image_url": "   "},
+        {
+            "image_large": "foods/3/large.jpg",
+            "image_small": "foods/3/small.jpg",
+            "image_small_webp": "foods/3/small.webp",
+            "image_status": FoodItem.IMAGE_STATUS_OK,
+        },
+        {
+            # No WebP rendition yet.
+            "image_large": "foods/4/large.jpg",
+            "image_small": "foods/4/small.jpg",
+            "image_status": FoodItem.IMAGE_STATUS_OK,
+            "image_url": "https://img.example/4.jpg",
+        },
+        {
+            # Files present but the last download failed.
+            "image_large": "foods/5/large.jpg",
+            "image_small": "foods/5/small.jpg",
+            "image_small_webp": "foods/5/small.webp",
+            "image_status": FoodItem.IMAGE_STATUS_FAILED,
+            "image_url": "https://img.example/5.jpg",
+        },
+        {
+            "image_small": "foods/6/small.jpg",
+            "image_status": FoodItem.IMAGE_STATUS_OK,
+        },
+    ]
+    items = []
+    for index, fields in enumerate(variants):
+        defaults = {
+            "source": FoodItem.SOURCE_OPEN_FOOD_FACTS,
+            "external_id": f"render-{index}",
+            "barcode": f"render-{index}",
+            "name": f"Render {index}",
+            "brands": "Brand",
+            "kcal_100g": Decimal("123.45"),
+            "raw_source_json": {},
+        }
+        items.append(FoodItem.objects.create(**{**defaults, **fields}))
+    return items
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("with_request", [True, False])
+def test_compact_renderer_matches_serializer(with_request: bool) -> None:
+    _create_items()
+    request = (
+        APIRequestFactory().get("/api/v1/foods/typeahead") if with_request else None
+    )
+    items = list(FoodItem.objects.order_by("id"))
+    rows = [
+        food_row(values)
+        for values in FoodItem.objects.order_by("id").values_list(*FOOD_ROW_FIELDS)
+    ]
+
+    expected = FoodItemCompactSerializer(
+        items, many=True, context={"request": request}
+    ).data
+
+    rendered = CompactFoodRenderer(request).render_many(rows)
+    assert rendered == expected
+    assert [list(food) for food in rendered] == [list(food) for food in expected]
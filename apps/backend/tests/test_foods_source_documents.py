@@ -0,0 +1,96 @@
+import json
+import zlib
+
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test.utils import CaptureQueriesContext
+
+from foods.models import FoodItem, FoodSourceDocument
+
+DOCUMENT = {"product": {"product_name": "Side Bar", "ingredients_text": "oats " * 200}}
+
+
+def _food_item(**kwargs) -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="9001",
+        barcode="9001",
+        name="Side Bar",
+        raw_source_json=DOCUMENT,
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db
+def test_raw_source_json_is_stored_compressed_and_loaded_lazily() -> None:
+    item = _food_item()
+
+    document = FoodSourceDocument.objects.get(food_item=item)
+    assert document.codec == FoodSourceDocument.CODEC_ZLIB
+    assert len(document.data) < document.size
+    assert zlib.decompress(document.data).startswith(b'{"product":')
+
+    with CaptureQueriesContext(connection) as queries:
+        loaded = FoodItem.objects.get(pk=item.pk)
+    assert "foods_foodsourcedocument" not in queries[0]["sql"]
+    with CaptureQueriesContext(connection) as queries:
+        assert loaded.raw_source_json == DOCUMENT
+        assert loaded.raw_source_json == DOCUMENT
+    assert len(queries) == 1
+
+
+@pytest.mark.django_db
+def test_saving_replaces_document_only_when_assigned() -> None:
+    item = _food_item()
+    item.raw_source_json = {"product": {"product_name": "Renamed"}}
+    item.save()
+    item.refresh_from_db()
+    assert item.raw_source_json == {"product": {"product_name": "Renamed"}}
+
+    loaded = FoodItem.objects.get(pk=item.pk)
+    loaded.name = "Other"
+    with CaptureQueriesContext(connection) as queries:
+        loaded.save(update_fields=["name"])
+    assert not any("foodsourcedocument" in query["sql"] for query in queries)
+    assert FoodSourceDocument.objects.count() == 1
+
+    item.delete()
+    assert not FoodSourceDocument.objects.exists()
+
+
+@pytest.mark.django_db
+def test_non_finite_numbers_are_stored_as_null() -> None:
+    nutriments = json.loads('{"fat_100g": NaN, "salt_100g": Infinity, "sugars": 1.5}')
+    item = _food_item()
+    item.raw_source_json = {"product": {"nutriments": nutriments}}
+    item.save()
+
+    encoded = FoodSourceDocument.objects.get(food_item=item).encoded
+    assert json.loads(encoded) == {
+        "product": {"nutriments": {"fat_100g": None, "salt_100g": None, "sugars": 1.5}}
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_moves_existing_documents() -> None:
+    executor = MigrationExecutor(connection)
+    executor.migrate([("foods", "0008_fooditem_webp_variants")])
+    old_apps = executor.loader.project_state(
+        [("foods", "0008_fooditem_webp_variants")]
+    ).apps
+    OldFoodItem = old_apps.get_model("foods", "FoodItem")
+    for index in range(3):
+        OldFoodItem.objects.create(
+            external_id=str(index),
+            barcode=str(index),
+            name=f"Item {index}",
+            raw_source_json={"product": {"code": str(index)}},
+        )
+
+    executor = MigrationExecutor(connection)
+    executor.migrate(executor.loader.graph.leaf_nodes())
+
+    assert [item.raw_source_json for item in FoodItem.objects.order_by("barcode")] == [
+        {"product": {"code": str(index)}} for index in range(3)
+    ]
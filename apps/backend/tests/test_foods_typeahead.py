@@ -48,3 +48,63 @@ def test_foods_typeahead_matches_name_and_brands() -> None:
     assert response.status_code == 200
     assert len(response.data) == 1
     assert response.data[0]["name"] == "Protein Bar"
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_foods_typeahead_ranks_prefix_then_word_then_substring() -> None:
+    client = _auth_client()
+
+    for barcode, name, brands in (
+        ("301", "Apricot Chickpeas", ""),
+        ("302", "Chicken Breast", ""),
+        ("303", "Smoked Chicken", ""),
+        ("304", "Crunchy Bar", "Chicky's"),
+    ):
+        FoodItem.objects.create(
+            source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+            external_id=barcode,
+            barcode=barcode,
+            name=name,
+            brands=brands,
+            raw_source_json={"product": {"product_name": name}},
+        )
+    FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="305",
+        barcode="305",
+        name="Pistachio Cream",
+        raw_source_json={"product": {"product_name": "Pistachio Cream"}},
+    )
+
+    response = client.get("/api/v1/foods/typeahead?q=CHI")
+
+    assert response.status_code == 200
+    assert [item["name"] for item in response.data] == [
+        "Chicken Breast",
+        "Apricot Chickpeas",
+        "Crunchy Bar",
+        "Smoked Chicken",
+        "Pistachio Cream",
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_foods_typeahead_ignores_accents_and_punctuation() -> None:
+    client = _auth_client()
+
+    FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="401",
+        barcode="401",
+        name="Crème Brûlée",
+        brands="Maison-Dupont",
+        raw_source_json={"product": {"product_name": "Crème Brûlée"}},
+    )
+
+    response = client.get("/api/v1/foods/typeahead?q=creme brulee maison dup")
+
+    assert response.status_code == 200
+    assert len(response.data) == 1
+    assert response.data[0]["name"] == "Crème Brûlée"
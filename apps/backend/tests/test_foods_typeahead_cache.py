@@ -0,0 +1,184 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+from foods.search_cache import typeahead_cache
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+def _auth_client(is_staff: bool = False) -> APIClient:
+    user = get_user_model().objects.create_user(
+        username="cacheuser",
+        password="Str0ngPass!word",
+        is_staff=is_staff,
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client
+
+
+def _create_item(barcode: str, name: str, brands: str = "") -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id=barcode,
+        barcode=barcode,
+        name=name,
+        brands=brands,
+        raw_source_json={"product": {"product_name": name}},
+    )
+
+
+def _names(response) -> list[str]:
+    return [item["name"] for item in response.data]
+
+
+@pytest.fixture(autouse=True)
+def _shared_cache(tmp_path: Path) -> Iterator[None]:
+    # A file cache is visible to every process, like the deployed dbcache.
+    shared_caches = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    }
+    with override_settings(CACHES=shared_caches):
+        cache.clear()
+        typeahead_cache.reset_stats()
+        yield
+        cache.clear()
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_longer_query_refines_cached_prefix_without_db() -> None:
+    client = _auth_client()
+    _create_item("1", "Chicken Breast")
+    _create_item("2", "Chia Seeds")
+    _create_item("3", "Pistachio Cream")
+
+    first = client.get("/api/v1/foods/typeahead?q=chi")
+    with CaptureQueriesContext(connection) as queries:
+        refined = client.get("/api/v1/foods/typeahead?q=chic")
+        repeated = client.get("/api/v1/foods/typeahead?q=chic")
+
+    assert _names(first) == ["Chia Seeds", "Chicken Breast", "Pistachio Cream"]
+    assert _names(refined) == ["Chicken Breast"]
+    assert _names(repeated) == ["Chicken Breast"]
+    assert not [q for q in queries if "foods_fooditem" in q["sql"]]
+    assert typeahead_cache.stats() == {
+        "hits": 1,
+        "refinements": 1,
+        "misses": 1,
+        "invalidations": 0,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_large_result_sets_cache_only_the_requested_page() -> None:
+    client = _auth_client()
+    for index in range(5):
+        _create_item(str(index), f"Oat Bar {index}")
+
+    with override_settings(FOODS_TYPEAHEAD_CACHE_CANDIDATES=3):
+        client.get("/api/v1/foods/typeahead?q=oat&limit=2")
+        client.get("/api/v1/foods/typeahead?q=oat&limit=2")
+        response = client.get("/api/v1/foods/typeahead?q=oat b&limit=4")
+
+    assert _names(response) == ["Oat Bar 0", "Oat Bar 1", "Oat Bar 2", "Oat Bar 3"]
+    stats = typeahead_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["refinements"] == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_ingest_invalidates_cached_results() -> None:
+    client = _auth_client()
+    _create_item("1", "Greek Yogurt")
+    assert _names(client.get("/api/v1/foods/typeahead?q=yog")) == ["Greek Yogurt"]
+
+    client.post(
+        "/api/v1/foods/ingest",
+        {
+            "source": "openfoodfacts",
+            "external_id": "2",
+            "barcode": "2",
+            "name": "Yogurt Drink",
+            "raw_source_json": {"product": {"product_name": "Yogurt Drink"}},
+        },
+        format="json",
+    )
+
+    response = client.get("/api/v1/foods/typeahead?q=yog")
+    assert _names(response) == ["Yogurt Drink", "Greek Yogurt"]
+    assert typeahead_cache.stats()["misses"] == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_cache_stats_requires_admin() -> None:
+    assert _auth_client().get("/api/v1/foods/typeahead/cache-stats").status_code == (
+        403
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_cache_stats_reports_counters() -> None:
+    client = _auth_client(is_staff=True)
+    client.get("/api/v1/foods/typeahead?q=apple")
+
+    response = client.get("/api/v1/foods/typeahead/cache-stats")
+
+    assert response.status_code == 200
+    assert response.data["misses"] == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_deleted_items_are_invalidated(django_capture_on_commit_callbacks) -> None:
+    client = _auth_client()
+    _create_item("1", "Greek Yogurt")
+    item = _create_item("2", "Yogurt Drink")
+    client.get("/api/v1/foods/typeahead?q=yog")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        item.delete()
+
+    response = client.get("/api/v1/foods/typeahead?q=yog")
+    assert _names(response) == ["Greek Yogurt"]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_process_local_cache_is_bypassed() -> None:
+    client = _auth_client()
+    item = _create_item("1", "Greek Yogurt")
+
+    with override_settings(CACHES=LOCMEM_CACHES):
+        client.get("/api/v1/foods/typeahead?q=yog")
+        # Another worker's write: its invalidation never reaches this process.
+        FoodItem.objects.filter(id=item.id).update(name="Greek Yogurt Plain")
+        response = client.get("/api/v1/foods/typeahead?q=yog")
+
+    assert _names(response) == ["Greek Yogurt Plain"]
+    assert typeahead_cache.stats()["misses"] == 2
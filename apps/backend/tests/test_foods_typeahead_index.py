@@ -0,0 +1,206 @@
+from collections.abc import Iterator
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+from foods.search import search_food_items
+from foods.search_index import typeahead_index
+
+
+def _auth_client() -> APIClient:
+    user = get_user_model().objects.create_user(
+        username="indexuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client
+
+
+def _create_item(barcode: str, name: str, brands: str = "") -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id=barcode,
+        barcode=barcode,
+        name=name,
+        brands=brands,
+        raw_source_json={"product": {"product_name": name}},
+    )
+
+
+@pytest.fixture(autouse=True)
+def _index_enabled() -> Iterator[None]:
+    typeahead_index.reset()
+    with override_settings(FOODS_TYPEAHEAD_INDEX_ENABLED=True):
+        yield
+    typeahead_index.reset()
+
+
+@pytest.mark.django_db
+def test_index_matches_database_ranking() -> None:
+    for index, (name, brands) in enumerate(
+        [
+            ("Chicken Breast", ""),
+            ("Apricot Chickpeas", ""),
+            ("Smoked Chicken", "Chicky's"),
+            ("Pistachio Cream", ""),
+            ("Chia Seeds", "Bio Garden"),
+            ("Crunchy Bar", "Chicky's"),
+            ("Oat Milk", ""),
+        ]
+    ):
+        _create_item(f"9{index}", name, brands)
+    typeahead_index.warm()
+
+    for query in ("chi", "CHIC", "chicken b", "s", "zzz", "garden"):
+        for limit in (1, 3, 10):
+            expected = [item.id for item in search_food_items(query, limit)]
+            result = typeahead_index.search(query, limit)
+            if result is None:
+                # Short queries may defer to the DB when substrings are needed.
+                assert len(query) < 3
+                continue
+            assert [item.id for item in result] == expected
+
+
+@pytest.mark.django_db
+def test_terms_with_a_space_in_their_first_gram_match_the_database() -> None:
+    for index, name in enumerate(["7 Up", "Diet 7 Up", "Zero 7 Upside", "Up 7"]):
+        _create_item(f"7{index}", name)
+    typeahead_index.warm()
+
+    for query in ("7 up", "7 u", "7 UP"):
+        expected = [item.name for item in search_food_items(query, 10)]
+        result = typeahead_index.search(query, 10)
+        assert result is not None
+        assert [item.name for item in result] == expected
+    assert expected == ["7 Up", "Diet 7 Up", "Zero 7 Upside"]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_typeahead_served_from_index_without_queries() -> None:
+    client = _auth_client()
+    _create_item("111", "Protein Bar", "Fit Brand")
+    _create_item("222", "Apple", "Fresh Farms")
+    typeahead_index.warm()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/v1/foods/typeahead?q=protein")
+
+    assert response.status_code == 200
+    assert [item["name"] for item in response.data] == ["Protein Bar"]
+    food_queries = [q for q in queries if "foods_fooditem" in q["sql"]]
+    assert food_queries == []
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_ingest_updates_warm_index_incrementally() -> None:
+    client = _auth_client()
+    typeahead_index.warm()
+    payload = {
+        "source": "openfoodfacts",
+        "external_id": "555",
+        "barcode": "555",
+        "name": "Greek Yogurt",
+        "raw_source_json": {"product": {"product_name": "Greek Yogurt"}},
+    }
+
+    client.post("/api/v1/foods/ingest", payload, format="json")
+    assert [item.name for item in typeahead_index.search("yog", 10) or []] == [
+        "Greek Yogurt"
+    ]
+
+    client.post(
+        "/api/v1/foods/ingest", {**payload, "name": "Skyr Natural"}, format="json"
+    )
+    assert typeahead_index.search("yog", 10) == []
+    assert [item.name for item in typeahead_index.search("skyr", 10) or []] == [
+        "Skyr Natural"
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_typeahead_falls_back_to_database_when_index_cold() -> None:
+    client = _auth_client()
+    _create_item("111", "Protein Bar", "Fit Brand")
+
+    with patch.object(typeahead_index, "start_warming") as start_warming:
+        response = client.get("/api/v1/foods/typeahead?q=protein")
+
+    assert response.status_code == 200
+    assert [item["name"] for item in response.data] == ["Protein Bar"]
+    start_warming.assert_called_once()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_deleted_items_leave_the_index() -> None:
+    kept = _create_item("111", "Protein Bar")
+    local = _create_item("222", "Protein Shake")
+    elsewhere = _create_item("333", "Protein Pudding")
+    typeahead_index.warm()
+
+    local.delete()
+    assert [item.id for item in typeahead_index.search("protein", 10) or []] == [
+        kept.id,
+        elsewhere.id,
+    ]
+
+    # Deleted by another process: this worker never hears about it.
+    with patch.object(typeahead_index, "remove"):
+        elsewhere.delete()
+    typeahead_index.refresh()
+    assert [item.id for item in typeahead_index.search("protein", 10) or []] == [
+        kept.id
+    ]
+
+
+@pytest.mark.django_db
+def test_refresh_compacts_the_tail_and_tombstones() -> None:
+    items = [_create_item(f"9{index}", f"Oat Bar {index}") for index in range(6)]
+    typeahead_index.warm()
+    for item in items[:4]:
+        item.name = f"Rye Bar {item.barcode}"
+        item.save()
+    typeahead_index.upsert(items[:4])
+
+    with patch("foods.search_index.COMPACT_MIN_ROWS", 2):
+        typeahead_index.refresh()
+
+    state = typeahead_index._state
+    assert state is not None
+    assert state.sorted_count == len(state.rows) == 6
+    assert state.tombstones == 0
+    expected = [item.id for item in search_food_items("bar", 10)]
+    assert [item.id for item in typeahead_index.search("bar", 10) or []] == expected
+
+
+@pytest.mark.django_db
+def test_due_refresh_runs_off_the_request() -> None:
+    _create_item("111", "Protein Bar")
+    typeahead_index.warm()
+
+    with (
+        override_settings(FOODS_TYPEAHEAD_INDEX_REFRESH_SECONDS=0),
+        patch.object(typeahead_index, "refresh") as refresh,
+        patch("foods.search_index.threading.Thread") as thread,
+    ):
+        result = typeahead_index.search("protein", 10)
+
+    assert [item.name for item in result or []] == ["Protein Bar"]
+    refresh.assert_not_called()
+    thread.return_value.start.assert_called_once()
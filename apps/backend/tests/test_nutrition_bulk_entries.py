@@ -0,0 +1,132 @@
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+from nutrition.models import DailyNutritionSummary, MealEntry
+
+URL = "/api/v1/nutrition/entries/bulk"
+
+
+def _auth_client() -> tuple[APIClient, object]:
+    user = get_user_model().objects.create_user(
+        username="bulkuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client, user
+
+
+def _food_item(barcode: str, kcal: str) -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id=barcode,
+        barcode=barcode,
+        name=f"Bulk {barcode}",
+        kcal_100g=Decimal(kcal),
+        raw_source_json={},
+    )
+
+
+def _entry(key: str, food_item_id: int, quantity: str = "100.00") -> dict:
+    return {
+        "idempotency_key": key,
+        "food_item_id": food_item_id,
+        "meal_type": "lunch",
+        "quantity_g": quantity,
+        "consumed_at": timezone.now().isoformat(),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_bulk_create_reports_each_entry_and_updates_summary() -> None:
+    client, user = _auth_client()
+    rice = _food_item("1", "130.00")
+    beans = _food_item("2", "90.00")
+    entries = [
+        _entry("a", rice.id, "200.00"),
+        _entry("b", beans.id),
+        _entry("c", 999_999),
+        {"idempotency_key": "d", "food_item_id": rice.id, "meal_type": "brunch"},
+        _entry("a", beans.id),
+    ]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(URL, {"entries": entries}, format="json")
+
+    assert response.status_code == 200
+    results = response.data["results"]
+    assert [(r["idempotency_key"], r["status"]) for r in results] == [
+        ("a", "created"),
+        ("b", "created"),
+        ("c", "error"),
+        ("d", "error"),
+        ("a", "duplicate"),
+    ]
+    assert results[4]["entry_id"] == results[0]["entry_id"]
+    assert "food_item_id" in results[2]["errors"]
+    assert set(results[3]["errors"]) == {"meal_type", "quantity_g"}
+    food_queries = [q for q in queries if 'FROM "foods_fooditem"' in q["sql"]]
+    assert len(food_queries) == 1
+    inserts = [
+        q for q in queries if q["sql"].startswith('INSERT INTO "nutrition_mealentry"')
+    ]
+    assert len(inserts) == 1
+    assert MealEntry.objects.filter(user=user).count() == 2
+    summary = DailyNutritionSummary.objects.get(user=user)
+    assert summary.kcal == Decimal("350.000000")
+    assert summary.entry_count == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_replayed_bulk_create_is_a_no_op() -> None:
+    client, user = _auth_client()
+    item = _food_item("1", "100.00")
+    payload = {"entries": [_entry("k1", item.id), _entry("k2", item.id)]}
+    first = client.post(URL, payload, format="json").data["results"]
+
+    replay = client.post(URL, payload, format="json").data["results"]
+
+    assert [r["status"] for r in replay] == ["duplicate", "duplicate"]
+    assert [r["entry_id"] for r in replay] == [r["entry_id"] for r in first]
+    assert MealEntry.objects.filter(user=user).count() == 2
+    assert DailyNutritionSummary.objects.get(user=user).kcal == Decimal("200.000000")
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_idempotency_keys_are_scoped_per_user() -> None:
+    client, _ = _auth_client()
+    item = _food_item("1", "100.00")
+    other = get_user_model().objects.create_user(username="other")
+    MealEntry.objects.create(
+        user=other, food_item=item, quantity_g=Decimal("1"), idempotency_key="k1"
+    )
+
+    response = client.post(URL, {"entries": [_entry("k1", item.id)]}, format="json")
+
+    assert response.data["results"][0]["status"] == "created"
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_bulk_create_rejects_empty_and_oversized_batches() -> None:
+    client, _ = _auth_client()
+
+    assert client.post(URL, {"entries": []}, format="json").status_code == 400
+    too_many = [_entry(str(index), 1) for index in range(201)]
+    assert client.post(URL, {"entries": too_many}, format="json").status_code == 400
@@ -0,0 +1,151 @@
+from collections.abc import Iterator
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+from nutrition.changes import decode_cursor, encode_cursor
+from nutrition.models import DailyNutritionSummary, MealEntry, MealEntryTombstone
+
+URL = "/api/v1/nutrition/changes"
+
+
+def _auth_client(username: str = "changesuser") -> tuple[APIClient, object]:
+    user = get_user_model().objects.create_user(
+        username=username,
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client, user
+
+
+def _food_item() -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="800",
+        barcode="800",
+        name="Sync Bar",
+        kcal_100g=Decimal("100.00"),
+        raw_source_json={},
+    )
+
+
+@pytest.fixture(autouse=True)
+def _no_settle_delay() -> Iterator[None]:
+    with override_settings(NUTRITION_CHANGES_SETTLE_SECONDS=0):
+        yield
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_feed_pages_through_entries_then_reports_only_new_changes() -> None:
+    client, user = _auth_client()
+    item = _food_item()
+    entries = [
+        MealEntry.objects.create(user=user, food_item=item, quantity_g=Decimal(n))
+        for n in range(1, 6)
+    ]
+
+    first = client.get(f"{URL}?limit=3").data
+    assert [e["id"] for e in first["entries"]] == [e.id for e in entries[:3]]
+    assert first["has_more"] is True
+    second = client.get(f"{URL}?since={first['cursor']}&limit=3").data
+    assert [e["id"] for e in second["entries"]] == [e.id for e in entries[3:]]
+    assert second["has_more"] is False
+    assert second["deleted"] == []
+
+    entries[0].quantity_g = Decimal("50")
+    entries[0].save()
+    response = client.delete(f"/api/v1/nutrition/entries/{entries[1].id}")
+    assert response.status_code == 204
+
+    third = client.get(f"{URL}?since={second['cursor']}").data
+    assert [e["id"] for e in third["entries"]] == [entries[0].id]
+    assert third["entries"][0]["kcal"] == 50.0
+    assert third["deleted"] == [entries[1].id]
+    quiet = client.get(f"{URL}?since={third['cursor']}").data
+    assert quiet == {
+        "entries": [],
+        "deleted": [],
+        "cursor": third["cursor"],
+        "has_more": False,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_entries_with_equal_timestamps_are_not_skipped() -> None:
+    client, user = _auth_client()
+    item = _food_item()
+    entries = [
+        MealEntry.objects.create(user=user, food_item=item, quantity_g=Decimal("1"))
+        for _ in range(3)
+    ]
+    stamp = entries[0].updated_at
+    MealEntry.objects.filter(user=user).update(updated_at=stamp)
+
+    first = client.get(f"{URL}?limit=1").data
+    rest = client.get(f"{URL}?since={first['cursor']}").data
+
+    ids = [e["id"] for e in first["entries"] + rest["entries"]]
+    assert ids == [e.id for e in entries]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_delete_is_scoped_to_owner_and_updates_summary() -> None:
+    client, user = _auth_client()
+    _, other = _auth_client("someoneelse")
+    item = _food_item()
+    mine = MealEntry.objects.create(user=user, food_item=item, quantity_g=Decimal(10))
+    theirs = MealEntry.objects.create(
+        user=other, food_item=item, quantity_g=Decimal(10)
+    )
+
+    assert client.delete(f"/api/v1/nutrition/entries/{theirs.id}").status_code == 404
+    assert client.delete(f"/api/v1/nutrition/entries/{mine.id}").status_code == 204
+
+    assert DailyNutritionSummary.objects.get(user=user).entry_count == 0
+    assert MealEntryTombstone.objects.get().entry_id == mine.id
+    other.delete()
+    assert MealEntryTombstone.objects.count() == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_recent_changes_wait_for_the_settle_delay() -> None:
+    client, user = _auth_client()
+    MealEntry.objects.create(user=user, food_item=_food_item(), quantity_g=Decimal(1))
+
+    with override_settings(NUTRITION_CHANGES_SETTLE_SECONDS=60):
+        response = client.get(URL)
+
+    assert response.data["entries"] == []
+    assert response.data["cursor"] is None
+
+
+@pytest.mark.parametrize("garbage", ["", "not-base64!", "MTIz"])
+def test_cursor_round_trips_and_rejects_garbage(garbage: str) -> None:
+    stamp = timezone.now()
+    assert decode_cursor(encode_cursor((stamp, 42))) == (stamp, 42)
+    with pytest.raises(ValueError):
+        decode_cursor(garbage)
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_invalid_cursor_is_rejected() -> None:
+    client, _ = _auth_client()
+
+    assert client.get(f"{URL}?since=bogus").status_code == 400
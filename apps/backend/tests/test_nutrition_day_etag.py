@@ -0,0 +1,189 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+from nutrition.models import FoodSummaryRefresh, MealEntry
+
+
+def _auth_client() -> tuple[APIClient, User]:
+    user = User.objects.create_user(
+        username="etaguser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client, user
+
+
+def _food_item() -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="555",
+        barcode="555",
+        name="Etag Bar",
+        kcal_100g=Decimal("250"),
+        raw_source_json={},
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_unchanged_day_answers_304_without_loading_entries() -> None:
+    client, user = _auth_client()
+    MealEntry.objects.create(
+        user=user, food_item=_food_item(), quantity_g=Decimal("40")
+    )
+    url = f"/api/v1/nutrition/day?date={timezone.localdate().isoformat()}"
+
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response["ETag"]
+    assert etag.startswith('"') and not etag.startswith('W/"')
+
+    with CaptureQueriesContext(connection) as queries:
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert not_modified.status_code == 304
+    assert not_modified["ETag"] == etag
+    # Only the summary row is read; entries are never queried.
+    assert not any("nutrition_mealentry" in q["sql"] for q in queries)
+    assert sum("nutrition_dailynutritionsummary" in q["sql"] for q in queries) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_entry_writes_change_only_their_day_etag() -> None:
+    client, user = _auth_client()
+    item = _food_item()
+    today = timezone.localdate()
+    yesterday = today - timedelta(days=1)
+
+    def etag(day) -> str:
+        return client.get(f"/api/v1/nutrition/day?date={day.isoformat()}")["ETag"]
+
+    today_etag, yesterday_etag = etag(today), etag(yesterday)
+
+    created = client.post(
+        "/api/v1/nutrition/entries",
+        {"food_item_id": item.id, "meal_type": "lunch", "quantity_g": "80"},
+        format="json",
+    )
+    assert created.status_code == 201
+    assert etag(today) != today_etag
+    assert etag(yesterday) == yesterday_etag
+
+    # Moving the entry to yesterday changes both days.
+    today_etag = etag(today)
+    entry = MealEntry.objects.get()
+    entry.consumed_at -= timedelta(days=1)
+    entry.save()
+    assert etag(today) != today_etag
+    assert etag(yesterday) != yesterday_etag
+
+    yesterday_etag = etag(yesterday)
+    entry.delete()
+    assert etag(yesterday) != yesterday_etag
+    stale = client.get(
+        f"/api/v1/nutrition/day?date={yesterday.isoformat()}",
+        HTTP_IF_NONE_MATCH=yesterday_etag,
+    )
+    assert stale.status_code == 200
+    assert stale.data["meals"]["lunch"] == []
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_logged_food_changes_change_the_day_etag(
+    django_capture_on_commit_callbacks,
+) -> None:
+    client, user = _auth_client()
+    item = _food_item()
+    MealEntry.objects.create(
+        user=user,
+        food_item=item,
+        meal_type=MealEntry.MEAL_SNACKS,
+        quantity_g=Decimal("40"),
+    )
+    url = f"/api/v1/nutrition/day?date={timezone.localdate().isoformat()}"
+    etag = client.get(url)["ETag"]
+
+    # What a finished image job writes.
+    item.image_large = "foods/blobs/ab/cd/large.jpg"
+    item.image_small = "foods/blobs/ab/cd/small.jpg"
+    item.image_status = FoodItem.IMAGE_STATUS_OK
+    with django_capture_on_commit_callbacks(execute=True):
+        item.save(
+            update_fields=["image_large", "image_small", "image_status", "updated_at"]
+        )
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    food = response.data["meals"]["snacks"][0]["food_item"]
+    assert food["image_small_url"].endswith("small.jpg")
+
+    with CaptureQueriesContext(connection) as queries:
+        not_modified = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert not_modified.status_code == 304
+    assert not any("nutrition_mealentry" in q["sql"] for q in queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_batch_renamed_food_changes_the_day_etag(
+    django_capture_on_commit_callbacks,
+) -> None:
+    client, user = _auth_client()
+    item = _food_item()
+    MealEntry.objects.create(user=user, food_item=item, quantity_g=Decimal("40"))
+    url = f"/api/v1/nutrition/day?date={timezone.localdate().isoformat()}"
+    etag = client.get(url)["ETag"]
+
+    payload = {
+        "source": item.source,
+        "external_id": item.external_id,
+        "barcode": item.barcode,
+        "name": "Renamed Bar",
+        "kcal_100g": "250.00",
+        "raw_source_json": {},
+    }
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.generic(
+            "POST",
+            "/api/v1/foods/ingest/batch",
+            json.dumps(payload) + "\n",
+            content_type="application/x-ndjson",
+        )
+        assert b'"updated"' in b"".join(response.streaming_content)
+
+    renamed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert renamed.status_code == 200
+    assert renamed.data["meals"]["breakfast"][0]["food_item"]["name"] == "Renamed Bar"
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_unlogged_food_changes_queue_nothing(
+    django_capture_on_commit_callbacks,
+) -> None:
+    item = _food_item()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        item.name = "Renamed Bar"
+        item.save()
+
+    assert not FoodSummaryRefresh.objects.exists()
@@ -0,0 +1,132 @@
+import random
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+from nutrition.models import DailyNutritionSummary, MealEntry
+from nutrition.summaries import rebuild_user_summaries
+from nutrition.utils import calculate_macros, serialize_decimal
+
+
+def _auth_client() -> tuple[APIClient, User]:
+    user = User.objects.create_user(
+        username="totalsuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client, user
+
+
+def _cents(rng: random.Random, upper: int) -> Decimal:
+    return Decimal(rng.randint(0, upper * 100)) / 100
+
+
+def _python_totals(entries: list[MealEntry]) -> dict[str, float]:
+    """The per-entry Decimal loop the day view used before SQL aggregation."""
+    totals = {key: Decimal("0") for key in ("kcal", "protein_g", "carbs_g", "fat_g")}
+    for entry in entries:
+        for key, value in calculate_macros(entry.food_item, entry.quantity_g).items():
+            totals[key] += value
+    return {key: serialize_decimal(value) for key, value in totals.items()}
+
+
+def _random_entries(user: User) -> list[MealEntry]:
+    rng = random.Random(15)
+    items = [
+        FoodItem.objects.create(
+            source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+            external_id=str(index),
+            barcode=str(index),
+            name=f"Item {index}",
+            kcal_100g=_cents(rng, 900),
+            protein_g_100g=_cents(rng, 100),
+            carbs_g_100g=None if index % 4 == 0 else _cents(rng, 100),
+            fat_g_100g=Decimal("1.00") if index == 1 else _cents(rng, 100),
+            raw_source_json={},
+        )
+        for index in range(12)
+    ]
+    now = timezone.now()
+    return [
+        MealEntry.objects.create(
+            user=user,
+            food_item=items[index % len(items)],
+            meal_type=MealEntry.MEAL_TYPE_CHOICES[index % 4][0],
+            consumed_at=now,
+            # 1.50 g of a 1.00 g/100 g food is exactly 0.015 g: a half-up tie.
+            quantity_g=Decimal("1.50") if index == 1 else _cents(rng, 600),
+        )
+        for index in range(40)
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_sql_totals_match_decimal_loop_exactly() -> None:
+    client, user = _auth_client()
+    entries = _random_entries(user)
+    now = entries[0].consumed_at
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(
+            f"/api/v1/nutrition/day?date={timezone.localdate(now).isoformat()}"
+        )
+
+    assert response.status_code == 200
+    assert response.data["totals"] == _python_totals(entries)
+    for meal in ("breakfast", "lunch", "dinner", "snacks"):
+        for row in response.data["meals"][meal]:
+            entry = next(entry for entry in entries if entry.id == row["id"])
+            expected = calculate_macros(entry.food_item, entry.quantity_g)["kcal"]
+            assert row["kcal"] == serialize_decimal(expected)
+    # Totals come from the maintained daily summary; entries are read once.
+    assert sum("nutrition_mealentry" in q["sql"] for q in queries) == 1
+    assert not any("GROUP BY" in q["sql"] for q in queries)
+    assert sum("nutrition_dailynutritionsummary" in q["sql"] for q in queries) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_empty_day_totals_are_zero() -> None:
+    client, _ = _auth_client()
+
+    response = client.get("/api/v1/nutrition/day?date=2020-01-01")
+
+    assert response.data["totals"] == {
+        "kcal": 0.0,
+        "protein_g": 0.0,
+        "carbs_g": 0.0,
+        "fat_g": 0.0,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_days_without_a_summary_match_decimal_loop_exactly() -> None:
+    client, user = _auth_client()
+    entries = _random_entries(user)
+    day = timezone.localdate(entries[0].consumed_at)
+    # Days last written before summaries existed have no row.
+    DailyNutritionSummary.objects.all().delete()
+
+    response = client.get(f"/api/v1/nutrition/day?date={day.isoformat()}")
+
+    assert response.data["totals"] == _python_totals(entries)
+    rebuild_user_summaries([user.id])
+    summary = DailyNutritionSummary.objects.get(user=user, date=day)
+    assert {
+        macro: serialize_decimal(value) for macro, value in summary.totals.items()
+    } == _python_totals(entries)
@@ -0,0 +1,134 @@
+import random
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+
+from foods.models import FoodItem
+from nutrition.models import MACRO_COLUMNS, MealEntry
+from nutrition.utils import (
+    calculate_macro_micros,
+    calculate_macros,
+    calculate_macros_many,
+    micros_to_decimal,
+    serialize_decimal,
+    serialize_micros,
+    to_centi,
+)
+
+MACROS = ("kcal", "protein_g", "carbs_g", "fat_g")
+CASES = 2000
+
+
+def _cents(rng: random.Random, upper: int) -> Decimal:
+    # Small values and exact multiples of 0.5 make rounding ties common.
+    if rng.random() < 0.3:
+        return Decimal(rng.randint(0, 40)) / 2
+    return Decimal(rng.randint(0, upper * 100)) / 100
+
+
+def _food(rng: random.Random) -> FoodItem:
+    return FoodItem(
+        kcal_100g=_cents(rng, 900),
+        protein_g_100g=_cents(rng, 100),
+        carbs_g_100g=None if rng.random() < 0.1 else _cents(rng, 100),
+        fat_g_100g=_cents(rng, 100),
+    )
+
+
+def _centi_row(item: FoodItem, quantity: Decimal) -> tuple[int, ...]:
+    return (
+        to_centi(quantity),
+        *(to_centi(getattr(item, column)) for column in MACRO_COLUMNS.values()),
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_fixed_point_macros_match_decimal_results(seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(CASES):
+        item = _food(rng)
+        quantity = _cents(rng, 2000)
+
+        expected = calculate_macros(item, quantity)
+        micros = calculate_macro_micros(item, quantity)
+
+        for macro in MACROS:
+            assert micros_to_decimal(micros[macro]) == expected[macro]
+            assert serialize_micros(micros[macro]) == serialize_decimal(expected[macro])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_totals_match_summed_decimal_loop(seed: int) -> None:
+    rng = random.Random(100 + seed)
+    for size in (0, 1, 7, 250):
+        entries = [(_food(rng), _cents(rng, 600)) for _ in range(size)]
+
+        totals = calculate_macros_many(_centi_row(item, qty) for item, qty in entries)
+
+        expected = {macro: Decimal("0") for macro in MACROS}
+        for item, quantity in entries:
+            for macro, value in calculate_macros(item, quantity).items():
+                expected[macro] += value
+        for macro in MACROS:
+            assert micros_to_decimal(totals[macro]) == expected[macro]
+            assert serialize_micros(totals[macro]) == serialize_decimal(expected[macro])
+
+
+@pytest.mark.parametrize(
+    ("micros", "expected"),
+    [
+        (0, 0.0),
+        (4_999, 0.0),
+        (5_000, 0.01),
+        (15_000, 0.02),
+        (-5_000, -0.01),
+        (-4_999, 0.0),
+        (123_455_000, 123.46),
+    ],
+)
+def test_serialize_micros_rounds_half_up(micros: int, expected: float) -> None:
+    assert serialize_micros(micros) == expected
+    assert serialize_decimal(micros_to_decimal(micros)) == expected
+
+
+@pytest.mark.django_db
+def test_sql_centi_rows_are_exact() -> None:
+    user = get_user_model().objects.create_user(username="centi")
+    rng = random.Random(7)
+    items = []
+    for index in range(20):
+        item = _food(rng)
+        item.source = FoodItem.SOURCE_OPEN_FOOD_FACTS
+        item.external_id = item.barcode = str(index)
+        item.name = f"Centi {index}"
+        item.save()
+        items.append(item)
+    # Values whose float product with 100 is not a whole number.
+    items[0].kcal_100g = Decimal("0.29")
+    items[0].save()
+    entries = [
+        MealEntry.objects.create(
+            user=user, food_item=items[index % 20], quantity_g=_cents(rng, 600)
+        )
+        for index in range(60)
+    ]
+    entries[0].quantity_g = Decimal("0.57")
+    entries[0].save()
+    queryset = MealEntry.objects.filter(user=user).order_by("id")
+
+    rows = list(queryset.macro_centis())
+    kcal = list(queryset.with_kcal().values_list("kcal_micros", flat=True))
+
+    for entry, row, kcal_micros in zip(entries, rows, kcal, strict=True):
+        entry.refresh_from_db()
+        assert row == _centi_row(entry.food_item, entry.quantity_g)
+        micros = calculate_macro_micros(entry.food_item, entry.quantity_g)
+        assert kcal_micros == micros["kcal"]
+
+
+def test_to_centi_rounds_like_the_two_decimal_columns() -> None:
+    assert to_centi(None) == 0
+    assert to_centi(Decimal("12.34")) == 1234
+    assert to_centi(Decimal("1.005")) == 101
+    assert to_centi(Decimal("-1.005")) == -101
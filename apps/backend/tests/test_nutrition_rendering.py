@@ -0,0 +1,53 @@
+from datetime import UTC, datetime
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from foods.models import FoodItem
+from nutrition.models import MealEntry
+from nutrition.rendering import MealEntryRenderer
+from nutrition.serializers import MealEntrySerializer
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("zone", ["UTC", "Europe/Berlin"])
+def test_meal_entry_renderer_matches_serializer(zone: str) -> None:
+    user = get_user_model().objects.create_user(username="render")
+    plain = FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="plain",
+        barcode="plain",
+        name="Plain",
+        kcal_100g=Decimal("52.30"),
+        raw_source_json={},
+    )
+    pictured = FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="pictured",
+        barcode="pictured",
+        name="Pictured",
+        kcal_100g=None,
+        image_large="foods/p/large.jpg",
+        image_small="foods/p/small.jpg",
+        image_status=FoodItem.IMAGE_STATUS_OK,
+        raw_source_json={},
+    )
+    for index, (food, quantity) in enumerate(
+        [(plain, "125.5"), (pictured, "30"), (plain, "0.57")]
+    ):
+        MealEntry.objects.create(
+            user=user,
+            food_item=food,
+            meal_type=MealEntry.MEAL_TYPE_CHOICES[index][0],
+            consumed_at=datetime(2026, 3, 29, index, 30, 15, 250, tzinfo=UTC),
+            quantity_g=Decimal(quantity),
+        )
+    queryset = MealEntry.objects.filter(user=user).order_by("id")
+
+    with timezone.override(zone):
+        expected = MealEntrySerializer(queryset.with_food().with_kcal(), many=True).data
+        rendered = MealEntryRenderer().render_many(queryset.entry_rows())
+
+    assert rendered == expected
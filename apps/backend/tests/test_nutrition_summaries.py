@@ -0,0 +1,234 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+from nutrition.models import DailyNutritionSummary, FoodSummaryRefresh, MealEntry
+
+
+def _auth_client() -> tuple[APIClient, object]:
+    user = get_user_model().objects.create_user(
+        username="summaryuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client, user
+
+
+def _food_item(barcode: str, kcal: str, protein: str = "0") -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id=barcode,
+        barcode=barcode,
+        name=f"Food {barcode}",
+        kcal_100g=Decimal(kcal),
+        protein_g_100g=Decimal(protein),
+        raw_source_json={},
+    )
+
+
+def _snapshot(user) -> dict[object, tuple[object, ...]]:
+    return {
+        summary.date: (
+            summary.kcal,
+            summary.protein_g,
+            summary.carbs_g,
+            summary.fat_g,
+            summary.meals,
+            summary.entry_count,
+        )
+        for summary in DailyNutritionSummary.objects.filter(user=user)
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_entry_writes_apply_deltas_to_daily_summaries() -> None:
+    _, user = _auth_client()
+    oats = _food_item("1", kcal="380.00", protein="13.50")
+    milk = _food_item("2", kcal="64.00", protein="3.30")
+    now = timezone.now()
+    today = timezone.localdate(now)
+    yesterday = today - timedelta(days=1)
+
+    first = MealEntry.objects.create(
+        user=user,
+        food_item=oats,
+        meal_type="breakfast",
+        consumed_at=now,
+        quantity_g=Decimal("50.00"),
+    )
+    MealEntry.objects.create(
+        user=user,
+        food_item=milk,
+        meal_type="breakfast",
+        consumed_at=now,
+        quantity_g=Decimal("200.00"),
+    )
+    summary = DailyNutritionSummary.objects.get(user=user, date=today)
+    assert summary.kcal == Decimal("318.000000")
+    assert summary.protein_g == Decimal("13.350000")
+    assert summary.entry_count == 2
+    assert summary.meals["breakfast"]["kcal"] == "318.000000"
+    assert summary.meals["breakfast"]["entries"] == 2
+    version = summary.version
+
+    # Moving an entry to another meal and day moves its contribution.
+    first.meal_type = "snacks"
+    first.consumed_at = now - timedelta(days=1)
+    first.quantity_g = Decimal("10.00")
+    first.save()
+    summary.refresh_from_db()
+    assert summary.kcal == Decimal("128.000000")
+    assert summary.entry_count == 1
+    assert summary.version == version + 1
+    moved = DailyNutritionSummary.objects.get(user=user, date=yesterday)
+    assert moved.kcal == Decimal("38.000000")
+    assert moved.meals == {
+        "snacks": {
+            "kcal": "38.000000",
+            "protein_g": "1.350000",
+            "carbs_g": "0.000000",
+            "fat_g": "0.000000",
+            "entries": 1,
+        }
+    }
+
+    first.delete()
+    moved.refresh_from_db()
+    assert moved.kcal == Decimal("0")
+    assert moved.meals == {}
+    assert moved.entry_count == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_rebuild_matches_deltas_and_repairs_drift() -> None:
+    client, user = _auth_client()
+    items = [_food_item(str(index), kcal=f"{50 + index * 37}.25") for index in range(5)]
+    now = timezone.now()
+    for index in range(30):
+        MealEntry.objects.create(
+            user=user,
+            food_item=items[index % 5],
+            meal_type=MealEntry.MEAL_TYPE_CHOICES[index % 4][0],
+            consumed_at=now - timedelta(days=index % 3),
+            quantity_g=Decimal(f"{index * 7 % 300 + 1}.{index % 100:02d}"),
+        )
+    maintained = _snapshot(user)
+
+    DailyNutritionSummary.objects.filter(
+        user=user, date=timezone.localdate(now)
+    ).update(kcal=Decimal("1"), meals={}, entry_count=99)
+    before = DailyNutritionSummary.objects.get(user=user, date=timezone.localdate(now))
+    call_command("rebuild_nutrition_summaries", workers=1, chunk_size=1)
+
+    assert _snapshot(user) == maintained
+    after = DailyNutritionSummary.objects.get(user=user, date=timezone.localdate(now))
+    assert after.version == before.version + 1
+    response = client.get(
+        f"/api/v1/nutrition/day?date={timezone.localdate(now).isoformat()}"
+    )
+    assert response.data["totals"]["kcal"] == float(
+        maintained[timezone.localdate(now)][0].quantize(Decimal("0.01"))
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_food_macro_change_recomputes_logged_days(
+    django_capture_on_commit_callbacks,
+) -> None:
+    client, user = _auth_client()
+    item = _food_item("900", kcal="100.00")
+    MealEntry.objects.create(user=user, food_item=item, quantity_g=Decimal("50.00"))
+    url = f"/api/v1/nutrition/day?date={timezone.localdate().isoformat()}"
+    etag = client.get(url)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        _ingest_batch(client, "900", kcal="300.00")
+
+    assert not FoodSummaryRefresh.objects.exists()
+    summary = DailyNutritionSummary.objects.get(user=user)
+    assert summary.kcal == Decimal("150.000000")
+    refreshed = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert refreshed.status_code == 200
+    assert refreshed.data["totals"]["kcal"] == 150.0
+
+
+def _ingest_batch(client: APIClient, barcode: str, kcal: str) -> None:
+    response = client.generic(
+        "POST",
+        "/api/v1/foods/ingest/batch",
+        json.dumps(
+            {
+                "source": "openfoodfacts",
+                "external_id": barcode,
+                "barcode": barcode,
+                "name": f"Food {barcode}",
+                "kcal_100g": kcal,
+                "raw_source_json": {},
+            }
+        )
+        + "\n",
+        content_type="application/x-ndjson",
+    )
+    b"".join(response.streaming_content)
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@override_settings(NUTRITION_FOOD_REFRESH_INLINE=False)
+def test_food_macro_change_only_queues_work_on_the_request(
+    django_capture_on_commit_callbacks,
+) -> None:
+    client, user = _auth_client()
+    item = _food_item("901", kcal="100.00")
+    MealEntry.objects.create(user=user, food_item=item, quantity_g=Decimal("50.00"))
+
+    with (
+        patch("nutrition.summaries.threading.Thread") as thread,
+        django_capture_on_commit_callbacks(execute=True),
+    ):
+        _ingest_batch(client, "901", kcal="300.00")
+
+    thread.return_value.start.assert_called_once()
+    assert FoodSummaryRefresh.objects.filter(food_item=item).exists()
+    assert DailyNutritionSummary.objects.get(user=user).kcal == Decimal("50.000000")
+
+    out = StringIO()
+    call_command("rebuild_nutrition_summaries", pending=True, stdout=out)
+
+    assert "Refreshed the days of 1 food(s)." in out.getvalue()
+    assert not FoodSummaryRefresh.objects.exists()
+    assert DailyNutritionSummary.objects.get(user=user).kcal == Decimal("150.000000")
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_deleting_user_drops_summaries() -> None:
+    _, user = _auth_client()
+    MealEntry.objects.create(
+        user=user, food_item=_food_item("1", kcal="10"), quantity_g=Decimal("10")
+    )
+
+    user.delete()
+
+    assert not DailyNutritionSummary.objects.exists()
+    assert not MealEntry.objects.exists()
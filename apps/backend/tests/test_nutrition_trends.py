@@ -0,0 +1,202 @@
+from collections.abc import Iterator
+from datetime import date, datetime, time
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from foods.models import FoodItem
+from nutrition.models import DailyNutritionSummary, MealEntry
+from preferences.models import UserPreferences
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+def _auth_client() -> tuple[APIClient, object]:
+    user = get_user_model().objects.create_user(
+        username="trendsuser",
+        password="Str0ngPass!word",
+    )
+    client = APIClient()
+    token_response = client.post(
+        "/api/v1/auth/token",
+        {"username": user.username, "password": "Str0ngPass!word"},
+        format="json",
+    )
+    access_token = token_response.data["access"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client, user
+
+
+def _food_item() -> FoodItem:
+    return FoodItem.objects.create(
+        source=FoodItem.SOURCE_OPEN_FOOD_FACTS,
+        external_id="700",
+        barcode="700",
+        name="Trend Oats",
+        kcal_100g=Decimal("200.00"),
+        protein_g_100g=Decimal("10.00"),
+        raw_source_json={},
+    )
+
+
+def _log(user, item: FoodItem, day: str, kcal: int) -> MealEntry:
+    consumed_at = timezone.make_aware(
+        datetime.combine(date.fromisoformat(day), time(12))
+    )
+    return MealEntry.objects.create(
+        user=user,
+        food_item=item,
+        consumed_at=consumed_at,
+        quantity_g=Decimal(kcal) / 2,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _locmem_cache() -> Iterator[None]:
+    with override_settings(CACHES=LOCMEM_CACHES):
+        cache.clear()
+        yield
+        cache.clear()
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_daily_series_has_rolling_averages_and_goal_adherence() -> None:
+    client, user = _auth_client()
+    UserPreferences.objects.create(user=user, daily_calorie_goal=2000)
+    item = _food_item()
+    _log(user, item, "2026-03-01", 400)  # only inside the first rolling window
+    _log(user, item, "2026-03-02", 2000)
+    _log(user, item, "2026-03-03", 600)
+    _log(user, item, "2026-03-03", 400)
+    _log(user, item, "2026-03-05", 2100)
+
+    response = client.get(
+        "/api/v1/nutrition/summary?from=2026-03-02&to=2026-03-05&bucket=day&window=2"
+    )
+
+    assert response.status_code == 200
+    assert response.data["goal_kcal"] == 2000
+    series = response.data["series"]
+    assert [point["start"] for point in series] == [
+        "2026-03-02",
+        "2026-03-03",
+        "2026-03-04",
+        "2026-03-05",
+    ]
+    assert [point["totals"]["kcal"] for point in series] == [2000, 1000, 0, 2100]
+    assert series[1]["totals"]["protein_g"] == 50.0
+    assert [
+        point["rolling_average"]["kcal"] if point["rolling_average"] else None
+        for point in series
+    ] == [1200.0, 1500.0, 1000.0, 2100.0]
+    assert series[2]["daily_average"] is None
+    assert [point["days_on_goal"] for point in series] == [1, 0, 0, 1]
+    overall = response.data["overall"]
+    assert overall["days"] == 4
+    assert overall["logged_days"] == 3
+    assert overall["totals"]["kcal"] == 5100.0
+    assert overall["daily_average"]["kcal"] == 1700.0
+    assert overall["adherence"] == 0.6667
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_week_and_month_buckets_are_clipped_to_the_range() -> None:
+    client, user = _auth_client()
+    item = _food_item()
+    _log(user, item, "2026-03-08", 1000)
+    _log(user, item, "2026-03-09", 3000)
+
+    weeks = client.get(
+        "/api/v1/nutrition/summary?from=2026-03-04&to=2026-03-20&bucket=week"
+    ).data
+    assert [(p["start"], p["end"], p["days"]) for p in weeks["series"]] == [
+        ("2026-03-04", "2026-03-08", 5),
+        ("2026-03-09", "2026-03-15", 7),
+        ("2026-03-16", "2026-03-20", 5),
+    ]
+    assert [p["totals"]["kcal"] for p in weeks["series"]] == [1000, 3000, 0]
+    assert weeks["series"][2]["rolling_average"]["kcal"] == 2000.0
+    assert weeks["overall"]["adherence"] is None
+
+    months = client.get(
+        "/api/v1/nutrition/summary?from=2026-01-15&to=2026-03-10&bucket=month"
+    ).data
+    assert [(p["start"], p["end"], p["days"]) for p in months["series"]] == [
+        ("2026-01-15", "2026-01-31", 17),
+        ("2026-02-01", "2026-02-28", 28),
+        ("2026-03-01", "2026-03-10", 10),
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_summary_is_cached_until_an_entry_is_written() -> None:
+    client, user = _auth_client()
+    item = _food_item()
+    _log(user, item, "2026-03-02", 500)
+    url = "/api/v1/nutrition/summary?from=2026-03-01&to=2026-03-31"
+
+    first = client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        cached = client.get(url)
+    assert cached.data == first.data
+    summary_queries = [
+        q["sql"] for q in queries if "nutrition_dailynutritionsummary" in q["sql"]
+    ]
+    assert len(summary_queries) == 1
+    assert "SUM(" in summary_queries[0]
+
+    _log(user, item, "2026-03-03", 700)
+
+    refreshed = client.get(url)
+    assert refreshed.data["overall"]["totals"]["kcal"] == 1200.0
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+def test_summary_written_by_another_process_is_not_served_stale() -> None:
+    client, user = _auth_client()
+    item = _food_item()
+    _log(user, item, "2026-03-02", 500)
+    url = "/api/v1/nutrition/summary?from=2026-03-01&to=2026-03-31"
+    client.get(url)
+
+    # A write that only touches the database, as another worker's would.
+    DailyNutritionSummary.objects.filter(user=user).update(
+        kcal=Decimal("800"), version=F("version") + 1
+    )
+
+    refreshed = client.get(url)
+    assert refreshed.data["overall"]["totals"]["kcal"] == 800.0
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    "query",
+    [
+        "from=2026-03-05&to=2026-03-01",
+        "from=2020-01-01&to=2026-03-01",
+        "from=2026-13-01",
+        "bucket=year",
+        "window=0",
+    ],
+)
+def test_invalid_summary_options_are_rejected(query: str) -> None:
+    client, _ = _auth_client()
+
+    response = client.get(f"/api/v1/nutrition/summary?{query}")
+
+    assert response.status_code == 400
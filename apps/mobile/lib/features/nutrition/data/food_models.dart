@@ -264,7 +264,8 @@ class FoodItem {
   static FoodItem fromBackendSummary(Map<String, dynamic> map) {
     final backendId = map['id'] as int?;
     final barcode = map['barcode']?.toString();
-    final imageSmallUrl = map['image_small_url'] as String?;
+    final imageSmallUrl = (map['image_small_webp_url'] as String?) ??
+        map['image_small_url'] as String?;
     final imageUrl = imageSmallUrl ?? map['image_url'] as String?;
     return FoodItem(
       backendId: backendId,
@@ -306,7 +307,8 @@ class FoodItem {
       barcode: barcode,
       name: (map['name'] as String?) ?? '',
       brands: (map['brands'] as String?) ?? '',
-      imageUrl: (map['image_small_url'] as String?) ??
+      imageUrl: (map['image_small_webp_url'] as String?) ??
+          (map['image_small_url'] as String?) ??
           (map['image_url'] as String?),
       imageSignature: map['image_signature'] as String?,
       contentHash: (map['content_hash'] as String?) ?? '',
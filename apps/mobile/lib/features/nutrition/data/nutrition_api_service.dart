@@ -61,22 +61,40 @@ class NutritionApiService {
             );
 
   final Dio _dio;
+  // Last day log per date with its ETag, revalidated with If-None-Match.
+  final Map<String, (String, NutritionDayLog)> _dayCache = {};
 
   void updateToken(String accessToken) {
     _dio.options.headers['Authorization'] = 'Bearer $accessToken';
+    _dayCache.clear();
   }
 
   Future<NutritionDayLog> fetchDay(DateTime date) async {
+    final day = _formatDate(date);
+    final cached = _dayCache[day];
     try {
       final response = await _dio.get<Map<String, dynamic>>(
         '/api/v1/nutrition/day',
-        queryParameters: {'date': _formatDate(date)},
+        queryParameters: {'date': day},
+        options: Options(
+          headers: {if (cached != null) 'If-None-Match': cached.$1},
+          validateStatus: (status) =>
+              status != null && (status == 304 || status ~/ 100 == 2),
+        ),
       );
+      if (response.statusCode == 304 && cached != null) {
+        return cached.$2;
+      }
       final data = response.data;
       if (data is! Map<String, dynamic>) {
         throw ApiException('Unexpected response from server.');
       }
-      return _parseDayLog(data);
+      final log = _parseDayLog(data);
+      final etag = response.headers.value('etag');
+      if (etag != null) {
+        _dayCache[day] = (etag, log);
+      }
+      return log;
     } on DioException catch (error) {
       throw ApiException(
         'Unable to load nutrition data.',